@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+datagen.py — Deterministic synthetic data for the benchmark suite.
+
+Generates London.md-style markdown, Google Takeout-style CSVs (title preamble
+included), reservation CSVs, saved event-listing pages and populated
+london_venues.db files at any scale.
+The same (scale, seed) pair always produces byte-identical output, so timings
+are comparable run to run.
+
+Usage:
+    python3 bench/datagen.py --scale 10000 --out /tmp/bench-data
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+import london_venues  # noqa: E402
+
+DEFAULT_SEED = 2026
+
+ADJECTIVES = [
+    "Black", "Golden", "Crooked", "Royal", "Old", "Little", "Grand", "Silver",
+    "Hidden", "Red", "Green", "Jolly", "Wandering", "Velvet", "Iron", "Painted",
+]
+NOUNS = [
+    "Lion", "Crown", "Anchor", "Swan", "Gallery", "Market", "Kitchen", "Tavern",
+    "Museum", "Garden", "Cellar", "Theatre", "Arms", "Bridge", "Yard", "Hall",
+]
+SYLLABLES = [
+    "ba", "ke", "lo", "mi", "nu", "ra", "so", "ti", "vo", "we", "za", "qu",
+    "fe", "do", "hy", "pe",
+]
+STREETS = [
+    "Dean St", "Old Compton St", "Brick Ln", "Exhibition Rd", "Strand",
+    "Borough High St", "Camden High St", "Mare St", "Floral St", "King St",
+]
+POSTCODES = ["W1D 4PX", "E1 6QL", "SW7 2RL", "WC2R 0JR", "SE1 9AG", "NW1 8AH", "E8 4RP"]
+SECTIONS = sorted(london_venues.VENUE_SECTIONS)
+TAGS = ["🍴 Food", "🖼️ Art", "📜 Sites", "🛍️ Shopping", ""]
+CATEGORIES = ["concert", "exhibition", "comedy", "theatre", "market", "tour"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+TRIP_DATES = [f"2026-02-{d:02d}" for d in range(13, 21)]
+LISTING_MAX_PAGES = 500
+LISTING_EVENTS_PER_PAGE = 20
+
+
+def _suffix(i: int) -> str:
+    """Encode an index as letters only so parse_markdown's name patterns match."""
+    parts = []
+    while True:
+        i, r = divmod(i, len(SYLLABLES))
+        parts.append(SYLLABLES[r])
+        if i == 0:
+            break
+    return "".join(parts).capitalize()
+
+
+def venue_name(i: int) -> str:
+    """Return the i-th synthetic venue name (unique, letters and spaces only)."""
+    adj = ADJECTIVES[i % len(ADJECTIVES)]
+    noun = NOUNS[(i // len(ADJECTIVES)) % len(NOUNS)]
+    return f"The {adj} {noun} {_suffix(i)}"
+
+
+def _variant(name: str, rng: random.Random) -> str:
+    """Return a spelling variant that normalize_name maps back to ``name``."""
+    choice = rng.randrange(3)
+    if choice == 0:
+        return name.upper()
+    if choice == 1:
+        return f"{name} Tour"
+    return name.replace("The ", "The  ")
+
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+def make_markdown(n: int, seed: int = DEFAULT_SEED) -> str:
+    """Build London.md-style markdown containing ``n`` venue bullets."""
+    rng = random.Random(seed)
+    lines = ["# London  ", "  ", "## Prep  ",
+             "* [UK ETA application](https://www.gov.uk/eta/apply)  ",
+             "    * only use the official site  "]
+    per_section = max(1, n // len(SECTIONS))
+    i = 0
+    for s_idx, section in enumerate(SECTIONS):
+        header = "##" if s_idx % 2 == 0 else "###"
+        lines += ["  ", f"{header} {section}  "]
+        count = per_section if s_idx < len(SECTIONS) - 1 else n - i
+        for _ in range(count):
+            name = venue_name(i)
+            slug = name.lower().replace(" ", "-")
+            style = rng.randrange(4)
+            if style == 0:
+                lines.append(f"* [{name}](https://example.com/{slug}) (open late)  ")
+            elif style == 1:
+                lines.append(f"* {name} ([reviews](https://example.com/{slug}/reviews))  ")
+            elif style == 2:
+                lines.append(f"* {name}. [Tickets](https://example.com/{slug}/tickets)  ")
+            else:
+                lines.append(f"* {name}  ")
+            if rng.random() < 0.1:
+                lines.append("    * sub-bullet note that should be ignored  ")
+            i += 1
+        if s_idx == 1:
+            lines += ["  ", "### Stuff going on  ",
+                      "* Read [Time Out London](https://www.timeout.com/london)  "]
+    return "\n".join(lines) + "\n"
+
+
+def make_takeout_csv(n: int, md_count: int, seed: int = DEFAULT_SEED) -> str:
+    """Build a Takeout "Saved" list CSV with ``n`` rows, ~30% overlapping markdown."""
+    rng = random.Random(seed + 1)
+    out = ["Stuff to visit in London", "", "Title,Note,URL,Tags,Comment",
+           ",,,🖼️ Art;📜 Sites;🛍️ Shopping,"]
+    rows = []
+    for j in range(n):
+        if md_count and rng.random() < 0.3:
+            name = _variant(venue_name(rng.randrange(md_count)), rng)
+        else:
+            name = venue_name(md_count + j)
+        url = f"https://www.google.com/maps/place/{name.replace(' ', '+')}"
+        rows.append([name, "", url, TAGS[rng.randrange(len(TAGS))], ""])
+    buf = _CsvBuffer()
+    csv.writer(buf, lineterminator="\n").writerows(rows)
+    return "\n".join(out) + "\n" + buf.text()
+
+
+def make_reservations_csv(n: int, venue_count: int, seed: int = DEFAULT_SEED) -> str:
+    """Build a reservations CSV (import_reservations_csv format) with ``n`` rows."""
+    rng = random.Random(seed + 2)
+    buf = _CsvBuffer()
+    w = csv.writer(buf, lineterminator="\n")
+    w.writerow(["venue", "date", "time", "end_time", "confirmation", "party_size", "notes"])
+    for k in range(n):
+        name = venue_name(rng.randrange(max(1, venue_count)))
+        if rng.random() < 0.3:
+            name = _variant(name, rng)
+        hour = 9 + rng.randrange(13)
+        w.writerow([name, TRIP_DATES[rng.randrange(len(TRIP_DATES))], f"{hour:02d}:{15 * rng.randrange(4):02d}",
+                    f"{hour + 2:02d}:00" if rng.random() < 0.5 else "",
+                    f"CONF{k:06d}", rng.randrange(1, 7), "synthetic" if rng.random() < 0.2 else ""])
+    return buf.text()
+
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html><head><link rel="canonical" href="https://www.timeout.com/london/things-to-do/page-{page}">
+<script type="application/ld+json">{jsonld}</script></head>
+<body><h1>Things to do in London</h1></body></html>
+"""
+
+
+def make_listings(out_dir: Path, pages: int, per_page: int, venue_count: int,
+                  seed: int = DEFAULT_SEED) -> Path:
+    """Write ``pages`` saved Time Out-style listing pages (schema.org JSON-LD).
+
+    Events are drawn from a pool of pages * per_page // 2, so roughly half of
+    each page repeats events listed elsewhere, as real listing pages do.
+    """
+    rng = random.Random(seed + 3)
+    listing_dir = out_dir / "listings" / "timeout"
+    listing_dir.mkdir(parents=True, exist_ok=True)
+    pool = max(1, pages * per_page // 2)
+    for page in range(pages):
+        items = []
+        for position in range(per_page):
+            k = rng.randrange(pool)
+            event = {
+                "@type": "MusicEvent" if k % 3 else "ComedyEvent",
+                "name": f"{ADJECTIVES[k % len(ADJECTIVES)]} {NOUNS[k // 7 % len(NOUNS)]} Night {k}",
+                "startDate": f"{TRIP_DATES[k % len(TRIP_DATES)]}T{18 + k % 4}:{15 * (k % 4):02d}:00",
+                "location": {"@type": "Place", "name": venue_name(k % max(1, venue_count))},
+                "offers": {"@type": "Offer", "price": str(5 + k % 30), "priceCurrency": "GBP"},
+                "url": f"https://www.timeout.com/london/events/{k}",
+            }
+            items.append({"@type": "ListItem", "position": position + 1, "item": event})
+        jsonld = json.dumps({"@context": "https://schema.org", "@type": "ItemList", "itemListElement": items})
+        (listing_dir / f"page-{page:04d}.html").write_text(
+            LISTING_TEMPLATE.format(page=page, jsonld=jsonld), encoding="utf-8")
+    return listing_dir.parent
+
+
+class _CsvBuffer:
+    """Minimal write()-able sink so csv.writer output can be joined cheaply."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, s):
+        self.parts.append(s)
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+# ---------------------------------------------------------------------------
+# Database
+# ---------------------------------------------------------------------------
+
+def _hours(rng: random.Random) -> dict:
+    open_h = 8 + rng.randrange(4)
+    close_h = 17 + rng.randrange(7)
+    periods = [{"open": {"day": d, "hour": open_h, "minute": 0},
+                "close": {"day": d, "hour": close_h, "minute": 0}} for d in range(7)]
+    descriptions = [f"{day}: {open_h}:00 AM – {close_h - 12}:00 PM" for day in DAYS]
+    return {"openNow": False, "periods": periods, "weekdayDescriptions": descriptions}
+
+
+def make_db(db_path: Path, n: int, seed: int = DEFAULT_SEED) -> dict:
+    """Create a populated london_venues.db with ``n`` venues.
+
+    Events are n/10 and reservations n/100 (at least 10 of each). Returns the
+    row counts written.
+    """
+    rng = random.Random(seed + 3)
+    if db_path.exists():
+        db_path.unlink()
+    conn = london_venues.init_db(db_path)
+    fetched_at = "2026-01-20T12:00:00"
+
+    venues = []
+    for i in range(n):
+        name = venue_name(i)
+        hours = _hours(rng)
+        place_id = f"ChIJsynthetic{i:08d}"
+        api = {
+            "id": place_id,
+            "displayName": {"text": name, "languageCode": "en"},
+            "formattedAddress": f"{1 + rng.randrange(200)} {STREETS[rng.randrange(len(STREETS))]}, "
+                                f"London {POSTCODES[rng.randrange(len(POSTCODES))]}, UK",
+            "regularOpeningHours": hours,
+            "googleMapsUri": f"https://maps.google.com/?cid={i}",
+        }
+        record = london_venues.build_venue_record(
+            name, ["markdown", "google_maps", "both"][i % 3], SECTIONS[i % len(SECTIONS)], api)
+        record["fetched_at"] = fetched_at
+        venues.append(record)
+    conn.executemany("""
+        INSERT INTO venues (name, source, section, search_query, google_place_id,
+                            google_display_name, address, regular_hours_json,
+                            regular_hours_text, google_maps_uri, raw_response, fetched_at)
+        VALUES (:name, :source, :section, :search_query, :google_place_id,
+                :google_display_name, :address, :regular_hours_json,
+                :regular_hours_text, :google_maps_uri, :raw_response, :fetched_at)
+    """, venues)
+    conn.executemany(
+        "UPDATE venues SET ticket_price = ?, booking_required = ?, booking_url = ? WHERE name = ?",
+        [(f"£{5 + rng.randrange(40)}", rng.choice(["yes", "no", "recommended", "free"]),
+          f"https://example.com/book/{i}", venue_name(i)) for i in range(0, n, 3)])
+
+    n_events = max(10, n // 10)
+    events = []
+    for k in range(n_events):
+        venue = venue_name(rng.randrange(n)) if n and rng.random() < 0.9 else None
+        events.append((f"Synthetic Event {k}", venue, rng.choice(TRIP_DATES + [None]),
+                       f"{1 + rng.randrange(11)}pm", f"£{rng.randrange(60)}",
+                       f"https://example.com/event/{k}", rng.choice(CATEGORIES),
+                       "generated" if rng.random() < 0.3 else None, "bench", fetched_at))
+    conn.executemany("""
+        INSERT OR IGNORE INTO events (title, venue_name, date, time, price, url,
+                                      category, notes, source, fetched_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, events)
+
+    n_res = max(10, n // 100)
+    reservations = []
+    for k in range(n_res):
+        name = venue_name(rng.randrange(max(1, n)))
+        hour = 9 + rng.randrange(13)
+        reservations.append((name, name, rng.choice(TRIP_DATES), f"{hour:02d}:{15 * rng.randrange(4):02d}",
+                             None, f"CONF{k:06d}", rng.randrange(1, 7), None, fetched_at))
+    conn.executemany("""
+        INSERT OR IGNORE INTO reservations (venue_name, matched_venue, date, time, end_time,
+                                            confirmation, party_size, notes, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, reservations)
+    conn.commit()
+    conn.close()
+    return {"venues": n, "events": n_events, "reservations": n_res}
+
+
+def make_dataset(out_dir: Path, n: int, seed: int = DEFAULT_SEED) -> dict:
+    """Write a full dataset for scale ``n`` into ``out_dir`` and return its paths."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    md_count = n // 2
+    csv_dir = out_dir / "takeout"
+    csv_dir.mkdir(exist_ok=True)
+
+    md_path = out_dir / "London.md"
+    md_path.write_text(make_markdown(md_count, seed), encoding="utf-8")
+    (csv_dir / "Saved.csv").write_text(make_takeout_csv(n - md_count, md_count, seed), encoding="utf-8")
+    res_path = out_dir / "reservations.csv"
+    res_path.write_text(make_reservations_csv(max(10, n // 1000), n, seed), encoding="utf-8")
+    db_path = out_dir / "london_venues.db"
+    counts = make_db(db_path, n, seed)
+    listings = make_listings(out_dir, min(LISTING_MAX_PAGES, max(20, n // 20)), LISTING_EVENTS_PER_PAGE, n, seed)
+
+    return {"md": md_path, "csv_dir": csv_dir, "reservations_csv": res_path,
+            "db": db_path, "listings": listings, "counts": counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic benchmark data")
+    parser.add_argument("--scale", type=int, default=1000, help="Number of venues to generate")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    parser.add_argument("--out", required=True, help="Output directory")
+    args = parser.parse_args()
+
+    paths = make_dataset(Path(args.out), args.scale, args.seed)
+    print(json.dumps({k: str(v) if isinstance(v, Path) else v for k, v in paths.items()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+run_bench.py — Time the parsing, dedup, matching and rendering hot paths on
+synthetic data and write the results as JSON.
+
+Usage:
+    python3 bench/run_bench.py                          # 1k/10k/100k, results to bench/results/
+    python3 bench/run_bench.py --scales 1000 --repeat 5
+    python3 bench/run_bench.py --only parse_markdown,web:/venues
+    python3 bench/run_bench.py --compare bench/results/old.json   # diff against a previous run
+
+Each benchmark reports every repeat plus min/median, so two result files can
+be compared run to run (see --compare).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+import datagen  # noqa: E402
+import london_venues  # noqa: E402
+import places_simulator  # noqa: E402
+import web_viewer  # noqa: E402
+
+RESULTS_DIR = BENCH_DIR / "results"
+DEFAULT_SCALES = "1000,10000,100000"
+
+# Viewer routes to time: (benchmark name, path, table whose size is "n" or
+# None for single-row pages). "{venue_id}"/"{event_id}" are filled in per run.
+WEB_ROUTES = [
+    ("web:/venues", "/venues", "venues"),
+    ("web:/venue", "/venue?id={venue_id}", None),
+    ("web:/events", "/events", "events"),
+    ("web:/event", "/event?id={event_id}", None),
+    ("web:/reservations", "/reservations", "reservations"),
+    ("web:/api/venues", "/api/venues", "venues"),
+    ("web:/api/events", "/api/events", "events"),
+    ("web:/api/reservations", "/api/reservations", "reservations"),
+    ("web:/api/venue", "/api/venue/{venue_id}", None),
+    ("web:/static/style.css", "/static/style.css", None),
+]
+
+# Viewer paths not under these prefixes are served through the page cache.
+UNCACHED_PREFIXES = ("/api/", "/static/")
+
+FUZZY_QUERIES = 50
+
+# The sync benchmarks swap fetch_place for a stub that sleeps this long, and
+# only run up to SYNC_MAX_SCALE venues (every venue is a fetch).
+FAKE_FETCH_SECONDS = 0.001
+SYNC_MAX_SCALE = 10000
+# sync_pipeline_simulated goes through fetch_place and HTTP to an in-process
+# places_simulator with this per-request latency, up to SIM_SYNC_MAX_SCALE venues.
+SIM_LATENCY = "fixed:2"
+SIM_SYNC_MAX_SCALE = 1000
+
+# The day planner bench fits max(30, scale // 100) stops (capped at
+# PLAN_MAX_STOPS) spread over central London around three fixed anchors.
+PLAN_MAX_STOPS = 300
+PLAN_VISIT_MINUTES = 15
+
+
+def _timed(fn, repeat: int) -> list:
+    """Run fn ``repeat`` times with stdout discarded; return wall times in seconds."""
+    times = []
+    with open(os.devnull, "w") as devnull:
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - start)
+    return times
+
+
+def _result(name: str, scale: int, n: int, times: list, retained_bytes: int = None) -> dict:
+    result = {
+        "name": name,
+        "scale": scale,
+        "n": n,
+        "seconds": [round(t, 6) for t in times],
+        "min": round(min(times), 6),
+        "median": round(statistics.median(times), 6),
+    }
+    if retained_bytes is not None:
+        result["bytes"] = retained_bytes
+    return result
+
+
+def _retained_bytes(build) -> int:
+    """Bytes still allocated by whatever ``build()`` returns, per tracemalloc."""
+    tracemalloc.start()
+    try:
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def _serve(db_path: Path):
+    """Start web_viewer against ``db_path`` on an ephemeral port."""
+    web_viewer.DB_PATH = db_path
+    server = ThreadingHTTPServer(("127.0.0.1", 0), web_viewer.Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _clear_page_caches():
+    for trip in list(web_viewer.TRIPS.open.values()):
+        trip.pages.clear()
+
+
+def _fetch(url: str):
+    with urllib.request.urlopen(url, timeout=600) as resp:
+        resp.read()
+
+
+def _fake_fetch(name: str, api_key: str) -> dict:
+    time.sleep(FAKE_FETCH_SECONDS)
+    return {"id": f"fake-{name}", "displayName": {"text": name}, "formattedAddress": "London"}
+
+
+def _sync_sequential(data: dict, db_path: Path):
+    """The pre-pipeline sync: each phase runs to completion, one commit per venue."""
+    db_path.unlink(missing_ok=True)
+    conn = london_venues.init_db(db_path)
+    venues = london_venues.deduplicate_venues(london_venues.parse_markdown(data["md"]) +
+                                              london_venues.parse_takeout_csvs(data["csv_dir"]))
+    cached = london_venues.get_cached_names(conn)
+    for v in venues:
+        if v["name"] not in cached:
+            result = _fake_fetch(v["name"], "")
+            london_venues.upsert_venue(conn, london_venues.build_venue_record(
+                v["name"], v["source"], v["section"], result))
+    conn.close()
+
+
+def _sync_pipeline(data: dict, db_path: Path):
+    db_path.unlink(missing_ok=True)
+    conn = london_venues.init_db(db_path)
+    london_venues.SyncPipeline(conn, data["md"], data["csv_dir"], "", fetch=_fake_fetch).run()
+    conn.close()
+
+
+def _sync_simulated(data: dict, db_path: Path):
+    """The real fetch path (fetch_place over HTTP) against places_simulator."""
+    db_path.unlink(missing_ok=True)
+    conn = london_venues.init_db(db_path)
+    london_venues.SyncPipeline(conn, data["md"], data["csv_dir"], "bench").run()
+    conn.close()
+
+
+def _plan_inputs(stops: int):
+    """Deterministic DayPlanner arguments: ``stops`` free stops plus three anchors."""
+    rng = random.Random(stops)
+    coords = [(51.49 + rng.random() * 0.04, -0.19 + rng.random() * 0.12) for _ in range(stops + 3)]
+    anchors = {stops: (12 * 60, 13 * 60 + 30), stops + 1: (16 * 60, 17 * 60), stops + 2: (19 * 60, 21 * 60)}
+    windows = {i: [(rng.choice((8, 9, 10, 11)) * 60, rng.choice((17, 18, 22, 23)) * 60)]
+               for i in range(stops)}
+    return london_venues.walk_minutes_matrix(coords), anchors, windows
+
+
+def bench_scale(scale: int, repeat: int, workdir: Path, only: set) -> list:
+    """Generate a dataset for ``scale`` and run every selected benchmark on it."""
+    def wanted(name):
+        return not only or name in only
+
+    print(f"[{scale}] generating dataset...", file=sys.stderr)
+    data = datagen.make_dataset(workdir / str(scale), scale)
+    results = []
+
+    def run(name, n, fn, times=repeat, retained_bytes=None):
+        if not wanted(name):
+            return
+        print(f"[{scale}] {name}", file=sys.stderr)
+        results.append(_result(name, scale, n, _timed(fn, times), retained_bytes))
+
+    run("parse_markdown", scale // 2, lambda: london_venues.parse_markdown(data["md"]))
+    run("parse_takeout_csvs", scale - scale // 2, lambda: london_venues.parse_takeout_csvs(data["csv_dir"]))
+
+    parsed = london_venues.parse_markdown(data["md"]) + london_venues.parse_takeout_csvs(data["csv_dir"])
+    # deduplicate_venues mutates "source" in place, so give each repeat a fresh copy
+    run("deduplicate_venues", len(parsed),
+        lambda: london_venues.deduplicate_venues([dict(v) for v in parsed]))
+
+    conn = london_venues.init_db(data["db"])
+    names = [datagen.venue_name(i * max(1, scale // FUZZY_QUERIES)) for i in range(FUZZY_QUERIES)]
+    queries = [n if i % 3 == 0 else (n.upper() if i % 3 == 1 else f"{n} Tour")
+               for i, n in enumerate(names)]
+    queries[-1] = "No Such Venue Anywhere"
+
+    def fuzzy_batch():
+        for q in queries:
+            london_venues.fuzzy_match_venue(conn, q)
+
+    run("fuzzy_match_venue", len(queries), fuzzy_batch)
+    run("print_summary", scale, lambda: london_venues.print_summary(conn))
+    run("print_report", scale, lambda: london_venues.print_report(conn))
+    conn.close()
+
+    if wanted("import_reservations_csv"):
+        # Imports write to the DB, so run them against a scratch copy
+        scratch = workdir / f"{scale}-import.db"
+        shutil.copy(data["db"], scratch)
+        import_conn = london_venues.init_db(scratch)
+        n_rows = sum(1 for _ in open(data["reservations_csv"], encoding="utf-8")) - 1
+        run("import_reservations_csv", n_rows,
+            lambda: london_venues.import_reservations_csv(import_conn, data["reservations_csv"]))
+        import_conn.close()
+
+    if wanted("ingest_listings_serial") or wanted("ingest_listings"):
+        scratch = workdir / f"{scale}-listings.db"
+        shutil.copy(data["db"], scratch)
+        listing_conn = london_venues.init_db(scratch)
+        pages = sum(1 for _ in data["listings"].rglob("*.html"))
+        run("ingest_listings_serial", pages,
+            lambda: london_venues.ingest_listings(listing_conn, data["listings"], jobs=1))
+        run("ingest_listings", pages, lambda: london_venues.ingest_listings(listing_conn, data["listings"]))
+        listing_conn.close()
+
+    if scale <= SYNC_MAX_SCALE:
+        sync_db = workdir / f"{scale}-sync.db"
+        run("sync_sequential", scale, lambda: _sync_sequential(data, sync_db), times=1)
+        run("sync_pipeline", scale, lambda: _sync_pipeline(data, sync_db), times=1)
+
+    if scale <= SIM_SYNC_MAX_SCALE and wanted("sync_pipeline_simulated"):
+        server, url = places_simulator.start_in_thread(places_simulator.Simulator(latency=SIM_LATENCY))
+        real_url = london_venues.PLACES_API_URL
+        london_venues.PLACES_API_URL = url
+        try:
+            run("sync_pipeline_simulated", scale,
+                lambda: _sync_simulated(data, workdir / f"{scale}-sim.db"), times=1)
+        finally:
+            london_venues.PLACES_API_URL = real_url
+            server.shutdown()
+            server.server_close()
+
+    # The viewer's venue list: a query per request vs the in-memory snapshot.
+    # "bytes" is what each keeps alive: the fetched rows or the snapshot.
+    if wanted("list_venues_query") or wanted("list_venues_snapshot"):
+        list_conn = web_viewer.get_db(data["db"])
+        # Measure the snapshot before anything else interns the same strings
+        snapshot_bytes = _retained_bytes(lambda: web_viewer.VenueSnapshot(
+            list_conn.execute(web_viewer.VENUE_LIST_SQL)))
+        rows_bytes = _retained_bytes(lambda: list_conn.execute(web_viewer.VENUE_LIST_SQL).fetchall())
+        venues = web_viewer.VenueListCache(data["db"])
+        venues.get()
+        run("list_venues_query", scale, lambda: web_viewer.Pages(list_conn).list_venues(),
+            retained_bytes=rows_bytes)
+        run("list_venues_snapshot", scale, lambda: web_viewer.Pages(list_conn, venues=venues).list_venues(),
+            retained_bytes=snapshot_bytes)
+        venues.close()
+        list_conn.close()
+
+    if wanted("plan_day") and london_venues.np is not None:
+        stops = min(PLAN_MAX_STOPS, max(30, scale // 100))
+        travel, anchors, windows = _plan_inputs(stops)
+        run("plan_day", stops, lambda: london_venues.DayPlanner(
+            travel, anchors, windows, visit=PLAN_VISIT_MINUTES).plan())
+
+    # HTML pages go through the trip's page cache: "web:/venues" clears it
+    # before every fetch so it times rendering, "web:/venues_cached" times hits.
+    routes = [r for r in WEB_ROUTES if wanted(r[0]) or wanted(r[0] + "_cached")]
+    if routes:
+        server = _serve(data["db"])
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        ids = {"venue_id": 1, "event_id": 1}
+        try:
+            for name, route, table in routes:
+                path = route.format(**ids)
+                n = data["counts"][table] if table else 1
+                if path.startswith(UNCACHED_PREFIXES):
+                    run(name, n, lambda: _fetch(base + path))
+                    continue
+                run(name, n, lambda: (_clear_page_caches(), _fetch(base + path)))
+                if wanted(name + "_cached"):
+                    _fetch(base + path)
+                    run(name + "_cached", n, lambda: _fetch(base + path))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline_path: Path):
+    """Print median deltas between ``current`` and a previous results file."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    old = {(r["name"], r["scale"]): r for r in baseline["results"]}
+    print(f"\n{'benchmark':<32} {'scale':>8} {'old (s)':>10} {'new (s)':>10} {'ratio':>7}")
+    for r in current["results"]:
+        prev = old.get((r["name"], r["scale"]))
+        if not prev:
+            continue
+        ratio = r["median"] / prev["median"] if prev["median"] else float("inf")
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        print(f"{r['name']:<32} {r['scale']:>8} {prev['median']:>10.4f} {r['median']:>10.4f} {ratio:>6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="london_venues benchmark suite")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated venue counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats per benchmark")
+    parser.add_argument("--only", default="", help="Comma-separated benchmark names to run")
+    parser.add_argument("--out", help="Results JSON path (default: bench/results/<timestamp>.json)")
+    parser.add_argument("--workdir", help="Where to generate datasets (default: a temp dir)")
+    parser.add_argument("--compare", metavar="JSON", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+
+    tmp = None
+    if args.workdir:
+        workdir = Path(args.workdir)
+        workdir.mkdir(parents=True, exist_ok=True)
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="london-bench-")
+        workdir = Path(tmp.name)
+
+    results = []
+    try:
+        for scale in scales:
+            results.extend(bench_scale(scale, args.repeat, workdir, only))
+    finally:
+        if tmp:
+            tmp.cleanup()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "scales": scales,
+        },
+        "results": results,
+    }
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote {len(results)} result(s) to {out}")
+
+    for r in results:
+        memory = f"  {r['bytes'] / 1024:,.0f} KiB" if "bytes" in r else ""
+        print(f"  {r['name']:<32} {r['scale']:>8}  median {r['median']:.4f}s  (n={r['n']}){memory}")
+
+    if args.compare:
+        compare(report, Path(args.compare))
+
+
+if __name__ == "__main__":
+    main()
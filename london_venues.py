@@ -8,6 +8,14 @@ Usage:
     python3 london_venues.py --refetch "Name"      # re-fetch a specific venue
     python3 london_venues.py --dump                 # dump all cached data as JSON
     python3 london_venues.py --parse-only           # just show what venues were parsed (no API calls)
+    python3 london_venues.py --distance "Tate Modern" "Borough Market"   # km + walking estimate (NumPy)
+    python3 london_venues.py --nearest-to "Tate Modern" -k 5
+    python3 london_venues.py --plan-day 2026-02-17 --venues "Tate Modern" "Borough Market" "Sky Garden"
+    python3 london_venues.py --merge-places         # fold venues sharing a Google place ID into one row
+    python3 london_venues.py --dry-run              # how many API calls a sync would make, and cost
+    python3 london_venues.py --ids-only             # sync place IDs only; details are fetched on first use
+    python3 london_venues.py --max-calls 20         # sync, but stop after 20 API calls
+    python3 london_venues.py --api-usage            # calls/latency/bytes per day from the ledger
 
     python3 london_venues.py --set-booking "Venue" --price "£10" --booking-required yes \
         --booking-url "https://..." --booking-notes "Notes" --member-required no
@@ -15,37 +23,93 @@ Usage:
     python3 london_venues.py --add-event --title "Event" --venue "Venue" \
         --date "2026-02-15" --time "8pm" --price "£25" --url "https://..." \
         --category "concert" --source "halibuts" --notes "Notes"
+    python3 london_venues.py --import-events events.csv   # bulk CSV / NDJSON / .ics import
+    python3 london_venues.py --ingest-listings listings/   # saved Time Out / halibuts / Songkick pages
 
     python3 london_venues.py --report              # full research report
     python3 london_venues.py --events              # list all events during trip
+    python3 london_venues.py --events --from 2026-02-14 --to 2026-02-16   # only events in a date range
+    python3 london_venues.py --report --format markdown > report.md   # also csv / html; default text
+    python3 london_venues.py --day 2026-02-17      # one day: reservations, events, venues open
+    python3 london_venues.py --render-schedule     # day-by-day schedule_generated.html from the DB
 
     python3 london_venues.py --import-reservations reservations.csv
-    python3 london_venues.py --reservations        # list all reservations
+    python3 london_venues.py --reservations        # list all reservations (also takes --from/--to)
+    python3 london_venues.py --export-ics trip.ics [--since 2026-02-10T00:00]   # calendar export
     python3 london_venues.py --add-reservation "Duck & Waffle" --date 2026-02-17 \
         --time 19:15 --end-time 21:00 --confirmation ABC123 --party-size 2
 
-Requires GOOGLE_MAPS_API_KEY env var for API calls.
+    python3 london_venues.py --changes-since 0     # NDJSON of changed rows; pass the last seq next time
+    python3 london_venues.py --compact-changes     # drop superseded change log entries
+
+    python3 london_venues.py --serve-socket        # keep the DB warm, take commands over a socket
+    python3 venues_client.py --add-event --title "Event" --venue "Venue"   # forwarded to the daemon
+
+Requires GOOGLE_MAPS_API_KEY env var for API calls. Set PLACES_API_URL to sync
+against places_simulator.py instead of Google.
 """
 
 import argparse
+import contextlib
 import csv
+import hashlib
+import html
+import io
+import itertools
 import json
 import os
+import queue
 import re
+import socket
 import sqlite3
 import sys
+import threading
+import time
+import traceback
 import urllib.request
 import urllib.error
-from datetime import datetime
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
 from pathlib import Path
+from string import Template
 from typing import Optional
 
+try:
+    import numpy as np
+except ImportError:  # only --distance / --nearest-to / --plan-day need it
+    np = None
+
 SCRIPT_DIR = Path(__file__).parent
 DB_PATH = SCRIPT_DIR / "london_venues.db"
 MD_PATH = SCRIPT_DIR / "London.md"
-
-PLACES_API_URL = "https://places.googleapis.com/v1/places:searchText"
-FIELD_MASK = "places.id,places.displayName,places.formattedAddress,places.regularOpeningHours,places.googleMapsUri"
+SOCKET_PATH = SCRIPT_DIR / ".london_venues.sock"
+DISTANCE_PATH = SCRIPT_DIR / ".distance_matrix.npz"
+
+# Override with PLACES_API_URL (e.g. http://127.0.0.1:8765/v1/places:searchText
+# for places_simulator.py); details requests go to the same host unless
+# PLACES_DETAILS_URL says otherwise.
+PLACES_API_URL = os.environ.get("PLACES_API_URL", "https://places.googleapis.com/v1/places:searchText")
+PLACES_DETAILS_URL = os.environ.get("PLACES_DETAILS_URL", PLACES_API_URL.rsplit(":", 1)[0] + "/")
+FIELD_MASK = ("places.id,places.displayName,places.formattedAddress,places.regularOpeningHours,"
+              "places.googleMapsUri,places.location")
+# --ids-only syncs resolve just these; the rest (DETAIL_FIELD_MASK, a Place
+# Details request, so no "places." prefix) is fetched the first time a venue
+# is shown, reported or planned (see ensure_details).
+ID_FIELD_MASK = "places.id,places.displayName"
+DETAIL_FIELD_MASK = "formattedAddress,regularOpeningHours,googleMapsUri,location"
+# Estimated USD per call. regularOpeningHours puts a request in the Enterprise
+# SKU ($35 per 1,000 Text Searches, $20 per 1,000 Place Details, before
+# free-tier credits); an IDs-only Text Search is free. Update these if the
+# field masks or Google's price list change.
+PLACES_COST_PER_CALL = 0.035
+PLACES_ID_COST_PER_CALL = 0.0
+PLACES_DETAILS_COST_PER_CALL = 0.020
+# A venue whose details fetch failed waits this long before the next try,
+# doubling per consecutive failure up to the max.
+DETAILS_RETRY_SECONDS = 300
+DETAILS_RETRY_MAX_SECONDS = 24 * 3600
 
 # Sections in London.md that contain venues
 VENUE_SECTIONS = {
@@ -62,6 +126,126 @@ SKIP_SECTIONS = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Dates and times
+# ---------------------------------------------------------------------------
+
+# Used when a reservation/event has a start time but no end time.
+DEFAULT_DURATION = timedelta(hours=2)
+
+
+def parse_time(text: Optional[str]) -> Optional[tuple]:
+    """Parse free-form times like "19:15", "8pm", "7:30 PM" or "10am" to (hour, minute)."""
+    if not text:
+        return None
+    m = re.match(r"^\s*(\d{1,2})(?:[:.](\d{2}))?\s*([ap])?\.?m?\.?\b", text.strip().lower())
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    if m.group(3) == "p" and hour < 12:
+        hour += 12
+    elif m.group(3) == "a" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute
+
+
+def parse_time_range(text: Optional[str]) -> tuple:
+    """Parse "6:30-9pm" / "19:00–21:00" / "8pm" into (start, end) (hour, minute) tuples.
+
+    A start without am/pm borrows the end's "pm" when that keeps it before
+    the end, so "6:30-9pm" starts at 18:30.
+    """
+    if not text:
+        return None, None
+    parts = re.split(r"\s*(?:-|–|—|\bto\b)\s*", text.strip(), maxsplit=1)
+    start = parse_time(parts[0])
+    end = parse_time(parts[1]) if len(parts) > 1 else None
+    if start and end and start[0] < 12 and start[0] + 12 <= end[0]:
+        if not re.search(r"[ap]\.?m", parts[0].lower()):
+            start = (start[0] + 12, start[1])
+    return start, end
+
+
+def parse_date_range(text: Optional[str]) -> Optional[tuple]:
+    """Parse "YYYY-MM-DD" or "YYYY-MM-DD/YYYY-MM-DD" into (first, last) dates."""
+    if not text:
+        return None
+    try:
+        parts = [datetime.strptime(p.strip(), "%Y-%m-%d").date() for p in text.split("/", 1)]
+    except ValueError:
+        return None
+    return parts[0], parts[-1]
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_minutes(dt: datetime) -> int:
+    """Minutes since 1970-01-01 of a London wall-clock time (no timezone math:
+    everything in the trip happens in one zone, and only ordering matters)."""
+    return int((dt - EPOCH).total_seconds() // 60)
+
+
+def span_minutes(date: Optional[str], start: Optional[tuple], end: Optional[tuple]) -> tuple:
+    """Return (start_min, end_min) for a date (or date range) and optional times.
+
+    Untimed entries span their whole day(s); a start without an end lasts
+    DEFAULT_DURATION; an end before the start rolls over midnight.
+    """
+    dates = parse_date_range(date)
+    if not dates:
+        return None, None
+    first, last = dates
+    day = datetime.combine(first, datetime.min.time())
+    if not start:
+        return to_epoch_minutes(day), to_epoch_minutes(datetime.combine(last, datetime.min.time()) + timedelta(days=1))
+    begin = day.replace(hour=start[0], minute=start[1])
+    finish = begin + DEFAULT_DURATION
+    if end:
+        finish = begin.replace(hour=end[0], minute=end[1])
+        if finish <= begin:
+            finish += timedelta(days=1)
+    return to_epoch_minutes(begin), to_epoch_minutes(finish)
+
+
+def event_span(date: Optional[str], time: Optional[str]) -> tuple:
+    return span_minutes(date, *parse_time_range(time))
+
+
+def reservation_span(date: Optional[str], time: Optional[str], end_time: Optional[str]) -> tuple:
+    start = parse_time(time)
+    return span_minutes(date, start, parse_time(end_time) if start else None)
+
+
+def parse_bound(text: Optional[str], end_of_day: bool = False) -> Optional[int]:
+    """Parse a --from/--to value (YYYY-MM-DD or ISO datetime) into epoch minutes.
+
+    A bare date used as an upper bound means the end of that day.
+    """
+    if not text:
+        return None
+    dt = datetime.fromisoformat(text)
+    if end_of_day and len(text.strip()) == 10:
+        dt += timedelta(days=1)
+    return to_epoch_minutes(dt)
+
+
+def span_filter(date_from: Optional[str], date_to: Optional[str]) -> tuple:
+    """Return a (WHERE clause, params) pair selecting rows whose span overlaps
+    [date_from, date_to]. Either bound may be omitted; with neither, no filter."""
+    clauses, params = [], []
+    start, end = parse_bound(date_from), parse_bound(date_to, end_of_day=True)
+    if start is not None:
+        clauses.append("end_min > ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("start_min < ?")
+        params.append(end)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
 # ---------------------------------------------------------------------------
 # Database
 # ---------------------------------------------------------------------------
@@ -69,6 +253,42 @@ SKIP_SECTIONS = {
 def init_db(db_path: Path) -> sqlite3.Connection:
     conn = sqlite3.connect(str(db_path))
     conn.row_factory = sqlite3.Row
+    ensure_schema(conn)
+    return conn
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    """Bring the schema up to SCHEMA_VERSION.
+
+    The common case (already current) costs a single PRAGMA read, so this is
+    cheap enough to call every time a connection is opened. Each migration
+    takes the write lock and re-reads the version first, so connections
+    opening an old database concurrently apply each step exactly once.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if number <= version:
+                conn.commit()
+                continue
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+# Migrations run in order; each one must be safe to apply to a database
+# created before versioning existed (user_version 0 with tables present).
+
+def _migration_001_base_tables(conn: sqlite3.Connection):
     conn.execute("""
         CREATE TABLE IF NOT EXISTS venues (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -117,13 +337,9 @@ def init_db(db_path: Path) -> sqlite3.Connection:
             UNIQUE(venue_name, date, time)
         )
     """)
-    # Migrate: add booking columns if they don't exist yet
-    _migrate_booking_columns(conn)
-    conn.commit()
-    return conn
 
 
-def _migrate_booking_columns(conn: sqlite3.Connection):
+def _migration_002_booking_columns(conn: sqlite3.Connection):
     """Add booking/research columns to venues table if missing."""
     existing = {row[1] for row in conn.execute("PRAGMA table_info(venues)").fetchall()}
     new_cols = {
@@ -138,19 +354,185 @@ def _migrate_booking_columns(conn: sqlite3.Connection):
             conn.execute(f"ALTER TABLE venues ADD COLUMN {col} {col_type}")
 
 
+def _migration_003_indexes(conn: sqlite3.Connection):
+    """Index the columns used for per-venue and per-date lookups."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_venue_name ON events(venue_name, date, time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reservations_date ON reservations(date, time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_venues_google_place_id ON venues(google_place_id)")
+
+
+def _migration_004_schedule_cache(conn: sqlite3.Connection):
+    """Per-day rendered fragments for --render-schedule, keyed by content hash."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schedule_days (
+            date TEXT PRIMARY KEY,
+            hash TEXT NOT NULL,
+            html TEXT NOT NULL,
+            rendered_at TEXT
+        )
+    """)
+
+
+def _migration_005_time_spans(conn: sqlite3.Connection):
+    """Typed start/end columns (epoch minutes) so date ranges sort and filter
+    on an index instead of the free-form date/time text."""
+    for table, span, cols in (("events", event_span, "date, time"),
+                              ("reservations", reservation_span, "date, time, end_time")):
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+        for col in ("start_min", "end_min"):
+            if col not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} INTEGER")
+        rows = conn.execute(f"SELECT id, {cols} FROM {table}").fetchall()
+        conn.executemany(f"UPDATE {table} SET start_min = ?, end_min = ? WHERE id = ?",
+                         [(*span(*row[1:]), row[0]) for row in rows])
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_start_min ON {table}(start_min)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_end_min ON {table}(end_min)")
+
+
+def _migration_006_change_log(conn: sqlite3.Connection):
+    """Trigger-fed change log so consumers can read deltas (see changes_since).
+
+    AUTOINCREMENT keeps seq monotonic even after compaction deletes entries.
+    Existing rows are logged as inserts, so reading from seq 0 replays the
+    whole database.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tbl TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_row ON changes(tbl, row_id, seq)")
+    for table in CHANGE_TABLES:
+        for op, ref in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_log_{op} AFTER {op.upper()} ON {table}
+                BEGIN
+                    INSERT INTO changes (tbl, row_id, op) VALUES ('{table}', {ref}.id, '{op}');
+                END
+            """)
+        conn.execute(f"INSERT INTO changes (tbl, row_id, op) SELECT '{table}', id, 'insert' FROM {table} ORDER BY id")
+
+
+def _migration_007_api_calls(conn: sqlite3.Connection):
+    """Ledger of every Places API request (see ApiLedger)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS api_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            called_at TEXT NOT NULL,
+            query TEXT NOT NULL,
+            status INTEGER,
+            latency_ms REAL,
+            response_bytes INTEGER,
+            error TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_api_calls_called_at ON api_calls(called_at)")
+
+
+def _migration_008_venue_aliases(conn: sqlite3.Connection):
+    """Names of venues merged into another row because they share a Google
+    place ID (see merge_place_duplicates). alias_key is normalize_name(alias)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS venue_aliases (
+            alias TEXT PRIMARY KEY,
+            alias_key TEXT NOT NULL,
+            venue_id INTEGER NOT NULL REFERENCES venues(id) ON DELETE CASCADE,
+            created_at TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_venue_aliases_key ON venue_aliases(alias_key)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_venue_aliases_venue ON venue_aliases(venue_id)")
+
+
+def _migration_009_coordinates(conn: sqlite3.Connection):
+    """Venue latitude/longitude (places.location), backfilled from any stored response."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(venues)").fetchall()}
+    for col in ("latitude", "longitude"):
+        if col not in existing:
+            conn.execute(f"ALTER TABLE venues ADD COLUMN {col} REAL")
+    conn.execute("""
+        UPDATE venues SET latitude = json_extract(raw_response, '$.location.latitude'),
+                          longitude = json_extract(raw_response, '$.location.longitude')
+        WHERE raw_response IS NOT NULL AND json_valid(raw_response)
+    """)
+
+
+def _migration_010_lazy_details(conn: sqlite3.Connection):
+    """venues.details_at: when Places details were stored (NULL while a venue
+    synced with --ids-only waits for ensure_details). api_calls.cost: the
+    estimated USD for each call, now that calls are priced differently."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(venues)").fetchall()}
+    if "details_at" not in existing:
+        conn.execute("ALTER TABLE venues ADD COLUMN details_at TEXT")
+    conn.execute("UPDATE venues SET details_at = fetched_at WHERE raw_response IS NOT NULL")
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(api_calls)").fetchall()}
+    if "cost" not in existing:
+        conn.execute("ALTER TABLE api_calls ADD COLUMN cost REAL")
+    conn.execute("UPDATE api_calls SET cost = ? WHERE cost IS NULL", (PLACES_COST_PER_CALL,))
+
+
+def _migration_011_details_retry(conn: sqlite3.Connection):
+    """venues.details_failures / details_retry_at: back off venues whose
+    details fetch keeps failing instead of retrying on every view."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(venues)").fetchall()}
+    if "details_failures" not in existing:
+        conn.execute("ALTER TABLE venues ADD COLUMN details_failures INTEGER NOT NULL DEFAULT 0")
+    if "details_retry_at" not in existing:
+        conn.execute("ALTER TABLE venues ADD COLUMN details_retry_at TEXT")
+
+
+def _migration_012_event_blank_keys(conn: sqlite3.Connection):
+    """Store a missing event venue/date as '' everywhere. --add-event used to
+    write NULL, which the UNIQUE key never matched against imports' ''; the
+    NULL copy of an event that also exists with '' is the one dropped."""
+    conn.execute("""
+        DELETE FROM events WHERE (venue_name IS NULL OR date IS NULL) AND EXISTS (
+            SELECT 1 FROM events e
+            WHERE e.id != events.id AND e.title = events.title
+              AND COALESCE(e.venue_name, '') = COALESCE(events.venue_name, '')
+              AND COALESCE(e.date, '') = COALESCE(events.date, '')
+              AND (e.venue_name IS NOT NULL AND e.date IS NOT NULL OR e.id < events.id))
+    """)
+    conn.execute("UPDATE events SET venue_name = COALESCE(venue_name, ''), date = COALESCE(date, '') "
+                 "WHERE venue_name IS NULL OR date IS NULL")
+
+
+MIGRATIONS = [
+    _migration_001_base_tables,
+    _migration_002_booking_columns,
+    _migration_003_indexes,
+    _migration_004_schedule_cache,
+    _migration_005_time_spans,
+    _migration_006_change_log,
+    _migration_007_api_calls,
+    _migration_008_venue_aliases,
+    _migration_009_coordinates,
+    _migration_010_lazy_details,
+    _migration_011_details_retry,
+    _migration_012_event_blank_keys,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
 def get_cached_names(conn: sqlite3.Connection) -> set:
-    rows = conn.execute("SELECT name FROM venues").fetchall()
+    """Venue names already fetched, including aliases of merged venues."""
+    rows = conn.execute("SELECT name FROM venues UNION ALL SELECT alias FROM venue_aliases").fetchall()
     return {row["name"] for row in rows}
 
 
-def upsert_venue(conn: sqlite3.Connection, venue: dict):
-    conn.execute("""
+VENUE_UPSERT_SQL = """
         INSERT INTO venues (name, source, section, search_query, google_place_id,
                             google_display_name, address, regular_hours_json,
-                            regular_hours_text, google_maps_uri, raw_response, fetched_at)
+                            regular_hours_text, google_maps_uri, raw_response, fetched_at,
+                            latitude, longitude, details_at)
         VALUES (:name, :source, :section, :search_query, :google_place_id,
                 :google_display_name, :address, :regular_hours_json,
-                :regular_hours_text, :google_maps_uri, :raw_response, :fetched_at)
+                :regular_hours_text, :google_maps_uri, :raw_response, :fetched_at,
+                :latitude, :longitude, :details_at)
         ON CONFLICT(name) DO UPDATE SET
             source = :source,
             section = :section,
@@ -162,8 +544,15 @@ def upsert_venue(conn: sqlite3.Connection, venue: dict):
             regular_hours_text = :regular_hours_text,
             google_maps_uri = :google_maps_uri,
             raw_response = :raw_response,
-            fetched_at = :fetched_at
-    """, venue)
+            fetched_at = :fetched_at,
+            latitude = :latitude,
+            longitude = :longitude,
+            details_at = :details_at
+"""
+
+
+def upsert_venue(conn: sqlite3.Connection, venue: dict):
+    conn.execute(VENUE_UPSERT_SQL, venue)
     conn.commit()
 
 
@@ -174,11 +563,17 @@ def _find_venue_name(conn: sqlite3.Connection, name: str) -> Optional[str]:
     if row:
         return row["name"]
     # Try with apostrophe normalization (straight ↔ curly)
-    for variant in [name.replace("'", "\u2019"), name.replace("\u2019", "'")]:
+    variants = [name.replace("'", "\u2019"), name.replace("\u2019", "'")]
+    for variant in variants:
         row = conn.execute("SELECT name FROM venues WHERE name = ?", (variant,)).fetchone()
         if row:
             return row["name"]
-    return None
+    # Names merged into another venue (primary-key lookup)
+    row = conn.execute("""
+        SELECT v.name FROM venue_aliases a JOIN venues v ON v.id = a.venue_id
+        WHERE a.alias IN (?, ?, ?) LIMIT 1
+    """, (name, *variants)).fetchone()
+    return row["name"] if row else None
 
 
 def set_booking(conn: sqlite3.Connection, name: str, price: Optional[str],
@@ -193,6 +588,18 @@ def set_booking(conn: sqlite3.Connection, name: str, price: Optional[str],
             print(f"  {row['name']}")
         sys.exit(1)
 
+    if not update_booking(conn, db_name, price, required, url, notes, member):
+        print("No booking fields provided.")
+        return
+    conn.commit()
+    print(f"Updated booking info for '{db_name}'.")
+
+
+def update_booking(conn: sqlite3.Connection, db_name: str, price: Optional[str],
+                   required: Optional[str], url: Optional[str],
+                   notes: Optional[str], member: Optional[str]) -> bool:
+    """Write the given booking fields for a venue (exact DB name) without
+    committing. Returns False if no fields were given."""
     updates = []
     params = []
     if price is not None:
@@ -212,13 +619,28 @@ def set_booking(conn: sqlite3.Connection, name: str, price: Optional[str],
         params.append(member)
 
     if not updates:
-        print("No booking fields provided.")
-        return
+        return False
 
     params.append(db_name)
     conn.execute(f"UPDATE venues SET {', '.join(updates)} WHERE name = ?", params)
-    conn.commit()
-    print(f"Updated booking info for '{db_name}'.")
+    return True
+
+
+EVENT_UPSERT_SQL = """
+    INSERT INTO events (title, venue_name, date, time, price, url, category, notes, source, fetched_at,
+                        start_min, end_min)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(title, venue_name, date) DO UPDATE SET
+        time = excluded.time,
+        start_min = excluded.start_min,
+        end_min = excluded.end_min,
+        price = excluded.price,
+        url = excluded.url,
+        category = excluded.category,
+        notes = excluded.notes,
+        source = excluded.source,
+        fetched_at = excluded.fetched_at
+"""
 
 
 def add_event(conn: sqlite3.Connection, title: str, venue_name: Optional[str],
@@ -226,20 +648,8 @@ def add_event(conn: sqlite3.Connection, title: str, venue_name: Optional[str],
               url: Optional[str], category: Optional[str], notes: Optional[str],
               source: Optional[str]):
     """Add an event to the events table."""
-    now = datetime.utcnow().isoformat()
     try:
-        conn.execute("""
-            INSERT INTO events (title, venue_name, date, time, price, url, category, notes, source, fetched_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(title, venue_name, date) DO UPDATE SET
-                time = excluded.time,
-                price = excluded.price,
-                url = excluded.url,
-                category = excluded.category,
-                notes = excluded.notes,
-                source = excluded.source,
-                fetched_at = excluded.fetched_at
-        """, (title, venue_name, date, time, price, url, category, notes, source, now))
+        save_event(conn, title, venue_name, date, time, price, url, category, notes, source)
         conn.commit()
         print(f"Added event: '{title}'" + (f" at {venue_name}" if venue_name else "") +
               (f" on {date}" if date else ""))
@@ -247,6 +657,21 @@ def add_event(conn: sqlite3.Connection, title: str, venue_name: Optional[str],
         print(f"Error adding event: {e}")
 
 
+def save_event(conn: sqlite3.Connection, title: str, venue_name: Optional[str],
+               date: Optional[str], time: Optional[str], price: Optional[str],
+               url: Optional[str], category: Optional[str], notes: Optional[str],
+               source: Optional[str]):
+    """Upsert one event without committing.
+
+    A missing venue/date is stored as '' (as upsert_events does), since the
+    UNIQUE(title, venue_name, date) key treats NULLs as distinct.
+    """
+    now = datetime.utcnow().isoformat()
+    venue_name, date = venue_name or "", date or ""
+    conn.execute(EVENT_UPSERT_SQL, (title, venue_name, date, time, price, url, category, notes, source, now,
+                                    *event_span(date, time)))
+
+
 def delete_venue(conn: sqlite3.Connection, name: str):
     conn.execute("DELETE FROM venues WHERE name = ?", (name,))
     conn.commit()
@@ -261,6 +686,15 @@ def fuzzy_match_venue(conn: sqlite3.Connection, name: str) -> Optional[str]:
 
     # Normalize for comparison
     target = normalize_name(name)
+
+    # Exact normalized match on a merged venue's old name (indexed lookup)
+    row = conn.execute("""
+        SELECT v.name FROM venue_aliases a JOIN venues v ON v.id = a.venue_id
+        WHERE a.alias_key = ? LIMIT 1
+    """, (target,)).fetchone()
+    if row:
+        return row["name"]
+
     all_venues = conn.execute("SELECT name FROM venues").fetchall()
 
     best_match = None
@@ -288,33 +722,73 @@ def fuzzy_match_venue(conn: sqlite3.Connection, name: str) -> Optional[str]:
     return None
 
 
+class VenueMatcher:
+    """In-memory index with the same answers as fuzzy_match_venue.
+
+    Loads venue names once, then resolves exact and normalized names with dict
+    lookups and memoizes the containment fallback per distinct input, so bulk
+    imports don't rescan the venues table for every row.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.names = [row["name"] for row in conn.execute("SELECT name FROM venues")]
+        self.exact = set(self.names)
+        self.normalized = {}
+        for venue_name in self.names:
+            self.normalized.setdefault(normalize_name(venue_name), venue_name)
+        self.pairs = [(normalize_name(n), n) for n in self.names]
+        self.aliases = {}
+        self.alias_keys = {}
+        for row in conn.execute("""
+            SELECT a.alias, a.alias_key, v.name FROM venue_aliases a JOIN venues v ON v.id = a.venue_id
+        """):
+            self.aliases[row["alias"]] = row["name"]
+            self.alias_keys.setdefault(row["alias_key"], row["name"])
+        self.memo = {}
+
+    def match(self, name: str) -> Optional[str]:
+        if name in self.memo:
+            return self.memo[name]
+        result = self._match(name)
+        self.memo[name] = result
+        return result
+
+    def _match(self, name: str) -> Optional[str]:
+        variants = (name, name.replace("'", "\u2019"), name.replace("\u2019", "'"))
+        for variant in variants:
+            if variant in self.exact:
+                return variant
+        for variant in variants:
+            if variant in self.aliases:
+                return self.aliases[variant]
+        target = normalize_name(name)
+        if target in self.alias_keys:
+            return self.alias_keys[target]
+        if target in self.normalized:
+            return self.normalized[target]
+
+        best_match = None
+        best_score = 0
+        for normalized, venue_name in self.pairs:
+            if target in normalized or normalized in target:
+                score = len(target) / max(len(normalized), len(target))
+                if score > best_score:
+                    best_score = score
+                    best_match = venue_name
+        return best_match if best_score > 0.6 else None
+
+
 def add_reservation(conn: sqlite3.Connection, venue_name: str, date: str,
                     time: Optional[str] = None, end_time: Optional[str] = None,
                     confirmation: Optional[str] = None, party_size: Optional[int] = None,
                     notes: Optional[str] = None) -> bool:
     """Add a reservation to the database."""
-    now = datetime.utcnow().isoformat()
-
-    # Try to match to an existing venue
-    matched = fuzzy_match_venue(conn, venue_name)
-    if matched:
-        print(f"  Matched '{venue_name}' → '{matched}'")
-    else:
-        print(f"  Warning: '{venue_name}' not found in venues database (saving anyway)")
-
     try:
-        conn.execute("""
-            INSERT INTO reservations (venue_name, matched_venue, date, time, end_time,
-                                      confirmation, party_size, notes, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(venue_name, date, time) DO UPDATE SET
-                matched_venue = excluded.matched_venue,
-                end_time = excluded.end_time,
-                confirmation = excluded.confirmation,
-                party_size = excluded.party_size,
-                notes = excluded.notes,
-                created_at = excluded.created_at
-        """, (venue_name, matched, date, time, end_time, confirmation, party_size, notes, now))
+        matched = save_reservation(conn, venue_name, date, time, end_time, confirmation, party_size, notes)
+        if matched:
+            print(f"  Matched '{venue_name}' → '{matched}'")
+        else:
+            print(f"  Warning: '{venue_name}' not found in venues database (saving anyway)")
         conn.commit()
         print(f"Added reservation: {venue_name} on {date}" + (f" at {time}" if time else ""))
         return True
@@ -323,6 +797,31 @@ def add_reservation(conn: sqlite3.Connection, venue_name: str, date: str,
         return False
 
 
+def save_reservation(conn: sqlite3.Connection, venue_name: str, date: str,
+                     time: Optional[str] = None, end_time: Optional[str] = None,
+                     confirmation: Optional[str] = None, party_size: Optional[int] = None,
+                     notes: Optional[str] = None) -> Optional[str]:
+    """Upsert one reservation without committing; returns the matched venue name."""
+    now = datetime.utcnow().isoformat()
+    matched = fuzzy_match_venue(conn, venue_name)
+    conn.execute("""
+        INSERT INTO reservations (venue_name, matched_venue, date, time, end_time,
+                                  confirmation, party_size, notes, created_at, start_min, end_min)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(venue_name, date, time) DO UPDATE SET
+            matched_venue = excluded.matched_venue,
+            end_time = excluded.end_time,
+            start_min = excluded.start_min,
+            end_min = excluded.end_min,
+            confirmation = excluded.confirmation,
+            party_size = excluded.party_size,
+            notes = excluded.notes,
+            created_at = excluded.created_at
+    """, (venue_name, matched, date, time, end_time, confirmation, party_size, notes, now,
+          *reservation_span(date, time, end_time)))
+    return matched
+
+
 def import_reservations_csv(conn: sqlite3.Connection, csv_path: Path):
     """Import reservations from a CSV file."""
     if not csv_path.exists():
@@ -353,46 +852,639 @@ def import_reservations_csv(conn: sqlite3.Connection, csv_path: Path):
     print(f"\nImported {count} reservation(s) from {csv_path.name}")
 
 
-def print_reservations(conn: sqlite3.Connection):
-    """Print all reservations, sorted by date."""
-    rows = conn.execute(
-        "SELECT * FROM reservations ORDER BY date, time"
-    ).fetchall()
+RESERVATION_COLUMNS = ("date", "time", "end_time", "venue_name", "matched_venue", "party_size",
+                       "confirmation", "notes")
 
-    if not rows:
-        print("No reservations in database.")
-        return
 
-    print("\n=== RESERVATIONS ===\n")
+def _reservation_record(row: sqlite3.Row) -> "Record":
+    meta = []
+    if row["time"]:
+        meta.append(f"at {row['time']} - {row['end_time']}" if row["end_time"] else f"at {row['time']}")
+    matched = row["matched_venue"]
+    return Record(row["venue_name"], meta, _fields(
+        (None, f"(matched to: {matched})" if matched and matched != row["venue_name"] else None),
+        ("Party size", row["party_size"]),
+        ("Confirmation", row["confirmation"]),
+        ("Notes", row["notes"]),
+    ), row=row)
+
+
+def print_reservations(conn: sqlite3.Connection, date_from: Optional[str] = None,
+                       date_to: Optional[str] = None, fmt: str = "text", out=None):
+    """Print reservations (optionally only those overlapping a date range), sorted by start."""
+    where, params = span_filter(date_from, date_to)
+    renderer = RENDERERS[fmt](out, title="Reservations", columns=RESERVATION_COLUMNS,
+                              sections="rule", gap="after")
     current_date = None
-    for row in rows:
+    for row in conn.execute(f"SELECT * FROM reservations{where} ORDER BY start_min, date, time", params):
         if row["date"] != current_date:
             current_date = row["date"]
-            # Format date nicely
             try:
-                dt = datetime.strptime(current_date, "%Y-%m-%d")
-                date_str = dt.strftime("%a %b %d, %Y")
+                date_str = datetime.strptime(current_date, "%Y-%m-%d").strftime("%a %b %d, %Y")
             except ValueError:
                 date_str = current_date
-            print(f"--- {date_str} ---")
-
-        parts = [f"  {row['venue_name']}"]
-        if row["time"]:
-            time_str = row["time"]
-            if row["end_time"]:
-                time_str += f" - {row['end_time']}"
-            parts.append(f"at {time_str}")
-        print(" ".join(parts))
-
-        if row["matched_venue"] and row["matched_venue"] != row["venue_name"]:
-            print(f"    (matched to: {row['matched_venue']})")
-        if row["party_size"]:
-            print(f"    Party size: {row['party_size']}")
-        if row["confirmation"]:
-            print(f"    Confirmation: {row['confirmation']}")
-        if row["notes"]:
-            print(f"    Notes: {row['notes']}")
-        print()
+            renderer.section(date_str)
+        renderer.record(_reservation_record(row))
+    renderer.close("No reservations in database.")
+
+
+# ---------------------------------------------------------------------------
+# Event import
+# ---------------------------------------------------------------------------
+
+EVENT_IMPORT_BATCH = 1000
+EVENT_FIELDS = ("title", "venue_name", "date", "time", "price", "url", "category", "notes", "source")
+
+
+def _read_event_csv(path: Path):
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield {k.strip().lower(): v for k, v in row.items() if k}
+
+
+def _read_event_ndjson(path: Path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _ics_unescape(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _ics_lines(f):
+    """Yield unfolded iCalendar content lines (RFC 5545 §3.1)."""
+    current = None
+    for raw in f:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _parse_ics_datetime(value: str):
+    """Return (date, time) strings from a DTSTART value like 20260215T200000Z."""
+    value = value.strip()
+    date = f"{value[0:4]}-{value[4:6]}-{value[6:8]}" if len(value) >= 8 else None
+    time = f"{value[9:11]}:{value[11:13]}" if len(value) >= 13 and value[8] == "T" else None
+    return date, time
+
+
+def _read_event_ics(path: Path):
+    with open(path, encoding="utf-8") as f:
+        event = None
+        for line in _ics_lines(f):
+            if line == "BEGIN:VEVENT":
+                event = {}
+            elif line == "END:VEVENT":
+                if event is not None:
+                    yield event
+                event = None
+            elif event is not None and ":" in line:
+                name, value = line.split(":", 1)
+                name = name.split(";", 1)[0].upper()
+                if name == "SUMMARY":
+                    event["title"] = _ics_unescape(value)
+                elif name == "LOCATION":
+                    event["venue"] = _ics_unescape(value)
+                elif name == "DTSTART":
+                    event["date"], event["time"] = _parse_ics_datetime(value)
+                elif name == "URL":
+                    event["url"] = value
+                elif name == "DESCRIPTION":
+                    event["notes"] = _ics_unescape(value)
+                elif name == "CATEGORIES":
+                    event["category"] = _ics_unescape(value).split(",")[0]
+
+
+EVENT_READERS = {
+    ".csv": _read_event_csv,
+    ".ndjson": _read_event_ndjson,
+    ".jsonl": _read_event_ndjson,
+    ".ics": _read_event_ics,
+}
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def upsert_events(conn: sqlite3.Connection, rows, matcher: Optional["VenueMatcher"] = None,
+                  default_source: Optional[str] = None) -> dict:
+    """Resolve venues and upsert event dicts in batched transactions.
+
+    Missing venue/date are stored as '' rather than NULL so re-imports hit
+    the UNIQUE(title, venue_name, date) key instead of duplicating rows.
+    Returns inserted/updated/skipped counts.
+    """
+    matcher = matcher or VenueMatcher(conn)
+    existing = {tuple(key) for key in conn.execute(
+        "SELECT title, COALESCE(venue_name, ''), COALESCE(date, '') FROM events")}
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    now = datetime.utcnow().isoformat()
+    batch = []
+
+    def flush():
+        if batch:
+            with conn:
+                conn.executemany(EVENT_UPSERT_SQL, batch)
+            batch.clear()
+
+    for row in rows:
+        # NDJSON lines can be valid JSON without being an object
+        title = _clean(row.get("title")) if isinstance(row, dict) else None
+        if not title:
+            counts["skipped"] += 1
+            continue
+        venue = _clean(row.get("venue_name") or row.get("venue"))
+        if venue:
+            venue = matcher.match(venue) or venue
+        date = _clean(row.get("date")) or ""
+        time = _clean(row.get("time"))
+        key = (title, venue or "", date)
+        counts["updated" if key in existing else "inserted"] += 1
+        existing.add(key)
+        batch.append((title, venue or "", date, time, _clean(row.get("price")),
+                      _clean(row.get("url")), _clean(row.get("category")), _clean(row.get("notes")),
+                      _clean(row.get("source")) or default_source, now, *event_span(date, time)))
+        if len(batch) >= EVENT_IMPORT_BATCH:
+            flush()
+    flush()
+    return counts
+
+
+def import_events(conn: sqlite3.Connection, path: Path, default_source: Optional[str] = None) -> dict:
+    """Stream events from a CSV, NDJSON or iCalendar file into the events table."""
+    if not path.exists():
+        print(f"Error: {path} not found.")
+        sys.exit(1)
+    reader = EVENT_READERS.get(path.suffix.lower())
+    if reader is None:
+        print(f"Error: don't know how to import '{path.suffix}' files "
+              f"(expected {', '.join(sorted(EVENT_READERS))}).")
+        sys.exit(1)
+
+    try:
+        counts = upsert_events(conn, reader(path), default_source=default_source)
+    except (csv.Error, json.JSONDecodeError, UnicodeDecodeError) as e:
+        print(f"Error: could not parse {path.name}: {e}")
+        sys.exit(1)
+    print(f"Imported events from {path.name}: {counts['inserted']} inserted, "
+          f"{counts['updated']} updated, {counts['skipped']} skipped.")
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Listing ingestion
+# ---------------------------------------------------------------------------
+
+# Saved pages handed to a worker process at a time.
+LISTING_CHUNK = 16
+# Below this many pages a process pool costs more to start than it saves.
+LISTING_POOL_MIN_PAGES = 32
+LISTING_SUFFIXES = (".html", ".htm")
+# Canonical/og:url hosts that identify a page's source when its directory doesn't.
+LISTING_HOSTS = {
+    "timeout.com": "timeout",
+    "songkick.com": "songkick",
+    "halibuts.com": "halibuts",
+}
+# schema.org event types → events.category.
+SCHEMA_EVENT_CATEGORIES = {
+    "MusicEvent": "concert",
+    "TheaterEvent": "theatre",
+    "ComedyEvent": "comedy",
+    "ExhibitionEvent": "exhibition",
+    "Festival": "festival",
+    "FoodEvent": "food",
+}
+
+JSONLD_RE = re.compile(r"<script[^>]*type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>",
+                       re.IGNORECASE | re.DOTALL)
+PAGE_URL_RE = re.compile(
+    r"<(?:link[^>]*rel=[\"']canonical[\"'][^>]*href|meta[^>]*property=[\"']og:url[\"'][^>]*content)"
+    r"=[\"']([^\"']+)", re.IGNORECASE)
+LISTING_PRICE_RE = re.compile(r"£\s?\d+(?:\.\d{2})?(?:\s*[-–]\s*£?\s?\d+(?:\.\d{2})?)?|\bfree\b", re.IGNORECASE)
+LISTING_TIME_RE = re.compile(r"\b\d{1,2}(?:[:.]\d{2})?\s*[ap]\.?m\.?(?:\s*[-–]\s*\d{1,2}(?:[:.]\d{2})?\s*[ap]\.?m\.?)?"
+                             r"|\b\d{1,2}:\d{2}\b", re.IGNORECASE)
+LISTING_DATE_FORMATS = ("%A %d %B %Y", "%a %d %b %Y", "%d %B %Y", "%d %b %Y", "%A %d %B", "%a %d %b", "%d %B")
+
+
+def _format_price(price, currency: Optional[str], low: bool = False) -> Optional[str]:
+    """Render a schema.org offer price as "£12", "from £8.50" or "Free"."""
+    try:
+        amount = float(str(price).replace(",", ""))
+    except (TypeError, ValueError):
+        return _clean(price)
+    if amount == 0:
+        return "Free"
+    symbol = {"GBP": "£", "EUR": "€", "USD": "$"}.get((currency or "GBP").upper(), f"{currency} ")
+    text = f"{symbol}{amount:g}" if amount == int(amount) else f"{symbol}{amount:.2f}"
+    return f"from {text}" if low else text
+
+
+def _jsonld_events(node):
+    """Yield schema.org Event objects from a decoded JSON-LD block, in page order."""
+    if isinstance(node, list):
+        for item in node:
+            yield from _jsonld_events(item)
+        return
+    if not isinstance(node, dict):
+        return
+    types = node.get("@type")
+    types = types if isinstance(types, list) else [types]
+    if any(isinstance(t, str) and (t.endswith("Event") or t == "Festival") for t in types):
+        yield node
+        return
+    for key in ("@graph", "itemListElement", "item"):
+        if key in node:
+            yield from _jsonld_events(node[key])
+
+
+def _jsonld_event_row(node: dict, page_url: Optional[str]) -> dict:
+    start = str(node.get("startDate") or "")
+    end = str(node.get("endDate") or "")
+    date = start[:10] or None
+    time = start[11:16] if len(start) >= 16 and start[10] == "T" else None
+    if date and end[:10] and end[:10] > date:
+        # Runs and exhibitions span days; they have no single start time.
+        date, time = f"{date}/{end[:10]}", None
+
+    location = node.get("location")
+    if isinstance(location, list):
+        location = location[0] if location else None
+    venue = location.get("name") if isinstance(location, dict) else location
+
+    offers = node.get("offers")
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    price = None
+    if isinstance(offers, dict):
+        if offers.get("price") is not None:
+            price = _format_price(offers["price"], offers.get("priceCurrency"))
+        elif offers.get("lowPrice") is not None:
+            price = _format_price(offers["lowPrice"], offers.get("priceCurrency"), low=True)
+    if price is None and node.get("isAccessibleForFree") in (True, "true", "True"):
+        price = "Free"
+
+    types = node.get("@type")
+    types = types if isinstance(types, list) else [types]
+    category = next((SCHEMA_EVENT_CATEGORIES[t] for t in types if t in SCHEMA_EVENT_CATEGORIES), None)
+    return {
+        "title": html.unescape(str(node.get("name") or "")).strip(),
+        "venue": html.unescape(str(venue)).strip() if venue else None,
+        "date": date,
+        "time": time,
+        "price": price,
+        "url": node.get("url") or page_url,
+        "category": category,
+    }
+
+
+def parse_jsonld_listing(page: str, page_url: Optional[str] = None):
+    """Events from schema.org JSON-LD blocks (Time Out, Songkick and most ticketing sites)."""
+    for block in JSONLD_RE.findall(page):
+        try:
+            data = json.loads(block)
+        except json.JSONDecodeError:
+            continue
+        for node in _jsonld_events(data):
+            yield _jsonld_event_row(node, page_url)
+
+
+class _ListingBlocks(HTMLParser):
+    """Flatten a page to (tag, text, first href) for each heading, list item and row."""
+
+    BLOCK_TAGS = {"h1", "h2", "h3", "h4", "li", "tr", "p"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._open = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self._close()
+            self._open = [tag, [], None]
+        elif tag == "a" and self._open is not None and self._open[2] is None:
+            self._open[2] = dict(attrs).get("href")
+        elif tag in ("td", "br") and self._open is not None:
+            self._open[1].append(" ")
+
+    def handle_endtag(self, tag):
+        if self._open is not None and tag == self._open[0]:
+            self._close()
+
+    def handle_data(self, data):
+        if self._open is not None:
+            self._open[1].append(data)
+
+    def _close(self):
+        if self._open is not None:
+            text = " ".join("".join(self._open[1]).split())
+            if text:
+                self.blocks.append((self._open[0], text, self._open[2]))
+        self._open = None
+
+    def close(self):
+        super().close()
+        self._close()
+
+
+def _listing_date(text: str, year: int) -> Optional[str]:
+    text = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", text.replace(",", " "))
+    text = " ".join(text.split())
+    for fmt in LISTING_DATE_FORMATS:
+        try:
+            day = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if "%Y" not in fmt:
+            day = day.replace(year=year)
+        return day.strftime("%Y-%m-%d")
+    return None
+
+
+def parse_halibuts_listing(page: str, page_url: Optional[str] = None):
+    """Events from a gig-guide page: date headings, then one "Act @ Venue" per item or row.
+
+    Each entry reads like "Act @ Venue, 7:30pm, £15" ("at", " - " and " – "
+    also separate act from venue); times and prices are picked out wherever
+    they appear. Headings without a year take the first year on the page.
+    """
+    parser = _ListingBlocks()
+    parser.feed(page)
+    parser.close()
+    year = re.search(r"\b20\d\d\b", page)
+    year = int(year.group()) if year else datetime.now().year
+    date = None
+    for tag, text, href in parser.blocks:
+        if tag.startswith("h"):
+            date = _listing_date(text, year) or date
+            continue
+        if date is None:
+            continue
+        m = re.match(r"(?P<title>.+?)\s+(?:@|at|-|–|—)\s+(?P<venue>.+)$", text)
+        if not m:
+            continue
+        venue = re.split(r"\s*[,(|]\s*|\s+(?=\d{1,2}(?::\d{2})?\s*[ap]\.?m|\d{1,2}:\d{2}|£)", m.group("venue"))[0]
+        time = LISTING_TIME_RE.search(text)
+        price = LISTING_PRICE_RE.search(text)
+        yield {
+            "title": m.group("title").strip(),
+            "venue": venue.strip() or None,
+            "date": date,
+            "time": time.group().replace(" ", "") if time else None,
+            "price": (price.group().replace(" ", "") if price.group()[0] == "£" else "Free") if price else None,
+            "url": urllib.parse.urljoin(page_url, href) if page_url and href else href or page_url,
+        }
+
+
+# Source name → parser(page_html, page_url) yielding event dicts. "jsonld" is
+# the fallback for pages whose source can't be identified.
+LISTING_PARSERS = {
+    "timeout": parse_jsonld_listing,
+    "songkick": parse_jsonld_listing,
+    "halibuts": parse_halibuts_listing,
+    "jsonld": parse_jsonld_listing,
+}
+
+
+def _listing_source(path: Path, page_url: Optional[str], forced: Optional[str]) -> str:
+    if forced:
+        return forced
+    if path.parent.name in LISTING_PARSERS:
+        return path.parent.name
+    host = urllib.parse.urlsplit(page_url or "").hostname or ""
+    for suffix, source in LISTING_HOSTS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return source
+    return "jsonld"
+
+
+def _parse_listing_chunk(task: tuple) -> tuple:
+    """Parse a chunk of saved pages (run in a worker process); returns (rows, errors)."""
+    paths, forced = task
+    rows, errors = [], []
+    for name in paths:
+        path = Path(name)
+        try:
+            page = path.read_text(encoding="utf-8", errors="replace")
+            page_url = PAGE_URL_RE.search(page)
+            page_url = html.unescape(page_url.group(1)) if page_url else None
+            source = _listing_source(path, page_url, forced)
+            for row in LISTING_PARSERS[source](page, page_url):
+                row["source"] = source if source != "jsonld" else None
+                rows.append(row)
+        except Exception as e:
+            errors.append(f"{path.name}: {e}")
+    return rows, errors
+
+
+def ingest_listings(conn: sqlite3.Connection, directory: Path, source: Optional[str] = None,
+                    jobs: Optional[int] = None) -> dict:
+    """Parse saved listing pages under `directory` across a process pool and upsert the events.
+
+    A page's parser comes from `source`, else its directory name (timeout/,
+    halibuts/, ...), else its canonical URL's host. The same event listed on
+    several pages is merged on (title, venue, date) before the upsert, each
+    copy filling fields the others lack.
+    """
+    if not directory.is_dir():
+        print(f"Error: {directory} is not a directory.")
+        sys.exit(1)
+    if source and source not in LISTING_PARSERS:
+        print(f"Error: no listing parser for source '{source}' "
+              f"(expected {', '.join(sorted(LISTING_PARSERS))}).")
+        sys.exit(1)
+
+    paths = sorted(str(p) for p in directory.rglob("*") if p.suffix.lower() in LISTING_SUFFIXES)
+    tasks = [(paths[i:i + LISTING_CHUNK], source) for i in range(0, len(paths), LISTING_CHUNK)]
+    merged, errors = {}, []
+    with contextlib.ExitStack() as stack:
+        if len(paths) < LISTING_POOL_MIN_PAGES or jobs == 1:
+            results = map(_parse_listing_chunk, tasks)
+        else:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            results = pool.map(_parse_listing_chunk, tasks)
+        for rows, chunk_errors in results:
+            errors.extend(chunk_errors)
+            for row in rows:
+                title = _clean(row.get("title"))
+                if not title:
+                    continue
+                key = (title.casefold(), (_clean(row.get("venue")) or "").casefold(), _clean(row.get("date")) or "")
+                seen = merged.get(key)
+                if seen is None:
+                    merged[key] = row
+                else:
+                    for field, value in row.items():
+                        if not seen.get(field):
+                            seen[field] = value
+
+    for error in errors:
+        print(f"  Skipped {error}")
+    counts = upsert_events(conn, merged.values())
+    counts["pages"] = len(paths)
+    print(f"Ingested {len(merged)} events from {len(paths)} pages in {directory}: "
+          f"{counts['inserted']} inserted, {counts['updated']} updated, {counts['skipped']} skipped.")
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# iCalendar export
+# ---------------------------------------------------------------------------
+
+ICS_PRODID = "-//london-trip//london_venues.py//EN"
+ICS_TZID = "Europe/London"
+# Minimal VTIMEZONE so TZID=Europe/London is self-describing (GMT/BST rules).
+ICS_VTIMEZONE = [
+    "BEGIN:VTIMEZONE", f"TZID:{ICS_TZID}",
+    "BEGIN:DAYLIGHT", "TZOFFSETFROM:+0000", "TZOFFSETTO:+0100", "TZNAME:BST",
+    "DTSTART:19700329T010000", "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU", "END:DAYLIGHT",
+    "BEGIN:STANDARD", "TZOFFSETFROM:+0100", "TZOFFSETTO:+0000", "TZNAME:GMT",
+    "DTSTART:19701025T020000", "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU", "END:STANDARD",
+    "END:VTIMEZONE",
+]
+
+
+def _ics_escape(value) -> str:
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _ics_fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 §3.1), never splitting a UTF-8 character."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    out, chunk, limit = [], b"", 75
+    for ch in line:
+        b = ch.encode("utf-8")
+        if len(chunk) + len(b) > limit:
+            out.append(chunk.decode("utf-8"))
+            chunk, limit = b"", 74
+        chunk += b
+    out.append(chunk.decode("utf-8"))
+    return "\r\n ".join(out) + "\r\n"
+
+
+def _ics_uid(kind: str, *key) -> str:
+    digest = hashlib.sha1("\x1f".join(str(k or "") for k in key).encode("utf-8")).hexdigest()[:20]
+    return f"{kind}-{digest}@london-venues"
+
+
+def _ics_stamp(iso: Optional[str]) -> Optional[str]:
+    if not iso:
+        return None
+    try:
+        return datetime.fromisoformat(iso).strftime("%Y%m%dT%H%M%SZ")
+    except ValueError:
+        return None
+
+
+def _ics_event(uid: str, dates: tuple, start: Optional[tuple], end: Optional[tuple],
+               summary: str, location: Optional[str], description: list,
+               url: Optional[str], modified: Optional[str], dtstamp: str) -> list:
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{dtstamp}"]
+    first, last = dates
+    if start:
+        begin = datetime.combine(first, datetime.min.time()).replace(hour=start[0], minute=start[1])
+        finish = begin + DEFAULT_DURATION
+        if end:
+            finish = begin.replace(hour=end[0], minute=end[1])
+            if finish <= begin:
+                finish += timedelta(days=1)
+        lines.append(f"DTSTART;TZID={ICS_TZID}:{begin:%Y%m%dT%H%M%S}")
+        lines.append(f"DTEND;TZID={ICS_TZID}:{finish:%Y%m%dT%H%M%S}")
+    else:
+        lines.append(f"DTSTART;VALUE=DATE:{first:%Y%m%d}")
+        lines.append(f"DTEND;VALUE=DATE:{last + timedelta(days=1):%Y%m%d}")
+    lines.append(f"SUMMARY:{_ics_escape(summary)}")
+    if location:
+        lines.append(f"LOCATION:{_ics_escape(location)}")
+    if description:
+        lines.append(f"DESCRIPTION:{_ics_escape(chr(10).join(description))}")
+    if url:
+        lines.append(f"URL:{url}")
+    stamp = _ics_stamp(modified)
+    if stamp:
+        lines.append(f"LAST-MODIFIED:{stamp}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def export_ics(conn: sqlite3.Connection, out, since: Optional[str] = None) -> int:
+    """Stream reservations and dated events to ``out`` as an iCalendar file.
+
+    UIDs are derived from each table's natural key, so re-exports update the
+    same calendar entries. With ``since``, only rows created or changed after
+    that ISO timestamp are written. Returns the number of VEVENTs written.
+    """
+    dtstamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    since_clause = ""
+    params = ()
+    if since:
+        since_clause = "WHERE {col} > ?"
+        params = (datetime.fromisoformat(since).isoformat(),)
+
+    for line in ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{ICS_PRODID}",
+                 "CALSCALE:GREGORIAN", "X-WR-CALNAME:London Trip"] + ICS_VTIMEZONE:
+        out.write(_ics_fold(line))
+
+    count = 0
+    reservations = conn.execute(f"""
+        SELECT r.*, v.address FROM reservations r
+        LEFT JOIN venues v ON v.name = COALESCE(r.matched_venue, r.venue_name)
+        {since_clause.format(col="r.created_at")}
+    """, params)
+    for r in reservations:
+        dates = parse_date_range(r["date"])
+        if not dates:
+            continue
+        description = []
+        if r["confirmation"]:
+            description.append(f"Confirmation: {r['confirmation']}")
+        if r["party_size"]:
+            description.append(f"Party size: {r['party_size']}")
+        if r["notes"]:
+            description.append(r["notes"])
+        location = ", ".join(p for p in (r["matched_venue"] or r["venue_name"], r["address"]) if p)
+        lines = _ics_event(_ics_uid("reservation", r["venue_name"], r["date"], r["time"]), dates,
+                           parse_time(r["time"]), parse_time(r["end_time"]), r["venue_name"],
+                           location, description, None, r["created_at"], dtstamp)
+        out.write("".join(_ics_fold(line) for line in lines))
+        count += 1
+
+    events = conn.execute(f"""
+        SELECT e.*, v.address FROM events e
+        LEFT JOIN venues v ON v.name = e.venue_name
+        {since_clause.format(col="e.fetched_at")}
+    """, params)
+    for e in events:
+        dates = parse_date_range(e["date"])
+        if not dates:
+            continue
+        description = [p for p in (e["price"], e["category"], e["notes"]) if p]
+        location = ", ".join(p for p in (e["venue_name"], e["address"]) if p)
+        start, end = parse_time_range(e["time"])
+        lines = _ics_event(_ics_uid("event", e["title"], e["venue_name"], e["date"]), dates,
+                           start, end, e["title"], location, description,
+                           e["url"], e["fetched_at"], dtstamp)
+        out.write("".join(_ics_fold(line) for line in lines))
+        count += 1
+
+    out.write(_ics_fold("END:VCALENDAR"))
+    return count
 
 
 # ---------------------------------------------------------------------------
@@ -602,17 +1694,161 @@ def deduplicate_venues(venues: list) -> list:
     return list(seen.values())
 
 
+# Booking fields a merged-away venue contributes when the survivor lacks them.
+MERGE_FILL_COLUMNS = ("ticket_price", "booking_required", "booking_url", "booking_notes", "member_required")
+
+
+def merge_place_duplicates(conn: sqlite3.Connection) -> list:
+    """Collapse venues that resolved to the same Google place ID into one row.
+
+    Name-based dedup can't tell "Tower of London" from "Tower of London
+    Tour"; the place ID can. The survivor is a markdown (or "both") row if
+    there is one, else the oldest. Each other row's name becomes a
+    venue_aliases entry, its booking fields fill gaps in the survivor, and
+    its events and reservation matches move over before it is deleted.
+    Returns (kept, merged) name pairs; does not commit.
+    """
+    now = datetime.utcnow().isoformat()
+    merged = []
+    place_ids = [row[0] for row in conn.execute("""
+        SELECT google_place_id FROM venues WHERE google_place_id IS NOT NULL
+        GROUP BY google_place_id HAVING COUNT(*) > 1
+    """)]
+    fills = ", ".join(f"{col} = COALESCE({col}, ?)" for col in MERGE_FILL_COLUMNS)
+    for place_id in place_ids:
+        rows = conn.execute("""
+            SELECT * FROM venues WHERE google_place_id = ? ORDER BY source = 'google_maps', id
+        """, (place_id,)).fetchall()
+        keep = rows[0]
+        sources = {r["source"] for r in rows}
+        for other in rows[1:]:
+            conn.execute(f"UPDATE venues SET {fills} WHERE id = ?",
+                         [other[col] for col in MERGE_FILL_COLUMNS] + [keep["id"]])
+            # An event already listed under the survivor wins over the duplicate's copy
+            conn.execute("UPDATE OR IGNORE events SET venue_name = ? WHERE venue_name = ?",
+                         (keep["name"], other["name"]))
+            conn.execute("DELETE FROM events WHERE venue_name = ?", (other["name"],))
+            conn.execute("UPDATE reservations SET matched_venue = ? WHERE matched_venue = ?",
+                         (keep["name"], other["name"]))
+            conn.execute("UPDATE venue_aliases SET venue_id = ? WHERE venue_id = ?", (keep["id"], other["id"]))
+            conn.execute("DELETE FROM venues WHERE id = ?", (other["id"],))
+            conn.execute("""
+                INSERT OR REPLACE INTO venue_aliases (alias, alias_key, venue_id, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (other["name"], normalize_name(other["name"]), keep["id"], now))
+            merged.append((keep["name"], other["name"]))
+        if "google_maps" in sources and sources & {"markdown", "both"}:
+            conn.execute("UPDATE venues SET source = 'both' WHERE id = ?", (keep["id"],))
+    return merged
+
+
+def resolve_places(conn: sqlite3.Connection):
+    """Run merge_place_duplicates, commit, and report what was merged."""
+    merged = merge_place_duplicates(conn)
+    conn.commit()
+    for kept, name in merged:
+        print(f"  Merged '{name}' into '{kept}' (same Google place)")
+    return merged
+
+
 # ---------------------------------------------------------------------------
 # Google Maps Places API
 # ---------------------------------------------------------------------------
 
-def fetch_place(venue_name: str, api_key: str) -> Optional[dict]:
-    """Fetch place details from Google Maps Places API."""
-    query = f"{venue_name} London"
-    payload = json.dumps({
-        "textQuery": query,
-        "maxResultCount": 1,
-    }).encode("utf-8")
+class ApiBudgetExceeded(Exception):
+    pass
+
+
+class ApiLedger:
+    """Counts Places requests against an optional budget and buffers one
+    api_calls row per request until flush() writes them.
+
+    Thread-safe, so the sync pipeline's fetch workers can share one ledger
+    while only the writer thread touches the database.
+    """
+
+    def __init__(self, max_calls: Optional[int] = None):
+        self.max_calls = max_calls
+        self.calls = 0
+        self.cost = 0.0
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Claim one call from the budget before sending it."""
+        with self.lock:
+            if self.max_calls is not None and self.calls >= self.max_calls:
+                raise ApiBudgetExceeded(f"API call budget of {self.max_calls} reached")
+            self.calls += 1
+
+    def record(self, query: str, status: Optional[int], latency_ms: float,
+               response_bytes: int, error: Optional[str] = None, cost: float = PLACES_COST_PER_CALL):
+        row = (datetime.utcnow().isoformat(), query, status, round(latency_ms, 1), response_bytes, error, cost)
+        with self.lock:
+            self.pending.append(row)
+            self.cost += cost
+
+    def flush(self, conn: sqlite3.Connection):
+        """Insert the buffered rows without committing."""
+        with self.lock:
+            rows, self.pending = self.pending, []
+        if rows:
+            conn.executemany("""
+                INSERT INTO api_calls (called_at, query, status, latency_ms, response_bytes, error, cost)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+    def summary(self) -> str:
+        return f"{self.calls} API call(s), est. ${self.cost:.2f}"
+
+
+def search_cost(field_mask: str) -> float:
+    """Estimated USD for one Text Search with ``field_mask`` (the IDs-only mask is free)."""
+    return PLACES_ID_COST_PER_CALL if field_mask == ID_FIELD_MASK else PLACES_COST_PER_CALL
+
+
+def _places_request(req: urllib.request.Request, query: str, label: str,
+                    ledger: Optional[ApiLedger], cost: float) -> Optional[dict]:
+    """Send one Places request and return its decoded JSON, or None on error.
+
+    With a ledger, the call is charged against its budget first (raising
+    ApiBudgetExceeded when spent) and logged to it afterwards.
+    """
+    if ledger:
+        ledger.reserve()
+    started = time.perf_counter()
+
+    def log(status, size, error=None):
+        if ledger:
+            ledger.record(query, status, (time.perf_counter() - started) * 1000, size, error, cost)
+
+    try:
+        with urllib.request.urlopen(req, timeout=15) as resp:
+            body = resp.read()
+            log(resp.status, len(body))
+            return json.loads(body.decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        body = e.read().decode("utf-8", errors="replace")
+        log(e.code, len(body), body[:200])
+        print(f"  API error for '{label}': {e.code} — {body[:200]}", file=sys.stderr)
+    except urllib.error.URLError as e:
+        log(None, 0, str(e.reason))
+        print(f"  Network error for '{label}': {e}", file=sys.stderr)
+    return None
+
+
+def fetch_place(venue_name: str, api_key: str, ledger: Optional[ApiLedger] = None,
+                field_mask: str = FIELD_MASK) -> Optional[dict]:
+    """Fetch place details from Google Maps Places API.
+
+    Pass ``field_mask=ID_FIELD_MASK`` for the cheap IDs-only search; the
+    details can be filled in later with fetch_place_details().
+    """
+    query = f"{venue_name} London"
+    payload = json.dumps({
+        "textQuery": query,
+        "maxResultCount": 1,
+    }).encode("utf-8")
 
     req = urllib.request.Request(
         PLACES_API_URL,
@@ -620,20 +1856,12 @@ def fetch_place(venue_name: str, api_key: str) -> Optional[dict]:
         headers={
             "Content-Type": "application/json",
             "X-Goog-Api-Key": api_key,
-            "X-Goog-FieldMask": FIELD_MASK,
+            "X-Goog-FieldMask": field_mask,
         },
         method="POST",
     )
-
-    try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="replace")
-        print(f"  API error for '{venue_name}': {e.code} — {body[:200]}")
-        return None
-    except urllib.error.URLError as e:
-        print(f"  Network error for '{venue_name}': {e}")
+    data = _places_request(req, query, venue_name, ledger, search_cost(field_mask))
+    if data is None:
         return None
 
     places = data.get("places", [])
@@ -644,6 +1872,18 @@ def fetch_place(venue_name: str, api_key: str) -> Optional[dict]:
     return places[0]
 
 
+def fetch_place_details(place_id: str, api_key: str, ledger: Optional[ApiLedger] = None) -> Optional[dict]:
+    """Fetch the DETAIL_FIELD_MASK fields for a known place ID (Place Details)."""
+    req = urllib.request.Request(
+        PLACES_DETAILS_URL + urllib.parse.quote(place_id),
+        headers={
+            "X-Goog-Api-Key": api_key,
+            "X-Goog-FieldMask": DETAIL_FIELD_MASK,
+        },
+    )
+    return _places_request(req, f"details:{place_id}", place_id, ledger, PLACES_DETAILS_COST_PER_CALL)
+
+
 def format_hours(hours_data: Optional[dict]) -> str:
     """Format regularOpeningHours into a readable string."""
     if not hours_data:
@@ -657,8 +1897,13 @@ def format_hours(hours_data: Optional[dict]) -> str:
     return "Hours not available"
 
 
-def build_venue_record(name: str, source: str, section: str, api_result: Optional[dict]) -> dict:
-    """Build a venue dict suitable for DB insertion."""
+def build_venue_record(name: str, source: str, section: str, api_result: Optional[dict],
+                       details: bool = True) -> dict:
+    """Build a venue dict suitable for DB insertion.
+
+    ``details=False`` marks an IDs-only result, leaving details_at NULL so
+    ensure_details() fetches the rest on first use.
+    """
     now = datetime.utcnow().isoformat()
 
     if api_result is None:
@@ -675,9 +1920,13 @@ def build_venue_record(name: str, source: str, section: str, api_result: Optiona
             "google_maps_uri": None,
             "raw_response": None,
             "fetched_at": now,
+            "latitude": None,
+            "longitude": None,
+            "details_at": None,
         }
 
     hours_data = api_result.get("regularOpeningHours")
+    location = api_result.get("location") or {}
     return {
         "name": name,
         "source": source,
@@ -691,179 +1940,845 @@ def build_venue_record(name: str, source: str, section: str, api_result: Optiona
         "google_maps_uri": api_result.get("googleMapsUri"),
         "raw_response": json.dumps(api_result),
         "fetched_at": now,
+        "latitude": location.get("latitude"),
+        "longitude": location.get("longitude"),
+        "details_at": now if details else None,
     }
 
 
+def save_details(conn: sqlite3.Connection, name: str, details: dict):
+    """Store fetch_place_details() fields on a venue (no commit).
+
+    The detail fields are merged into raw_response, so the stored response
+    looks the same as a full fetch.
+    """
+    row = conn.execute("SELECT raw_response FROM venues WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        return
+    merged = {**json.loads(row["raw_response"] or "{}"), **details}
+    hours_data = merged.get("regularOpeningHours")
+    location = merged.get("location") or {}
+    conn.execute("""
+        UPDATE venues SET address = ?, regular_hours_json = ?, regular_hours_text = ?,
+                          google_maps_uri = ?, raw_response = ?, latitude = ?, longitude = ?,
+                          details_at = ?, details_failures = 0, details_retry_at = NULL
+        WHERE name = ?
+    """, (merged.get("formattedAddress"), json.dumps(hours_data) if hours_data else None,
+          format_hours(hours_data), merged.get("googleMapsUri"), json.dumps(merged),
+          location.get("latitude"), location.get("longitude"), datetime.utcnow().isoformat(), name))
+
+
+def save_details_failure(conn: sqlite3.Connection, name: str):
+    """Push a venue's next details attempt back after a failed fetch (no commit).
+
+    The wait starts at DETAILS_RETRY_SECONDS and doubles with each
+    consecutive failure, up to DETAILS_RETRY_MAX_SECONDS.
+    """
+    row = conn.execute("SELECT details_failures FROM venues WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        return
+    failures = row["details_failures"] + 1
+    wait = min(DETAILS_RETRY_MAX_SECONDS, DETAILS_RETRY_SECONDS * 2 ** (failures - 1))
+    retry_at = (datetime.utcnow() + timedelta(seconds=wait)).isoformat()
+    conn.execute("UPDATE venues SET details_failures = ?, details_retry_at = ? WHERE name = ?",
+                 (failures, retry_at, name))
+
+
+def details_due(row) -> bool:
+    """Whether a venue row still needs its details and isn't backing off."""
+    return (bool(row["google_place_id"]) and row["details_at"] is None
+            and (row["details_retry_at"] is None or row["details_retry_at"] <= datetime.utcnow().isoformat()))
+
+
+def ensure_details(conn: sqlite3.Connection, names: Optional[list] = None,
+                   api_key: Optional[str] = None, ledger: Optional[ApiLedger] = None) -> int:
+    """Fetch and memoize details for venues synced with --ids-only.
+
+    Covers ``names`` (exact DB names) or every venue when None. Without an
+    API key (argument or GOOGLE_MAPS_API_KEY) nothing is fetched and venues
+    show what they have. A failed fetch backs the venue off (see
+    save_details_failure). Progress goes to stderr, so it never mixes with
+    a report on stdout. Commits; returns the number of venues filled in.
+    """
+    api_key = api_key or os.environ.get("GOOGLE_MAPS_API_KEY")
+    if not api_key:
+        return 0
+    rows = conn.execute("""
+        SELECT name, google_place_id FROM venues
+        WHERE details_at IS NULL AND google_place_id IS NOT NULL
+          AND (details_retry_at IS NULL OR details_retry_at <= ?)
+    """, (datetime.utcnow().isoformat(),)).fetchall()
+    if names is not None:
+        wanted = set(names)
+        rows = [row for row in rows if row["name"] in wanted]
+    if not rows:
+        return 0
+
+    ledger = ledger or ApiLedger()
+    print(f"Fetching details for {len(rows)} venue(s)...", file=sys.stderr)
+    filled = 0
+    try:
+        for row in rows:
+            details = fetch_place_details(row["google_place_id"], api_key, ledger)
+            if details is not None:
+                save_details(conn, row["name"], details)
+                filled += 1
+            else:
+                save_details_failure(conn, row["name"])
+    except ApiBudgetExceeded as e:
+        print(f"  Stopped: {e}.", file=sys.stderr)
+    finally:
+        ledger.flush(conn)
+        conn.commit()
+    return filled
+
+
 # ---------------------------------------------------------------------------
-# Output
+# Sync pipeline
 # ---------------------------------------------------------------------------
 
-def print_summary(conn: sqlite3.Connection):
-    """Print a formatted summary of all cached venues grouped by section."""
-    rows = conn.execute(
-        "SELECT * FROM venues ORDER BY section, name"
-    ).fetchall()
+# Items buffered between stages; a full queue blocks the stage feeding it.
+PIPELINE_QUEUE_SIZE = 64
+# Places requests in flight at once.
+FETCH_WORKERS = 4
+# Venue rows per write transaction; a partial batch is flushed whenever the
+# writer has been idle for PIPELINE_FLUSH_SECONDS.
+VENUE_WRITE_BATCH = 25
+PIPELINE_FLUSH_SECONDS = 0.5
 
-    if not rows:
-        print("No venues in database.")
-        return
+_DONE = object()
 
-    current_section = None
-    for row in rows:
-        if row["section"] != current_section:
-            current_section = row["section"]
-            print(f"\n{'=' * 60}")
-            print(f"  {current_section}")
-            print(f"{'=' * 60}")
-
-        print(f"\n  {row['name']}")
-        if row["google_display_name"] and row["google_display_name"] != row["name"]:
-            print(f"    Google name: {row['google_display_name']}")
-        if row["address"]:
-            print(f"    Address: {row['address']}")
-        if row["regular_hours_text"]:
-            hours = row["regular_hours_text"]
-            if " | " in hours:
-                print("    Hours:")
-                for day_hours in hours.split(" | "):
-                    print(f"      {day_hours}")
+
+class PipelineAborted(Exception):
+    pass
+
+
+class StageStats:
+    """Items handled and time spent working (not waiting on queues) by one stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.started = self.finished = None
+
+    def report(self) -> str:
+        wall = max((self.finished or time.perf_counter()) - (self.started or 0), 1e-9)
+        return (f"  {self.name:<6} {self.items:>6} item(s) in {wall:6.2f}s "
+                f"({self.items / wall:8.1f}/s, busy {self.busy:.2f}s)")
+
+
+class SyncPipeline:
+    """parse -> dedup -> fetch -> write, each stage on its own thread(s).
+
+    Stages are joined by bounded queues, so a slow stage applies
+    backpressure instead of letting work pile up in memory. Venues are
+    fetched while parsing continues, and results are written in batched
+    transactions as they arrive. The writer runs on the calling thread
+    because it owns ``conn``. With ``ids_only`` only place IDs and display
+    names are fetched; details wait for ensure_details().
+    """
+
+    def __init__(self, conn: sqlite3.Connection, md_path: Path, csv_dir: Path, api_key: str,
+                 fetch=None, workers: int = FETCH_WORKERS, ledger: Optional[ApiLedger] = None,
+                 ids_only: bool = False):
+        self.conn = conn
+        self.md_path = md_path
+        self.csv_dir = csv_dir
+        self.api_key = api_key
+        self.ledger = ledger or ApiLedger()
+        self.ids_only = ids_only
+        mask = ID_FIELD_MASK if ids_only else FIELD_MASK
+        self.fetch = fetch or (lambda name, key: fetch_place(name, key, self.ledger, mask))
+        self.workers = workers
+        self.parsed = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self.to_fetch = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self.fetched = queue.Queue(PIPELINE_QUEUE_SIZE)
+        self.stop = threading.Event()
+        self.errors = []
+        self.stats = {name: StageStats(name) for name in ("parse", "dedup", "fetch", "write")}
+        # Final source per venue name; dedup may upgrade one to "both" after it was sent on
+        self.sources = {}
+        self.fetch_threads = []
+        self.leftovers = []
+
+    def put(self, q: queue.Queue, item):
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise PipelineAborted()
+
+    def get(self, q: queue.Queue, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    raise
+        raise PipelineAborted()
+
+    def _stage(self, target, *args):
+        def run():
+            try:
+                target(*args)
+            except PipelineAborted:
+                pass
+            except Exception as e:
+                self.errors.append(e)
+                self.stop.set()
+        thread = threading.Thread(target=run, name=f"sync-{target.__name__}", daemon=True)
+        thread.start()
+        return thread
+
+    def parse_stage(self):
+        stats = self.stats["parse"]
+        stats.started = time.perf_counter()
+        print(f"Parsing {self.md_path}...")
+        for source in ("markdown", "csv"):
+            began = time.perf_counter()
+            if source == "markdown":
+                venues = parse_markdown(self.md_path)
+                print(f"  Found {len(venues)} venues in markdown.\n")
+            else:
+                venues = parse_takeout_csvs(self.csv_dir)
+            stats.busy += time.perf_counter() - began
+            for v in venues:
+                self.put(self.parsed, v)
+                stats.items += 1
+        self.put(self.parsed, _DONE)
+        stats.finished = time.perf_counter()
+
+    def dedup_stage(self, cached: set):
+        """Streaming deduplicate_venues(): the first of each name goes on to
+        fetch at once. Markdown is parsed first, so a later duplicate can only
+        upgrade that venue's source to "both"; the writer picks that up."""
+        stats = self.stats["dedup"]
+        stats.started = time.perf_counter()
+        seen = {}
+        while True:
+            v = self.get(self.parsed)
+            if v is _DONE:
+                break
+            began = time.perf_counter()
+            key = normalize_name(v["name"])
+            existing = seen.get(key)
+            if existing is None:
+                seen[key] = v
+                self.sources[v["name"]] = v["source"]
+                stats.items += 1
+                stats.busy += time.perf_counter() - began
+                if v["name"] not in cached:
+                    self.put(self.to_fetch, v)
+                continue
+            if {existing["source"], v["source"]} == {"markdown", "google_maps"}:
+                self.sources[existing["name"]] = "both"
+            stats.busy += time.perf_counter() - began
+        for _ in range(self.workers):
+            self.put(self.to_fetch, _DONE)
+        stats.finished = time.perf_counter()
+
+    def fetch_stage(self):
+        stats = self.stats["fetch"]
+        if stats.started is None:
+            stats.started = time.perf_counter()
+        while True:
+            v = self.get(self.to_fetch)
+            if v is _DONE:
+                break
+            print(f"  Fetching: {v['name']}...")
+            began = time.perf_counter()
+            result = self.fetch(v["name"], self.api_key)
+            stats.busy += time.perf_counter() - began
+            stats.items += 1
+            try:
+                self.put(self.fetched, (v, result))
+            except PipelineAborted:
+                self.leftovers.append((v, result))  # paid for, so the writer still saves it
+                raise
+        self.put(self.fetched, _DONE)
+        stats.finished = time.perf_counter()
+
+    def write_stage(self) -> int:
+        stats = self.stats["write"]
+        stats.started = time.perf_counter()
+        batch = []
+        written = {}
+
+        def flush():
+            if batch:
+                began = time.perf_counter()
+                with self.conn:
+                    self.conn.executemany(VENUE_UPSERT_SQL, batch)
+                    self.ledger.flush(self.conn)
+                stats.busy += time.perf_counter() - began
+                stats.items += len(batch)
+                batch.clear()
+
+        def add(v, result):
+            record = build_venue_record(v["name"], self.sources[v["name"]], v["section"], result,
+                                        details=not self.ids_only)
+            written[v["name"]] = record["source"]
+            batch.append(record)
+
+        remaining = self.workers
+        while remaining:
+            try:
+                item = self.get(self.fetched, timeout=PIPELINE_FLUSH_SECONDS)
+            except queue.Empty:
+                flush()
+                continue
+            except PipelineAborted:
+                # Another stage failed: let in-flight fetches finish, then keep
+                # everything that was fetched
+                for thread in self.fetch_threads:
+                    thread.join()
+                while True:
+                    try:
+                        item = self.fetched.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _DONE:
+                        add(*item)
+                for item in self.leftovers:
+                    add(*item)
+                flush()
+                with self.conn:
+                    self.ledger.flush(self.conn)
+                raise
+            if item is _DONE:
+                remaining -= 1
+                continue
+            add(*item)
+            if len(batch) >= VENUE_WRITE_BATCH:
+                flush()
+        flush()
+
+        # Sources dedup upgraded after the row was already written
+        late = [(self.sources[name], name) for name, source in written.items() if self.sources[name] != source]
+        with self.conn:
+            self.conn.executemany("UPDATE venues SET source = ? WHERE name = ?", late)
+            self.ledger.flush(self.conn)
+        stats.finished = time.perf_counter()
+        return len(written)
+
+    def run(self) -> int:
+        """Run the sync; returns the number of venues fetched and written."""
+        cached = get_cached_names(self.conn)
+        threads = [self._stage(self.parse_stage), self._stage(self.dedup_stage, cached)]
+        self.fetch_threads = [self._stage(self.fetch_stage) for _ in range(self.workers)]
+        threads += self.fetch_threads
+        try:
+            count = self.write_stage()
+        except PipelineAborted:
+            count = 0
+        finally:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+        if self.errors:
+            raise self.errors[0]
+        return count
+
+    def report(self) -> str:
+        return "Pipeline throughput:\n" + "\n".join(s.report() for s in self.stats.values())
+
+
+# ---------------------------------------------------------------------------
+# Renderers
+# ---------------------------------------------------------------------------
+
+# Rendered output is handed to the stream in chunks of about this many characters.
+RENDER_BUFFER_CHARS = 1 << 16
+
+
+class Record:
+    """One listed item: a title line, then fields and groups in display order.
+
+    `meta` are qualifiers appended to the title ("@ Venue", "at 8pm"). `body`
+    holds (label, value) fields — label None for a bare line, a list value for
+    one line per entry — plus Group and nested Record items. `row` is the flat
+    mapping the CSV renderer writes, keyed by the renderer's columns.
+    """
+
+    __slots__ = ("title", "meta", "body", "row", "bullet")
+
+    def __init__(self, title: str, meta=(), body=(), row=None, bullet: bool = False):
+        self.title = title
+        self.meta = meta
+        self.body = body
+        self.row = row
+        self.bullet = bullet
+
+
+class Group:
+    """A named run of fields or records inside a record ("Booking", "Events")."""
+
+    __slots__ = ("name", "items")
+
+    def __init__(self, name: str, items: list):
+        self.name = name
+        self.items = items
+
+
+def _fields(*pairs) -> list:
+    """(label, value) pairs whose value is set."""
+    return [(label, value) for label, value in pairs if value]
+
+
+class Renderer:
+    """Buffers rendered text and writes it to `out` in large chunks.
+
+    Callers feed section() and record() straight from cursor iteration and
+    finish with close(); subclasses implement the _begin/_section/_record/
+    _end hooks. `sections` ("box" or "rule") and `gap` ("before", "after"
+    or None) only shape the plain-text layout.
+    """
+
+    def __init__(self, out=None, title: Optional[str] = None, columns=(),
+                 sections: str = "box", gap: Optional[str] = "before"):
+        self.out = out if out is not None else sys.stdout
+        self.title = title
+        self.columns = columns
+        self.sections = sections
+        self.gap = gap
+        self.count = 0
+        self._started = False
+        self._parts = []
+        self._size = 0
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= RENDER_BUFFER_CHARS:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.out.write("".join(self._parts))
+            self._parts.clear()
+            self._size = 0
+
+    def _start(self):
+        if not self._started:
+            self._started = True
+            self._begin()
+
+    def section(self, title: str):
+        self._start()
+        self._section(title)
+
+    def record(self, record: Record):
+        self._start()
+        self.count += 1
+        self._record(record)
+
+    def close(self, empty_message: str):
+        if self._started:
+            self._end()
+        else:
+            self._empty(empty_message)
+        self.flush()
+
+    def _begin(self):
+        pass
+
+    def _section(self, title: str):
+        pass
+
+    def _record(self, record: Record):
+        raise NotImplementedError
+
+    def _end(self):
+        pass
+
+    def _empty(self, message: str):
+        self.write(f"{message}\n")
+
+
+class TextRenderer(Renderer):
+    """The plain-text layout the CLI has always printed."""
+
+    def _begin(self):
+        if self.title:
+            self.write(f"\n=== {self.title.upper()} ===\n\n")
+
+    def _section(self, title: str):
+        if self.sections == "box":
+            self.write(f"\n{'=' * 60}\n  {title}\n{'=' * 60}\n")
+        else:
+            # Records spaced after themselves already leave the blank line
+            self.write(f"--- {title} ---\n" if self.gap == "after" else f"\n--- {title} ---\n")
+
+    def _line(self, record: Record, indent: int, lines: list):
+        title = f"* {record.title}" if record.bullet else record.title
+        lines.append(f"{' ' * indent}{' '.join((title, *record.meta))}\n")
+
+    def _record(self, record: Record):
+        lines = ["\n"] if self.gap == "before" else []
+        self._line(record, 2, lines)
+        self._body(record.body, 4, lines)
+        if self.gap == "after":
+            lines.append("\n")
+        self.write("".join(lines))
+
+    def _body(self, body, indent: int, lines: list):
+        pad = " " * indent
+        for item in body:
+            if isinstance(item, Record):
+                self._line(item, indent, lines)
+                self._body(item.body, indent + 2, lines)
+            elif isinstance(item, Group):
+                lines.append(f"{pad}--- {item.name} ---\n")
+                self._body(item.items, indent, lines)
             else:
-                print(f"    Hours: {hours}")
-        if row["google_maps_uri"]:
-            print(f"    Maps: {row['google_maps_uri']}")
-        print(f"    Source: {row['source']}")
+                label, value = item
+                if isinstance(value, list):
+                    lines.append(f"{pad}{label}:\n")
+                    lines.extend(f"{pad}  {line}\n" for line in value)
+                else:
+                    lines.append(f"{pad}{label}: {value}\n" if label else f"{pad}{value}\n")
+
+
+def _md_escape(value) -> str:
+    text = str(value)
+    if text.startswith(("http://", "https://")):
+        return f"<{text}>"
+    return re.sub(r"([\\`*_\[\]<>#|])", r"\\\1", text)
+
+
+class MarkdownRenderer(Renderer):
+    """Sections as headings, records as nested bullet lists."""
+
+    def _begin(self):
+        if self.title:
+            self.write(f"# {self.title}\n")
+
+    def _section(self, title: str):
+        self.write(f"\n## {_md_escape(title)}\n\n")
+
+    def _line(self, record: Record, pad: str, lines: list):
+        meta = "".join(f" {_md_escape(m)}" for m in record.meta)
+        lines.append(f"{pad}- **{_md_escape(record.title)}**{meta}\n")
+
+    def _record(self, record: Record):
+        lines = []
+        self._line(record, "", lines)
+        self._body(record.body, "  ", lines)
+        self.write("".join(lines))
+
+    def _body(self, body, pad: str, lines: list):
+        for item in body:
+            if isinstance(item, Record):
+                self._line(item, pad, lines)
+                self._body(item.body, pad + "  ", lines)
+            elif isinstance(item, Group):
+                lines.append(f"{pad}- *{_md_escape(item.name)}*\n")
+                self._body(item.items, pad + "  ", lines)
+            else:
+                label, value = item
+                if isinstance(value, list):
+                    lines.append(f"{pad}- {_md_escape(label)}:\n")
+                    lines.extend(f"{pad}  - {_md_escape(line)}\n" for line in value)
+                elif label:
+                    lines.append(f"{pad}- {_md_escape(label)}: {_md_escape(value)}\n")
+                else:
+                    lines.append(f"{pad}- {_md_escape(value)}\n")
+
+    def _empty(self, message: str):
+        self.write(f"_{message}_\n")
+
+
+def _html_value(value) -> str:
+    text = html.escape(str(value))
+    if str(value).startswith(("http://", "https://")):
+        return f'<a href="{text}">{text}</a>'
+    return text
+
+
+class HtmlRenderer(Renderer):
+    """A standalone HTML page: one <section> per section, records as nested lists."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._open = None
+
+    def _begin(self):
+        title = html.escape(self.title or "London trip")
+        self.write(f'<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="utf-8"><title>{title}</title></head>\n'
+                   f"<body>\n<h1>{title}</h1>\n")
+
+    def _close_section(self):
+        if self._open:
+            self.write(f"</ul>\n{'</section>' if self._open == 'section' else ''}\n")
+        self._open = None
+
+    def _section(self, title: str):
+        self._close_section()
+        self.write(f"<section>\n<h2>{html.escape(title)}</h2>\n<ul>\n")
+        self._open = "section"
+
+    def _record(self, record: Record):
+        if self._open is None:
+            self.write("<ul>\n")
+            self._open = "list"
+        self._item(record)
+
+    def _item(self, record: Record, parts: Optional[list] = None):
+        out = parts if parts is not None else []
+        meta = "".join(f" {html.escape(m)}" for m in record.meta)
+        out.append(f"<li><strong>{html.escape(record.title)}</strong>{meta}")
+        self._body(record.body, out)
+        out.append("</li>\n")
+        if parts is None:
+            self.write("".join(out))
+
+    def _body(self, body, parts: list):
+        if not body:
+            return
+        parts.append("<ul>")
+        for item in body:
+            if isinstance(item, Record):
+                self._item(item, parts)
+            elif isinstance(item, Group):
+                parts.append(f"<li><em>{html.escape(item.name)}</em>")
+                self._body(item.items, parts)
+                parts.append("</li>")
+            else:
+                label, value = item
+                if isinstance(value, list):
+                    lines = "".join(f"<li>{_html_value(v)}</li>" for v in value)
+                    parts.append(f"<li>{html.escape(label)}:<ul>{lines}</ul></li>")
+                elif label:
+                    parts.append(f"<li>{html.escape(label)}: {_html_value(value)}</li>")
+                else:
+                    parts.append(f"<li>{_html_value(value)}</li>")
+        parts.append("</ul>")
+
+    def _end(self):
+        self._close_section()
+        self.write("</body>\n</html>\n")
+
+    def _empty(self, message: str):
+        self._begin()
+        self.write(f"<p>{html.escape(message)}</p>\n")
+        self._end()
+
+
+class CsvRenderer(Renderer):
+    """One row per record (nested records included) over the report's columns."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._writer = csv.writer(self, lineterminator="\n")
+
+    def _begin(self):
+        self._writer.writerow(self.columns)
+
+    def _record(self, record: Record):
+        self._writer.writerow([record.row[c] for c in self.columns])
+        self._nested(record.body)
+
+    def _nested(self, body):
+        for item in body:
+            if isinstance(item, Group):
+                self._nested(item.items)
+            elif isinstance(item, Record) and item.row is not None:
+                self._writer.writerow([item.row[c] for c in self.columns])
+
+    def _empty(self, message: str):
+        self._begin()
+
+
+RENDERERS = {
+    "text": TextRenderer,
+    "markdown": MarkdownRenderer,
+    "csv": CsvRenderer,
+    "html": HtmlRenderer,
+}
 
 
-def print_report(conn: sqlite3.Connection):
-    """Print full research report: hours + booking + events per venue."""
-    rows = conn.execute(
-        "SELECT * FROM venues ORDER BY section, name"
-    ).fetchall()
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
 
+def print_fetch_estimate(to_fetch: list, max_calls: Optional[int] = None, ids_only: bool = False):
+    """Print what a sync would spend on the Places API (one Text Search per venue)."""
+    calls = len(to_fetch) if max_calls is None else min(len(to_fetch), max_calls)
+    per_call = search_cost(ID_FIELD_MASK if ids_only else FIELD_MASK)
+    print(f"\n{len(to_fetch)} venue(s) not cached; a sync would make {calls} API call(s), "
+          f"est. ${calls * per_call:.2f} at ${per_call:g} per call.")
+    if ids_only:
+        print(f"  Details cost ${PLACES_DETAILS_COST_PER_CALL} per venue, paid when it's first shown, "
+              f"reported or planned.")
+    if calls < len(to_fetch):
+        print(f"  --max-calls {max_calls} leaves {len(to_fetch) - calls} for a later run.")
+    for v in to_fetch[:calls]:
+        print(f"  {v['name']}")
+
+
+def print_api_usage(conn: sqlite3.Connection):
+    """Print the api_calls ledger summarized per day."""
+    rows = conn.execute("""
+        SELECT substr(called_at, 1, 10) AS day, COUNT(*) AS calls,
+               SUM(status = 200) AS ok, SUM(status IS NULL OR status != 200) AS failed,
+               AVG(latency_ms) AS latency, SUM(response_bytes) AS bytes, SUM(cost) AS cost
+        FROM api_calls GROUP BY day ORDER BY day
+    """).fetchall()
     if not rows:
-        print("No venues in database.")
+        print("No API calls recorded.")
         return
+    print(f"{'Day':<12}{'Calls':>7}{'OK':>6}{'Failed':>8}{'Avg ms':>9}{'KB':>9}{'Est. $':>9}")
+    for r in rows:
+        print(f"{r['day']:<12}{r['calls']:>7}{r['ok']:>6}{r['failed']:>8}{r['latency']:>9.0f}"
+              f"{r['bytes'] / 1024:>9.1f}{r['cost']:>9.2f}")
+    total = sum(r["calls"] for r in rows)
+    print(f"Total: {total} call(s), est. ${sum(r['cost'] for r in rows):.2f}")
+
+
+# Venue listings select only the columns they show: raw_response is most of
+# a venue row's bytes.
+VENUE_COLUMNS = ("section", "name", "google_display_name", "address", "regular_hours_text",
+                 "google_maps_uri", "source")
+REPORT_COLUMNS = ("kind", "section", "name", "venue", "date", "time", "address", "hours", "price",
+                  "booking_required", "url", "member_required", "notes", "google_maps_uri")
+REPORT_VENUES_SQL = """
+    SELECT section, name, google_display_name, address, regular_hours_text, google_maps_uri,
+           ticket_price, booking_required, booking_url, booking_notes, member_required
+    FROM venues ORDER BY section, name
+"""
+EVENT_COLUMNS = ("date", "time", "title", "venue_name", "price", "category", "url", "notes", "source")
+
 
+def _hours_field(row: sqlite3.Row) -> tuple:
+    hours = row["regular_hours_text"]
+    return "Hours", hours.split(" | ") if hours and " | " in hours else hours
+
+
+def _venue_summary_record(row: sqlite3.Row) -> Record:
+    google_name = row["google_display_name"]
+    return Record(row["name"], body=_fields(
+        ("Google name", google_name if google_name != row["name"] else None),
+        ("Address", row["address"]),
+        _hours_field(row),
+        ("Maps", row["google_maps_uri"]),
+    ) + [("Source", row["source"])], row=row)
+
+
+def print_summary(conn: sqlite3.Connection, fmt: str = "text", out=None):
+    """Print a formatted summary of all cached venues grouped by section."""
+    renderer = RENDERERS[fmt](out, columns=VENUE_COLUMNS)
     current_section = None
-    for row in rows:
+    for row in conn.execute(f"SELECT {', '.join(VENUE_COLUMNS)} FROM venues ORDER BY section, name"):
         if row["section"] != current_section:
             current_section = row["section"]
-            print(f"\n{'=' * 60}")
-            print(f"  {current_section}")
-            print(f"{'=' * 60}")
-
-        print(f"\n  {row['name']}")
-        if row["google_display_name"] and row["google_display_name"] != row["name"]:
-            print(f"    Google name: {row['google_display_name']}")
-        if row["address"]:
-            print(f"    Address: {row['address']}")
-
-        # Hours
-        if row["regular_hours_text"]:
-            hours = row["regular_hours_text"]
-            if " | " in hours:
-                print("    Hours:")
-                for day_hours in hours.split(" | "):
-                    print(f"      {day_hours}")
-            else:
-                print(f"    Hours: {hours}")
-
-        # Booking info
-        has_booking = any([row["ticket_price"], row["booking_required"],
-                          row["booking_url"], row["booking_notes"],
-                          row["member_required"]])
-        if has_booking:
-            print("    --- Booking ---")
-            if row["ticket_price"]:
-                print(f"    Price: {row['ticket_price']}")
-            if row["booking_required"]:
-                print(f"    Booking required: {row['booking_required']}")
-            if row["booking_url"]:
-                print(f"    Book here: {row['booking_url']}")
-            if row["member_required"]:
-                print(f"    Membership: {row['member_required']}")
-            if row["booking_notes"]:
-                print(f"    Notes: {row['booking_notes']}")
-
-        # Events at this venue
-        events = conn.execute(
-            "SELECT * FROM events WHERE venue_name = ? ORDER BY date, time",
-            (row["name"],)
-        ).fetchall()
-        if events:
-            print("    --- Events ---")
-            for evt in events:
-                parts = [f"    * {evt['title']}"]
-                if evt["date"]:
-                    parts.append(f"({evt['date']})")
-                if evt["time"]:
-                    parts.append(f"at {evt['time']}")
-                if evt["price"]:
-                    parts.append(f"- {evt['price']}")
-                print(" ".join(parts))
-                if evt["notes"]:
-                    print(f"      {evt['notes']}")
-                if evt["url"]:
-                    print(f"      {evt['url']}")
-
-        if row["google_maps_uri"]:
-            print(f"    Maps: {row['google_maps_uri']}")
-
-    # Events not tied to a specific venue
-    general_events = conn.execute(
-        "SELECT * FROM events WHERE venue_name IS NULL OR venue_name = '' ORDER BY date, time"
-    ).fetchall()
-    if general_events:
-        print(f"\n{'=' * 60}")
-        print(f"  General Events (not venue-specific)")
-        print(f"{'=' * 60}")
-        for evt in general_events:
-            parts = [f"\n  * {evt['title']}"]
-            if evt["date"]:
-                parts.append(f"({evt['date']})")
-            if evt["time"]:
-                parts.append(f"at {evt['time']}")
-            if evt["price"]:
-                parts.append(f"- {evt['price']}")
-            print(" ".join(parts))
-            if evt["venue_name"]:
-                print(f"    Venue: {evt['venue_name']}")
-            if evt["notes"]:
-                print(f"    {evt['notes']}")
-            if evt["url"]:
-                print(f"    {evt['url']}")
-
-
-def print_events(conn: sqlite3.Connection):
-    """Print all events, grouped by date."""
-    events = conn.execute(
-        "SELECT * FROM events ORDER BY date, time, venue_name"
-    ).fetchall()
-
-    if not events:
-        print("No events in database.")
+            renderer.section(current_section)
+        renderer.record(_venue_summary_record(row))
+    renderer.close("No venues in database.")
+
+
+def _report_event_record(evt: sqlite3.Row, section: str, bullet: bool = False,
+                         venue_field: bool = False) -> Record:
+    meta = [part for part, value in ((f"({evt['date']})", evt["date"]), (f"at {evt['time']}", evt["time"]),
+                                     (f"- {evt['price']}", evt["price"])) if value]
+    body = _fields(("Venue", evt["venue_name"] if venue_field else None),
+                   (None, evt["notes"]), (None, evt["url"]))
+    row = dict.fromkeys(REPORT_COLUMNS)
+    row.update(kind="event", section=section, name=evt["title"], venue=evt["venue_name"], date=evt["date"],
+               time=evt["time"], price=evt["price"], url=evt["url"], notes=evt["notes"])
+    return Record(evt["title"], meta, body, row, bullet)
+
+
+def _venue_report_record(row: sqlite3.Row, events: list) -> Record:
+    google_name = row["google_display_name"]
+    body = _fields(
+        ("Google name", google_name if google_name != row["name"] else None),
+        ("Address", row["address"]),
+        _hours_field(row),
+    )
+    booking = _fields(
+        ("Price", row["ticket_price"]),
+        ("Booking required", row["booking_required"]),
+        ("Book here", row["booking_url"]),
+        ("Membership", row["member_required"]),
+        ("Notes", row["booking_notes"]),
+    )
+    if booking:
+        body.append(Group("Booking", booking))
+    if events:
+        body.append(Group("Events", [_report_event_record(e, row["section"], bullet=True) for e in events]))
+    body += _fields(("Maps", row["google_maps_uri"]))
+
+    flat = dict.fromkeys(REPORT_COLUMNS)
+    flat.update(kind="venue", section=row["section"], name=row["name"], address=row["address"],
+                hours=row["regular_hours_text"], price=row["ticket_price"],
+                booking_required=row["booking_required"], url=row["booking_url"],
+                member_required=row["member_required"], notes=row["booking_notes"],
+                google_maps_uri=row["google_maps_uri"])
+    return Record(row["name"], body=body, row=flat)
+
+
+def print_report(conn: sqlite3.Connection, fmt: str = "text", out=None):
+    """Print full research report: hours + booking + events per venue.
+
+    Venues still waiting on lazy details are filled in first; anything that
+    prints goes to stderr, so the renderer is the only writer to stdout/out.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        ensure_details(conn)
+    # One pass over the venue-tied events instead of a query per venue
+    events_by_venue = {}
+    for evt in conn.execute("SELECT * FROM events WHERE venue_name != '' ORDER BY venue_name, date, time"):
+        events_by_venue.setdefault(evt["venue_name"], []).append(evt)
+
+    renderer = RENDERERS[fmt](out, title="Research report" if fmt != "text" else None, columns=REPORT_COLUMNS)
+    current_section = None
+    for row in conn.execute(REPORT_VENUES_SQL):
+        if row["section"] != current_section:
+            current_section = row["section"]
+            renderer.section(current_section)
+        renderer.record(_venue_report_record(row, events_by_venue.get(row["name"])))
+    if not renderer.count:
+        renderer.close("No venues in database.")
         return
 
+    # Events not tied to a specific venue
+    general = "General Events (not venue-specific)"
+    for i, evt in enumerate(conn.execute(
+            "SELECT * FROM events WHERE venue_name IS NULL OR venue_name = '' ORDER BY date, time")):
+        if i == 0:
+            renderer.section(general)
+        renderer.record(_report_event_record(evt, general, bullet=True, venue_field=True))
+    renderer.close("No venues in database.")
+
+
+def _event_record(evt: sqlite3.Row) -> Record:
+    meta = [part for part, value in ((f"@ {evt['venue_name']}", evt["venue_name"]),
+                                     (f"at {evt['time']}", evt["time"]),
+                                     (f"({evt['price']})", evt["price"])) if value]
+    return Record(evt["title"], meta, _fields(
+        ("Category", evt["category"]),
+        (None, evt["notes"]),
+        (None, evt["url"]),
+    ), row=evt)
+
+
+def print_events(conn: sqlite3.Connection, date_from: Optional[str] = None,
+                 date_to: Optional[str] = None, fmt: str = "text", out=None):
+    """Print events (optionally only those overlapping a date range), grouped by date."""
+    where, params = span_filter(date_from, date_to)
+    renderer = RENDERERS[fmt](out, title="Events" if fmt != "text" else None, columns=EVENT_COLUMNS,
+                              sections="rule", gap=None)
     current_date = None
-    for evt in events:
+    for evt in conn.execute(f"SELECT * FROM events{where} ORDER BY start_min, date, venue_name", params):
         if evt["date"] != current_date:
             current_date = evt["date"]
-            print(f"\n--- {current_date or 'No date'} ---")
-
-        parts = [f"  {evt['title']}"]
-        if evt["venue_name"]:
-            parts.append(f"@ {evt['venue_name']}")
-        if evt["time"]:
-            parts.append(f"at {evt['time']}")
-        if evt["price"]:
-            parts.append(f"({evt['price']})")
-        print(" ".join(parts))
-        if evt["category"]:
-            print(f"    Category: {evt['category']}")
-        if evt["notes"]:
-            print(f"    {evt['notes']}")
-        if evt["url"]:
-            print(f"    {evt['url']}")
+            renderer.section(current_date or "No date")
+        renderer.record(_event_record(evt))
+    renderer.close("No events in database.")
 
 
 def dump_json(conn: sqlite3.Connection):
@@ -877,19 +2792,852 @@ def dump_json(conn: sqlite3.Connection):
     print(json.dumps(data, indent=2))
 
 
+# ---------------------------------------------------------------------------
+# Schedule page
+# ---------------------------------------------------------------------------
+
+# Templates are compiled once at import; SCHEDULE_TEMPLATE_VERSION folds them
+# into every day hash so editing a template re-renders all days.
+SCHEDULE_PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>London Trip — Schedule</title>
+<style>
+  :root { --bg: #f5f5f0; --card: #fff; --accent: #c0392b; --confirmed: #27ae60; --muted: #888; --border: #e0e0e0; }
+  body { font-family: -apple-system, system-ui, 'Segoe UI', sans-serif; max-width: 860px; margin: 0 auto; padding: 20px; background: var(--bg); color: #333; line-height: 1.5; }
+  h2 { font-size: 20px; margin-top: 40px; border-bottom: 2px solid var(--accent); padding-bottom: 6px; }
+  h2 .date { color: var(--accent); }
+  .day-card { background: var(--card); border-radius: 8px; padding: 20px; margin: 16px 0; box-shadow: 0 1px 4px rgba(0,0,0,0.08); }
+  table { width: 100%; border-collapse: collapse; margin: 12px 0; }
+  th { text-align: left; padding: 8px 10px; background: #f8f8f8; font-size: 13px; color: #666; border-bottom: 2px solid var(--border); }
+  td { padding: 8px 10px; border-bottom: 1px solid var(--border); vertical-align: top; font-size: 14px; }
+  td:first-child { white-space: nowrap; font-weight: 600; color: var(--accent); width: 90px; }
+  .confirmed { background: #e8f5e9; border-left: 3px solid var(--confirmed); }
+  .confirmed td:first-child { color: var(--confirmed); }
+  .conf-badge { display: inline-block; background: var(--confirmed); color: white; padding: 1px 8px; border-radius: 3px; font-size: 11px; font-weight: 600; }
+  .conf-code { font-family: monospace; background: #f0f0f0; padding: 1px 6px; border-radius: 3px; font-size: 12px; }
+  .tag { display: inline-block; padding: 2px 8px; border-radius: 3px; font-size: 11px; font-weight: 600; background: #e3f2fd; color: #2980b9; }
+  .tag-booked { background: #e8f5e9; color: var(--confirmed); }
+</style>
+</head>
+<body>
+<h1>London Trip <small>Schedule</small></h1>
+<p>Generated from london_venues.db on $generated.</p>
+$days
+</body>
+</html>
+""")
+
+SCHEDULE_DAY = Template("""
+<!-- ============ $date ============ -->
+<h2><span class="date">$label</span></h2>
+<div class="day-card">
+  <table>
+    <tr><th>Time</th><th>Activity</th><th>Notes</th></tr>
+$rows
+  </table>
+</div>
+""")
+
+SCHEDULE_ROW = Template("""    <tr$row_class><td>$time</td><td><strong>$title</strong>$badge</td><td>$notes</td></tr>""")
+
+SCHEDULE_TEMPLATE_VERSION = hashlib.sha1(
+    (SCHEDULE_PAGE.template + SCHEDULE_DAY.template + SCHEDULE_ROW.template).encode("utf-8")
+).hexdigest()
+
+SCHEDULE_PATH = SCRIPT_DIR / "schedule_generated.html"
+
+
+def schedule_rows(conn: sqlite3.Connection):
+    """All dated reservations and events with their venue's booking info,
+    in one query ordered by date and start time."""
+    return conn.execute("""
+        SELECT 'reservation' AS kind, r.date, r.time, r.end_time,
+               r.venue_name AS title, COALESCE(r.matched_venue, r.venue_name) AS venue,
+               r.confirmation, r.party_size, r.notes, NULL AS price, NULL AS url,
+               v.booking_required, v.ticket_price, r.start_min
+        FROM reservations r
+        LEFT JOIN venues v ON v.name = COALESCE(r.matched_venue, r.venue_name)
+        UNION ALL
+        SELECT 'event', e.date, e.time, NULL,
+               e.title, e.venue_name,
+               NULL, NULL, e.notes, e.price, e.url,
+               v.booking_required, v.ticket_price, e.start_min
+        FROM events e
+        LEFT JOIN venues v ON v.name = e.venue_name
+        WHERE e.date IS NOT NULL AND e.date != ''
+        ORDER BY 2, 14
+    """)
+
+
+def day_label(date: str) -> str:
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").strftime("%b %d (%a)").replace(" 0", " ")
+    except ValueError:
+        return date
+
+
+def _render_schedule_row(row: sqlite3.Row) -> str:
+    esc = html.escape
+    if row["kind"] == "reservation":
+        time = esc(row["time"] or "")
+        if row["end_time"]:
+            time += f"–{esc(row['end_time'])}"
+        notes = []
+        if row["confirmation"]:
+            notes.append(f"Conf: <span class=\"conf-code\">{esc(row['confirmation'])}</span>")
+        if row["party_size"]:
+            notes.append(f"Party of {row['party_size']}")
+        if row["notes"]:
+            notes.append(esc(row["notes"]))
+        return SCHEDULE_ROW.substitute(
+            row_class=' class="confirmed"', time=time, title=esc(row["title"]),
+            badge=' <span class="conf-badge">CONFIRMED</span>', notes=" · ".join(notes))
+
+    title = esc(row["title"])
+    if row["venue"]:
+        title += f" @ {esc(row['venue'])}"
+    notes = []
+    price = row["price"] or row["ticket_price"]
+    if price:
+        notes.append(esc(price))
+    if row["booking_required"] in ("yes", "recommended"):
+        notes.append(f"<span class=\"tag\">booking {esc(row['booking_required'])}</span>")
+    if row["notes"]:
+        notes.append(esc(row["notes"]))
+    if row["url"]:
+        notes.append(f"<a href=\"{esc(row['url'])}\">link</a>")
+    return SCHEDULE_ROW.substitute(row_class="", time=esc(row["time"] or ""), title=title,
+                                   badge="", notes=" · ".join(notes))
+
+
+def render_schedule(conn: sqlite3.Connection, out_path: Path) -> int:
+    """Write the day-by-day schedule page; return how many days were re-rendered.
+
+    Each day's fragment is cached in schedule_days with a hash of its rows, so
+    only days whose reservations/events/venue booking info changed since the
+    last run are rendered again.
+    """
+    cached = {row["date"]: (row["hash"], row["html"])
+              for row in conn.execute("SELECT date, hash, html FROM schedule_days")}
+    now = datetime.utcnow().isoformat()
+    fragments = []
+    rendered = 0
+
+    for date, rows in itertools.groupby(schedule_rows(conn), key=lambda r: r["date"]):
+        rows = list(rows)
+        digest = hashlib.sha1(repr((SCHEDULE_TEMPLATE_VERSION, [tuple(r) for r in rows]))
+                              .encode("utf-8")).hexdigest()
+        if date in cached and cached[date][0] == digest:
+            fragment = cached.pop(date)[1]
+        else:
+            cached.pop(date, None)
+            fragment = SCHEDULE_DAY.substitute(
+                date=html.escape(date), label=html.escape(day_label(date)),
+                rows="\n".join(_render_schedule_row(r) for r in rows))
+            conn.execute("""
+                INSERT INTO schedule_days (date, hash, html, rendered_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(date) DO UPDATE SET hash = excluded.hash, html = excluded.html,
+                                                rendered_at = excluded.rendered_at
+            """, (date, digest, fragment, now))
+            rendered += 1
+        fragments.append(fragment)
+
+    # Whatever is left in the cache belongs to days that no longer have rows
+    conn.executemany("DELETE FROM schedule_days WHERE date = ?", [(d,) for d in cached])
+    conn.commit()
+
+    page = SCHEDULE_PAGE.substitute(generated=html.escape(now[:16].replace("T", " ")) + " UTC",
+                                    days="".join(fragments))
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    tmp.write_text(page, encoding="utf-8")
+    tmp.replace(out_path)
+    return rendered
+
+
+# ---------------------------------------------------------------------------
+# Day timeline
+# ---------------------------------------------------------------------------
+
+# Reservations and events overlapping the day ride the start_min/end_min
+# indexes; venues are kept when their Places hours have an opening on that
+# weekday (Places numbers days from Sunday = 0, weekdayDescriptions from Monday).
+DAY_TIMELINE_SQL = """
+    SELECT 'reservation' AS kind, r.id, r.start_min, r.end_min, r.venue_name AS title,
+           COALESCE(r.matched_venue, r.venue_name) AS venue, r.time, r.end_time,
+           r.confirmation AS detail, 0 AS rank
+    FROM reservations r
+    WHERE r.end_min > :start AND r.start_min < :end
+    UNION ALL
+    SELECT 'event', e.id, e.start_min, e.end_min, e.title, e.venue_name, e.time, NULL, e.price, 0
+    FROM events e
+    WHERE e.end_min > :start AND e.start_min < :end
+    UNION ALL
+    SELECT 'venue', v.id, NULL, NULL, v.name, v.name,
+           json_extract(v.regular_hours_json, '$.weekdayDescriptions[' || :monday_index || ']'),
+           NULL, v.booking_required, 1
+    FROM venues v
+    WHERE v.regular_hours_json IS NOT NULL
+      AND EXISTS (SELECT 1 FROM json_each(v.regular_hours_json, '$.periods') p
+                  WHERE json_extract(p.value, '$.open.day') = :places_day
+                     OR json_extract(p.value, '$.close') IS NULL)
+    ORDER BY rank, start_min, title
+"""
+
+
+def day_timeline(conn: sqlite3.Connection, date: str) -> list:
+    """Reservations, events and open venues for one YYYY-MM-DD date, as dicts.
+
+    Each row gets a ``when`` label: the booked/listed time, "all day" for
+    entries covering the whole day, or the venue's hours for that weekday.
+    """
+    day = datetime.strptime(date, "%Y-%m-%d")
+    start = to_epoch_minutes(day)
+    end = start + 24 * 60
+    rows = conn.execute(DAY_TIMELINE_SQL, {
+        "start": start, "end": end,
+        "monday_index": day.weekday(), "places_day": (day.weekday() + 1) % 7,
+    }).fetchall()
+
+    timeline = []
+    for row in rows:
+        item = dict(row)
+        if row["kind"] == "venue":
+            item["when"] = (row["time"] or "").split(": ", 1)[-1]
+        elif row["start_min"] <= start and row["end_min"] >= end:
+            item["when"] = "all day"
+        else:
+            item["when"] = row["time"] + (f" - {row['end_time']}" if row["end_time"] else "")
+        timeline.append(item)
+    return timeline
+
+
+class DayTimelineCache:
+    """Per-date day_timeline() results for one long-lived connection.
+
+    The stamp pairs PRAGMA data_version (bumped by other connections'
+    commits) with total_changes (this connection's own writes); when either
+    moves, every cached day is dropped.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.stamp = None
+        self.days = {}
+
+    def get(self, date: str) -> list:
+        stamp = (self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes)
+        if stamp != self.stamp:
+            self.stamp = stamp
+            self.days.clear()
+        if date not in self.days:
+            self.days[date] = day_timeline(self.conn, date)
+        return self.days[date]
+
+
+_timeline_cache = None
+
+
+def cached_day_timeline(conn: sqlite3.Connection, date: str) -> list:
+    """day_timeline() through a cache tied to ``conn`` (kept warm by --serve-socket)."""
+    global _timeline_cache
+    if _timeline_cache is None or _timeline_cache.conn is not conn:
+        _timeline_cache = DayTimelineCache(conn)
+    return _timeline_cache.get(date)
+
+
+def print_day(conn: sqlite3.Connection, date: str):
+    """Print the combined timeline for one day."""
+    timeline = cached_day_timeline(conn, date)
+    print(f"\n=== {datetime.strptime(date, '%Y-%m-%d').strftime('%a %b %d, %Y')} ===\n")
+    scheduled = [item for item in timeline if item["kind"] != "venue"]
+    if not scheduled:
+        print("  Nothing scheduled.")
+    for item in scheduled:
+        line = f"  {item['when']:<16} {item['title']}"
+        if item["kind"] == "event" and item["venue"]:
+            line += f" @ {item['venue']}"
+        print(line)
+        if item["kind"] == "reservation":
+            print("    Reservation" + (f", confirmation {item['detail']}" if item["detail"] else ""))
+        elif item["detail"]:
+            print(f"    {item['detail']}")
+
+    open_venues = [item for item in timeline if item["kind"] == "venue"]
+    if open_venues:
+        print(f"\n--- Open ({len(open_venues)}) ---")
+        for item in open_venues:
+            print(f"  {item['title']}: {item['when']}")
+
+
+# ---------------------------------------------------------------------------
+# Distances
+# ---------------------------------------------------------------------------
+
+EARTH_RADIUS_M = 6371008.8
+# Walking estimates: streets add roughly 30% over the straight line.
+WALK_DETOUR = 1.3
+WALK_SPEED_M_PER_MIN = 80  # 4.8 km/h
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres; arguments in degrees, broadcast as NumPy arrays."""
+    lat1, lng1, lat2, lng2 = (np.radians(x) for x in (lat1, lng1, lat2, lng2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def walk_minutes(metres: float) -> int:
+    return round(metres * WALK_DETOUR / WALK_SPEED_M_PER_MIN)
+
+
+class DistanceMatrix:
+    """Pairwise venue distances (float32 metres) with the ids and coordinates
+    they were computed from, saved as one .npz file."""
+
+    def __init__(self, ids, coords, metres):
+        self.ids = ids
+        self.coords = coords
+        self.metres = metres
+        self.index = {int(venue_id): i for i, venue_id in enumerate(ids)}
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["DistanceMatrix"]:
+        try:
+            with np.load(path) as data:
+                return cls(data["ids"], data["coords"], data["metres"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, ids=self.ids, coords=self.coords, metres=self.metres)
+        tmp.replace(path)
+
+    def between(self, a: int, b: int) -> float:
+        return float(self.metres[self.index[a], self.index[b]])
+
+    def nearest(self, venue_id: int, k: int) -> list:
+        """The k closest other venues as (id, metres) pairs."""
+        row = self.metres[self.index[venue_id]]
+        order = np.argsort(row, kind="stable")
+        return [(int(self.ids[i]), float(row[i])) for i in order if self.ids[i] != venue_id][:k]
+
+
+def distance_matrix(conn: sqlite3.Connection, path: Path = DISTANCE_PATH) -> DistanceMatrix:
+    """Load the saved matrix and bring it up to date with the venues table.
+
+    Only venues that are new or whose coordinates changed get their row and
+    column recomputed; everything else is copied from the saved file. The
+    file is rewritten only when something changed.
+    """
+    rows = conn.execute("""
+        SELECT id, latitude, longitude FROM venues
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL ORDER BY id
+    """).fetchall()
+    ids = np.array([r["id"] for r in rows], dtype=np.int64)
+    coords = np.array([(r["latitude"], r["longitude"]) for r in rows], dtype=np.float64).reshape(-1, 2)
+    metres = np.zeros((len(ids), len(ids)), dtype=np.float32)
+
+    old = DistanceMatrix.load(path) if path.exists() else None
+    stale = np.ones(len(ids), dtype=bool)
+    if old is not None and len(old.ids):
+        new_pos, old_pos = [], []
+        for i, venue_id in enumerate(ids):
+            j = old.index.get(int(venue_id))
+            if j is not None and np.array_equal(old.coords[j], coords[i]):
+                new_pos.append(i)
+                old_pos.append(j)
+        stale[new_pos] = False
+        metres[np.ix_(new_pos, new_pos)] = old.metres[np.ix_(old_pos, old_pos)]
+
+    changed = np.flatnonzero(stale)
+    if len(changed):
+        block = haversine_m(coords[changed, 0:1], coords[changed, 1:2], coords[:, 0], coords[:, 1])
+        metres[changed, :] = block
+        metres[:, changed] = block.T
+
+    matrix = DistanceMatrix(ids, coords, metres)
+    if len(changed) or old is None or len(old.ids) != len(ids):
+        matrix.save(path)
+    return matrix
+
+
+def _venue_with_location(conn: sqlite3.Connection, name: str) -> sqlite3.Row:
+    db_name = fuzzy_match_venue(conn, name)
+    row = conn.execute("SELECT id, name, latitude FROM venues WHERE name = ?", (db_name,)).fetchone() if db_name else None
+    if row is None:
+        print(f"Error: Venue '{name}' not found in database.")
+        sys.exit(1)
+    if row["latitude"] is None:
+        print(f"Error: No location stored for '{row['name']}' (try --refetch \"{row['name']}\").")
+        sys.exit(1)
+    return row
+
+
+def _require_numpy(flag: str):
+    if np is None:
+        print(f"Error: {flag} needs NumPy (pip install numpy).")
+        sys.exit(1)
+
+
+def print_distance(conn: sqlite3.Connection, a: str, b: str):
+    _require_numpy("--distance")
+    va, vb = _venue_with_location(conn, a), _venue_with_location(conn, b)
+    metres = distance_matrix(conn).between(va["id"], vb["id"])
+    print(f"{va['name']} → {vb['name']}: {metres / 1000:.2f} km, ~{walk_minutes(metres)} min walk")
+
+
+def print_nearest(conn: sqlite3.Connection, name: str, k: int):
+    _require_numpy("--nearest-to")
+    venue = _venue_with_location(conn, name)
+    matrix = distance_matrix(conn)
+    names = dict(conn.execute("SELECT id, name FROM venues").fetchall())
+    print(f"Nearest to {venue['name']}:")
+    for venue_id, metres in matrix.nearest(venue["id"], k):
+        print(f"  {metres / 1000:6.2f} km  ~{walk_minutes(metres):>3} min  {names[venue_id]}")
+
+
+# ---------------------------------------------------------------------------
+# Day planner
+# ---------------------------------------------------------------------------
+
+# Free stops are fitted between PLAN_DAY_START and PLAN_DAY_END (minutes after
+# midnight) and each visit takes PLAN_VISIT_MINUTES. A free stop may never make
+# a reservation or event late; when two anchors are too close to walk between,
+# the lateness costs PLAN_LATE_PENALTY per minute.
+PLAN_DAY_START = 9 * 60
+PLAN_DAY_END = 23 * 60
+PLAN_VISIT_MINUTES = 90
+PLAN_LATE_PENALTY = 1000
+
+
+def opening_windows(hours: Optional[dict], day: datetime) -> Optional[list]:
+    """(open, close) minutes after midnight for ``day`` from Places regularOpeningHours.
+
+    None means the hours are unknown; [] means closed that day. Periods that
+    run past midnight close after 24:00, and last night's late opening counts
+    from 00:00.
+    """
+    if not hours or not hours.get("periods"):
+        return None
+    today = (day.weekday() + 1) % 7
+    windows = []
+    for period in hours["periods"]:
+        opens, closes = period.get("open") or {}, period.get("close")
+        if closes is None:  # open 24 hours
+            return [(0, 24 * 60)]
+        start = opens.get("hour", 0) * 60 + opens.get("minute", 0)
+        end = closes.get("hour", 0) * 60 + closes.get("minute", 0)
+        if opens.get("day") == today:
+            windows.append((start, end if closes.get("day") == today else end + 24 * 60))
+        elif closes.get("day") == today and opens.get("day") == (today + 6) % 7:
+            windows.append((0, end))
+    return sorted(windows)
+
+
+class DayPlanner:
+    """Order a day's free stops around its fixed anchors to minimize walking.
+
+    Nodes are indexes into ``travel``, a square list of walking minutes.
+    ``anchors`` maps node -> (start, end) and those times never move;
+    ``windows`` maps each free stop to its opening windows. Stops are added by
+    nearest insertion (the stop closest to the route so far goes wherever it
+    adds the least walking) and the result is tidied with 2-opt, reversing
+    runs of free stops between anchors. Every candidate route is checked
+    against the opening windows, so a stop that never fits is left out.
+    """
+
+    def __init__(self, travel: list, anchors: dict, windows: dict, visit: int = PLAN_VISIT_MINUTES,
+                 day_start: int = PLAN_DAY_START, day_end: int = PLAN_DAY_END):
+        self.travel = travel
+        self.anchors = anchors
+        self.windows = windows
+        self.visit = visit
+        self.day_start = day_start
+        self.day_end = day_end
+
+    def schedule(self, route: list) -> Optional[tuple]:
+        """(cost, [(start, end), ...]) for visiting ``route`` in order.
+
+        Returns None when a free stop can't be fitted into an opening window
+        before the day ends, or would make the next anchor late. The cost is
+        minutes walked plus the late penalty.
+        """
+        travel, anchors, visit = self.travel, self.anchors, self.visit
+        cost, clock, prev, times = 0.0, None, None, []
+        for node in route:
+            arrive = self.day_start if clock is None else clock + travel[prev][node]
+            if prev is not None:
+                cost += travel[prev][node]
+            fixed = anchors.get(node)
+            if fixed is not None:
+                start, end = fixed
+                if clock is not None and arrive > start:
+                    if prev not in anchors:
+                        return None
+                    cost += PLAN_LATE_PENALTY * (arrive - start)
+                    start = arrive
+                clock = max(start, end)
+            else:
+                for open_, close in self.windows[node]:
+                    start = max(arrive, open_)
+                    if start + visit <= min(close, self.day_end):
+                        break
+                else:
+                    return None
+                clock = start + visit
+            times.append((start, clock))
+            prev = node
+        return cost, times
+
+    def _insert(self, route: list, stop: int) -> Optional[list]:
+        best_cost, best = None, None
+        for i in range(len(route) + 1):
+            candidate = route[:i] + [stop] + route[i:]
+            result = self.schedule(candidate)
+            if result is not None and (best_cost is None or result[0] < best_cost):
+                best_cost, best = result[0], candidate
+        return best
+
+    def _two_opt(self, route: list) -> list:
+        best = self.schedule(route)[0]
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(route) - 1):
+                if route[i] in self.anchors:
+                    continue
+                for j in range(i + 1, len(route)):
+                    if route[j] in self.anchors:
+                        break
+                    candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                    result = self.schedule(candidate)
+                    if result is not None and result[0] < best - 1e-9:
+                        route, best, improved = candidate, result[0], True
+        return route
+
+    def plan(self) -> tuple:
+        """Return (route, times, unplaced): the visiting order, (start, end) per
+        route entry, and the free stops that didn't fit anywhere."""
+        travel = self.travel
+        route = sorted(self.anchors, key=self.anchors.get)
+        pending = set(self.windows)
+        unplaced = []
+        while pending:
+            # Closest to the route first; ties (or an empty route) go to the
+            # stop that closes soonest.
+            stop = min(pending, key=lambda s: (
+                min((travel[s][n] for n in route), default=0),
+                min((close for _, close in self.windows[s]), default=0), s))
+            pending.discard(stop)
+            placed = self._insert(route, stop)
+            if placed is None:
+                unplaced.append(stop)
+            else:
+                route = placed
+        route = self._two_opt(route)
+        return route, self.schedule(route)[1], unplaced
+
+
+def walk_minutes_matrix(coords) -> list:
+    """Walking minutes between every pair of (lat, lng) points as nested lists.
+
+    Points without coordinates (NaN) are treated as zero minutes from anywhere.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    metres = haversine_m(coords[:, 0:1], coords[:, 1:2], coords[:, 0], coords[:, 1])
+    return np.nan_to_num(metres * WALK_DETOUR / WALK_SPEED_M_PER_MIN).tolist()
+
+
+def plan_day(conn: sqlite3.Connection, date: str, names: list) -> dict:
+    """Plan ``date`` around its reservations and timed events, visiting ``names``.
+
+    Anchors come from day_timeline() (entries covering the whole day are
+    skipped); stops are matched with fuzzy_match_venue() and limited to their
+    Places opening hours, or the whole day when those are unknown. Venues
+    still waiting for details get them fetched first (ensure_details).
+    """
+    day = datetime.strptime(date, "%Y-%m-%d")
+    midnight = to_epoch_minutes(day)
+    timeline = [item for item in day_timeline(conn, date) if item["kind"] != "venue"
+                and not (item["start_min"] <= midnight and item["end_min"] >= midnight + 24 * 60)]
+    matched = [(name, fuzzy_match_venue(conn, name)) for name in names]
+    ensure_details(conn, [db_name for _, db_name in matched if db_name] + [item["venue"] for item in timeline])
+    venues = {row["name"]: row for row in conn.execute(
+        "SELECT name, latitude, longitude, regular_hours_json FROM venues")}
+
+    nodes, coords = [], []
+
+    def add_node(label: str, kind: str, venue: Optional[str]) -> int:
+        row = venues.get(venue) if venue else None
+        if row is None and venue:
+            row = venues.get(fuzzy_match_venue(conn, venue))
+        nodes.append({"label": label, "kind": kind, "venue": row["name"] if row else venue,
+                      "located": bool(row and row["latitude"] is not None)})
+        coords.append((row["latitude"], row["longitude"]) if nodes[-1]["located"] else (np.nan, np.nan))
+        return len(nodes) - 1
+
+    anchors = {}
+    for item in timeline:
+        node = add_node(item["title"], item["kind"], item["venue"])
+        anchors[node] = (item["start_min"] - midnight, item["end_min"] - midnight)
+
+    windows, closed, missing = {}, [], []
+    anchored = {nodes[n]["venue"] for n in anchors}
+    for name, db_name in matched:
+        if db_name is None:
+            missing.append(name)
+            continue
+        if db_name in anchored or any(nodes[n]["venue"] == db_name for n in windows):
+            continue
+        hours = venues[db_name]["regular_hours_json"]
+        open_ = opening_windows(json.loads(hours) if hours else None, day)
+        node = add_node(db_name, "venue", db_name)
+        if open_ is None:
+            windows[node] = [(0, 24 * 60)]
+        elif open_:
+            windows[node] = open_
+        else:
+            closed.append(db_name)
+
+    planner = DayPlanner(walk_minutes_matrix(coords), anchors, windows)
+    route, times, unplaced = planner.plan()
+    return {
+        "stops": [dict(nodes[node], start=start, end=end,
+                       walk=planner.travel[prev][node] if prev is not None else 0,
+                       late=node in anchors and start > anchors[node][0])
+                  for prev, node, (start, end) in zip([None] + route, route, times)],
+        "unplaced": [nodes[node]["label"] for node in unplaced],
+        "closed": closed,
+        "missing": missing,
+    }
+
+
+def _clock(minutes: int) -> str:
+    minutes = int(minutes)
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}" + ("+1" if minutes >= 24 * 60 else "")
+
+
+def print_plan(conn: sqlite3.Connection, date: str, names: list):
+    """Print an itinerary for one day (see plan_day)."""
+    _require_numpy("--plan-day")
+    plan = plan_day(conn, date, names)
+    print(f"\n=== Plan for {datetime.strptime(date, '%Y-%m-%d').strftime('%a %b %d, %Y')} ===\n")
+    if not plan["stops"]:
+        print("  Nothing to plan.")
+    walked = 0
+    for stop in plan["stops"]:
+        if stop["walk"] >= 0.5:
+            walked += stop["walk"]
+            print(f"  {'':<13}  ~{round(stop['walk'])} min walk")
+        line = f"  {_clock(stop['start'])}-{_clock(stop['end'])}  {stop['label']}"
+        if stop["kind"] != "venue":
+            line += f"  [{stop['kind']}" + (f" @ {stop['venue']}" if stop["kind"] == "event" and stop["venue"] else "") + "]"
+        if stop["late"]:
+            line += "  (arrives late)"
+        print(line)
+    print(f"\nWalking: ~{round(walked)} min")
+
+    unlocated = sorted({s["venue"] or s["label"] for s in plan["stops"] if not s["located"]})
+    if unlocated:
+        print(f"No location for {', '.join(unlocated)}; walks to/from them count as 0 min.")
+    for label, names_ in (("Not found", plan["missing"]), ("Closed that day", plan["closed"]),
+                          ("Didn't fit", plan["unplaced"])):
+        if names_:
+            print(f"{label}: {', '.join(names_)}")
+
+
+# ---------------------------------------------------------------------------
+# Change log
+# ---------------------------------------------------------------------------
+
+# Tables whose inserts/updates/deletes are recorded in `changes` by triggers.
+CHANGE_TABLES = ("venues", "events", "reservations")
+
+
+def changes_since(conn: sqlite3.Connection, seq: int):
+    """Yield (seq, table, op, row_id, row) for each row changed after ``seq``.
+
+    A row changed several times appears once, at its latest change, in seq
+    order; ``row`` is its current state, or None if it has been deleted.
+    Keep the largest seq seen and pass it back next time.
+    """
+    # SQLite takes bare columns (op) from the row that supplied MAX(seq)
+    latest = conn.execute("""
+        SELECT MAX(seq) AS seq, tbl, row_id, op FROM changes
+        WHERE seq > ? GROUP BY tbl, row_id ORDER BY seq
+    """, (seq,)).fetchall()
+    for change in latest:
+        row = conn.execute(f"SELECT * FROM {change['tbl']} WHERE id = ?", (change["row_id"],)).fetchone()
+        yield change["seq"], change["tbl"], change["op"], change["row_id"], row
+
+
+def print_changes(conn: sqlite3.Connection, seq: int, out=None):
+    """Write changes after ``seq`` as NDJSON, one object per changed row."""
+    out = out or sys.stdout
+    for change_seq, table, op, row_id, row in changes_since(conn, seq):
+        data = None
+        if row is not None:
+            data = dict(row)
+            data.pop("raw_response", None)  # large; fetch the venue itself if needed
+        out.write(json.dumps({"seq": change_seq, "table": table, "op": op,
+                              "id": row_id, "row": data},
+                             ensure_ascii=False) + "\n")
+
+
+def compact_changes(conn: sqlite3.Connection, upto: int = 0) -> int:
+    """Shrink the change log; returns the number of entries removed.
+
+    Entries superseded by a later change to the same row are always dropped,
+    which never changes what changes_since() returns. With ``upto``, every
+    entry at or below that seq goes too: only do that once all consumers
+    have read past it.
+    """
+    before = conn.total_changes
+    with conn:
+        conn.execute("""
+            DELETE FROM changes WHERE seq NOT IN (SELECT MAX(seq) FROM changes GROUP BY tbl, row_id)
+        """)
+        if upto:
+            conn.execute("DELETE FROM changes WHERE seq <= ?", (upto,))
+    return conn.total_changes - before
+
+
+# ---------------------------------------------------------------------------
+# Socket daemon
+# ---------------------------------------------------------------------------
+
+def serve_socket(socket_path: Path, db_path: Path):
+    """Run commands sent over a Unix domain socket against warm connections.
+
+    Protocol: one JSON object per line, {"argv": [...], "cwd": "..."}, answered
+    with {"stdout": ..., "stderr": ..., "exit": N}. {"shutdown": true} stops the
+    daemon. Requests are handled one at a time, so writes never contend.
+    """
+    # Forwarded commands chdir to the client's cwd, so pin the daemon's
+    # database to an absolute path before it becomes their default
+    db_path = db_path.resolve()
+    parser = build_parser()
+    # Forwarded commands without --db target the daemon's database
+    parser.set_defaults(db=str(db_path))
+    conns = {}
+
+    def conn_for(path: Path) -> sqlite3.Connection:
+        key = str(path.resolve())
+        if key not in conns:
+            conns[key] = init_db(Path(key))
+        return conns[key]
+
+    conn_for(db_path)
+    if socket_path.exists():
+        socket_path.unlink()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(socket_path))
+    server.listen()
+    print(f"Serving {db_path} on {socket_path} (Ctrl+C to stop)")
+
+    try:
+        running = True
+        while running:
+            client, _ = server.accept()
+            with client, client.makefile("rwb") as stream:
+                try:
+                    for line in stream:
+                        request = json.loads(line)
+                        if not isinstance(request, dict):
+                            response = {"stdout": "", "stderr": "Error: request must be a JSON object.\n", "exit": 1}
+                        elif request.get("shutdown"):
+                            response = {"stdout": "Daemon stopped.\n", "stderr": "", "exit": 0}
+                            running = False
+                        else:
+                            response = _handle_socket_request(parser, conn_for, request)
+                        stream.write(json.dumps(response).encode("utf-8") + b"\n")
+                        stream.flush()
+                        if not running:
+                            break
+                except (BrokenPipeError, ConnectionResetError, json.JSONDecodeError):
+                    continue
+                except Exception:
+                    # One misbehaving client must not take the daemon down
+                    traceback.print_exc()
+                    continue
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.close()
+        if socket_path.exists():
+            socket_path.unlink()
+        for conn in conns.values():
+            conn.close()
+
+
+def _handle_socket_request(parser: argparse.ArgumentParser, conn_for, request: dict) -> dict:
+    """Execute one forwarded argv, capturing its output and exit status."""
+    out, err = io.StringIO(), io.StringIO()
+    exit_code = 0
+    conn = None
+    cwd = os.getcwd()
+    try:
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                os.chdir(request.get("cwd") or cwd)
+            except (OSError, TypeError) as e:
+                print(f"Error: cannot change to {request.get('cwd')!r}: {e}", file=sys.stderr)
+                return {"stdout": "", "stderr": err.getvalue(), "exit": 1}
+            try:
+                args = parser.parse_args(request.get("argv", []))
+                if args.serve_socket:
+                    print("Error: --serve-socket cannot be forwarded to a running daemon.", file=sys.stderr)
+                    exit_code = 1
+                else:
+                    conn = conn_for(Path(args.db))
+                    run_command(args, conn)
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    exit_code = e.code
+                elif e.code is not None:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    finally:
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
+        os.chdir(cwd)
+    return {"stdout": out.getvalue(), "stderr": err.getvalue(), "exit": exit_code}
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
-def main():
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="London venue research tool")
 
     # Basic commands
     parser.add_argument("--refetch", metavar="NAME", help="Re-fetch a specific venue by name")
     parser.add_argument("--dump", action="store_true", help="Dump all cached data as JSON")
     parser.add_argument("--parse-only", action="store_true", help="Show parsed venues without fetching")
+    parser.add_argument("--merge-places", action="store_true",
+                        help="Merge venues that share a Google place ID (also runs after every fetch)")
     parser.add_argument("--report", action="store_true", help="Full research report (hours + booking + events)")
     parser.add_argument("--events", action="store_true", help="List all events by date")
+    parser.add_argument("--format", choices=list(RENDERERS), default="text",
+                        help="Output format for the summary, --report, --events and --reservations")
+    parser.add_argument("--day", metavar="DATE",
+                        help="Timeline for one day (YYYY-MM-DD): reservations, events and venues open")
+    parser.add_argument("--from", dest="date_from", metavar="DATE",
+                        help="Only list events/reservations running on or after DATE (YYYY-MM-DD or ISO datetime)")
+    parser.add_argument("--to", dest="date_to", metavar="DATE",
+                        help="Only list events/reservations starting on or before DATE (YYYY-MM-DD or ISO datetime)")
+    parser.add_argument("--render-schedule", nargs="?", const=str(SCHEDULE_PATH), metavar="HTML",
+                        help="Build the day-by-day schedule page from the DB (re-renders changed days only)")
 
     # Booking commands
     parser.add_argument("--set-booking", metavar="VENUE", help="Set booking info for a venue")
@@ -909,24 +3657,72 @@ def main():
     parser.add_argument("--url", help="Event URL (used with --add-event)")
     parser.add_argument("--category", help="Event category (used with --add-event)")
     parser.add_argument("--notes", help="Event/reservation notes (used with --add-event or --add-reservation)")
-    parser.add_argument("--source", help="Where this info came from (used with --add-event)")
+    parser.add_argument("--source", help="Where this info came from (used with --add-event, --import-events or --ingest-listings)")
+    parser.add_argument("--import-events", metavar="FILE", help="Bulk import events from a CSV, NDJSON or .ics file")
+    parser.add_argument("--ingest-listings", metavar="DIR",
+                        help="Parse saved event-listing HTML pages under DIR and upsert their events "
+                             "(--source picks the parser; default: by subdirectory or page URL)")
+    parser.add_argument("--jobs", type=int, help="Worker processes for --ingest-listings (default: CPU count)")
 
     # Reservation commands
     parser.add_argument("--reservations", action="store_true", help="List all reservations")
     parser.add_argument("--import-reservations", metavar="CSV", help="Import reservations from CSV file")
     parser.add_argument("--add-reservation", metavar="VENUE", help="Add a reservation for a venue")
+    parser.add_argument("--export-ics", metavar="PATH", help="Export reservations and dated events as .ics ('-' for stdout)")
+    parser.add_argument("--since", metavar="TIMESTAMP",
+                        help="Only export rows created/changed after this ISO timestamp (used with --export-ics)")
     parser.add_argument("--end-time", help="Reservation end time (used with --add-reservation)")
     parser.add_argument("--confirmation", help="Confirmation number (used with --add-reservation)")
     parser.add_argument("--party-size", type=int, help="Party size (used with --add-reservation)")
 
+    # Change log
+    parser.add_argument("--changes-since", type=int, metavar="SEQ",
+                        help="Print rows changed after change SEQ as NDJSON (0 for everything)")
+    parser.add_argument("--compact-changes", type=int, nargs="?", const=0, metavar="SEQ",
+                        help="Drop superseded change log entries (and all entries up to SEQ, if given)")
+
+    # Distances (need NumPy)
+    parser.add_argument("--distance", nargs=2, metavar=("A", "B"), help="Distance and walking time between two venues")
+    parser.add_argument("--nearest-to", metavar="VENUE", help="List the venues closest to VENUE")
+    parser.add_argument("-k", type=int, default=5, help="How many venues --nearest-to lists (default 5)")
+    parser.add_argument("--plan-day", metavar="DATE",
+                        help="Order --venues around DATE's reservations and events to minimize walking")
+    parser.add_argument("--venues", nargs="+", default=[], metavar="NAME",
+                        help="Venues to fit into the day (used with --plan-day)")
+
+    # API budget
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Show how many Places calls a sync/--refetch would make and their cost")
+    parser.add_argument("--ids-only", action="store_true",
+                        help="Sync only place IDs and names; details are fetched when a venue is first used")
+    parser.add_argument("--max-calls", type=int, metavar="N",
+                        help="Stop after N Places API calls (sync and --refetch)")
+    parser.add_argument("--api-usage", action="store_true", help="Summarize the Places API call ledger by day")
+
     # Paths
     parser.add_argument("--md", default=str(MD_PATH), help="Path to London.md")
     parser.add_argument("--db", default=str(DB_PATH), help="Path to SQLite database")
-    args = parser.parse_args()
 
-    db_path = Path(args.db)
+    # Daemon
+    parser.add_argument("--serve-socket", nargs="?", const=str(SOCKET_PATH), metavar="PATH",
+                        help="Serve commands over a Unix domain socket (see venues_client.py)")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    if args.serve_socket:
+        serve_socket(Path(args.serve_socket), Path(args.db))
+        return
+
+    conn = init_db(Path(args.db))
+    run_command(args, conn)
+
+
+def run_command(args: argparse.Namespace, conn: sqlite3.Connection):
+    """Dispatch one parsed command line against an open connection."""
     md_path = Path(args.md)
-    conn = init_db(db_path)
 
     # Handle --dump
     if args.dump:
@@ -935,12 +3731,56 @@ def main():
 
     # Handle --report
     if args.report:
-        print_report(conn)
+        print_report(conn, args.format)
         return
 
+    # --from/--to narrow --events and --reservations
+    for flag, value in (("--from", args.date_from), ("--to", args.date_to)):
+        try:
+            parse_bound(value)
+        except ValueError:
+            print(f"Error: {flag} must be a date (YYYY-MM-DD) or ISO datetime, got '{value}'")
+            sys.exit(1)
+
     # Handle --events
     if args.events:
-        print_events(conn)
+        print_events(conn, args.date_from, args.date_to, args.format)
+        return
+
+    # Handle --day
+    if args.day:
+        try:
+            datetime.strptime(args.day, "%Y-%m-%d")
+        except ValueError:
+            print(f"Error: --day must be a date (YYYY-MM-DD), got '{args.day}'")
+            sys.exit(1)
+        print_day(conn, args.day)
+        return
+
+    # Handle --plan-day
+    if args.plan_day:
+        try:
+            datetime.strptime(args.plan_day, "%Y-%m-%d")
+        except ValueError:
+            print(f"Error: --plan-day must be a date (YYYY-MM-DD), got '{args.plan_day}'")
+            sys.exit(1)
+        print_plan(conn, args.plan_day, args.venues)
+        return
+
+    # Handle --changes-since / --compact-changes
+    if args.changes_since is not None:
+        print_changes(conn, args.changes_since)
+        return
+    if args.compact_changes is not None:
+        removed = compact_changes(conn, args.compact_changes)
+        print(f"Removed {removed} change log entr{'y' if removed == 1 else 'ies'}.")
+        return
+
+    # Handle --render-schedule
+    if args.render_schedule:
+        out_path = Path(args.render_schedule)
+        rendered = render_schedule(conn, out_path)
+        print(f"Wrote {out_path} ({rendered} day(s) re-rendered).")
         return
 
     # Handle --set-booking
@@ -958,9 +3798,19 @@ def main():
                   args.price, args.url, args.category, args.notes, args.source)
         return
 
+    # Handle --import-events
+    if args.import_events:
+        import_events(conn, Path(args.import_events), args.source)
+        return
+
+    # Handle --ingest-listings
+    if args.ingest_listings:
+        ingest_listings(conn, Path(args.ingest_listings), args.source, args.jobs)
+        return
+
     # Handle --reservations
     if args.reservations:
-        print_reservations(conn)
+        print_reservations(conn, args.date_from, args.date_to, args.format)
         return
 
     # Handle --import-reservations
@@ -968,6 +3818,24 @@ def main():
         import_reservations_csv(conn, Path(args.import_reservations))
         return
 
+    # Handle --export-ics
+    if args.export_ics:
+        try:
+            since = datetime.fromisoformat(args.since).isoformat() if args.since else None
+        except ValueError:
+            print(f"Error: --since must be an ISO timestamp, got '{args.since}'")
+            sys.exit(1)
+        if args.export_ics == "-":
+            export_ics(conn, sys.stdout, since)
+            return
+        out_path = Path(args.export_ics)
+        tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            count = export_ics(conn, f, since)
+        tmp.replace(out_path)
+        print(f"Wrote {count} event(s) to {out_path}")
+        return
+
     # Handle --add-reservation
     if args.add_reservation:
         if not args.date:
@@ -977,15 +3845,45 @@ def main():
                         args.end_time, args.confirmation, args.party_size, args.notes)
         return
 
+    # Handle --distance / --nearest-to
+    if args.distance:
+        print_distance(conn, *args.distance)
+        return
+    if args.nearest_to:
+        print_nearest(conn, args.nearest_to, args.k)
+        return
+
+    # Handle --merge-places
+    if args.merge_places:
+        if not resolve_places(conn):
+            print("No venues share a Google place ID.")
+        return
+
+    # Handle --api-usage
+    if args.api_usage:
+        print_api_usage(conn)
+        return
+
     # Handle --refetch
     if args.refetch:
+        if args.dry_run:
+            cost = search_cost(FIELD_MASK)
+            print(f"Would re-fetch '{args.refetch}': 1 API call, est. ${cost:.3f}.")
+            return
+
         api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
         if not api_key:
             print("Error: Set GOOGLE_MAPS_API_KEY environment variable.")
             sys.exit(1)
 
         print(f"Re-fetching: {args.refetch}")
-        result = fetch_place(args.refetch, api_key)
+        ledger = ApiLedger(args.max_calls)
+        try:
+            result = fetch_place(args.refetch, api_key, ledger)
+        except ApiBudgetExceeded as e:
+            print(f"Error: {e}.")
+            sys.exit(1)
+        ledger.flush(conn)
         # Look up existing record for source/section
         existing = conn.execute("SELECT source, section FROM venues WHERE name = ?",
                                 (args.refetch,)).fetchone()
@@ -994,52 +3892,62 @@ def main():
 
         record = build_venue_record(args.refetch, source, section, result)
         upsert_venue(conn, record)
-        print("Done. Updated record:")
-        print_summary(conn)
-        return
-
-    # Parse venues from both sources
-    print(f"Parsing {md_path}...")
-    md_venues = parse_markdown(md_path)
-    print(f"  Found {len(md_venues)} venues in markdown.\n")
-
-    csv_venues = parse_takeout_csvs(SCRIPT_DIR)
-    all_venues = md_venues + csv_venues
-    all_venues = deduplicate_venues(all_venues)
-    print(f"\nTotal unique venues after dedup: {len(all_venues)}")
-
-    # Handle --parse-only
-    if args.parse_only:
-        for v in all_venues:
-            print(f"  [{v['section']}] {v['name']} (source: {v['source']})")
+        resolve_places(conn)
+        print(f"Done ({ledger.summary()}). Updated record:")
+        print_summary(conn, args.format)
         return
 
-    # Determine what needs fetching
-    cached = get_cached_names(conn)
-    to_fetch = [v for v in all_venues if v["name"] not in cached]
+    api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
 
-    if not to_fetch:
+    # Without a key (or for --parse-only / --dry-run) just parse and dedup to see what's there
+    if args.parse_only or args.dry_run or not api_key:
+        print(f"Parsing {md_path}...")
+        md_venues = parse_markdown(md_path)
+        print(f"  Found {len(md_venues)} venues in markdown.\n")
+
+        csv_venues = parse_takeout_csvs(SCRIPT_DIR)
+        all_venues = md_venues + csv_venues
+        all_venues = deduplicate_venues(all_venues)
+        print(f"\nTotal unique venues after dedup: {len(all_venues)}")
+
+        # Handle --parse-only
+        if args.parse_only:
+            for v in all_venues:
+                print(f"  [{v['section']}] {v['name']} (source: {v['source']})")
+            return
+
+        cached = get_cached_names(conn)
+        to_fetch = [v for v in all_venues if v["name"] not in cached]
+        if args.dry_run:
+            print_fetch_estimate(to_fetch, args.max_calls, args.ids_only)
+            return
+        if to_fetch:
+            print("Error: Set GOOGLE_MAPS_API_KEY environment variable.")
+            print(f"  {len(to_fetch)} venues need fetching but no API key provided.")
+            sys.exit(1)
         print("All venues already cached. No API calls needed.")
-        print_summary(conn)
+        print_summary(conn, args.format)
         return
 
-    # Fetch from API
-    api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
-    if not api_key:
-        print("Error: Set GOOGLE_MAPS_API_KEY environment variable.")
-        print(f"  {len(to_fetch)} venues need fetching but no API key provided.")
+    # Parse, dedup, fetch and write as one streaming pipeline
+    pipeline = SyncPipeline(conn, md_path, SCRIPT_DIR, api_key, ledger=ApiLedger(args.max_calls),
+                            ids_only=args.ids_only)
+    try:
+        fetched = pipeline.run()
+    except ApiBudgetExceeded as e:
+        print(f"\nStopped: {e}. {pipeline.stats['write'].items} venue(s) saved; "
+              f"run again to fetch the rest.")
+        print(pipeline.ledger.summary())
+        resolve_places(conn)
         sys.exit(1)
-
-    print(f"\nFetching {len(to_fetch)} new venue(s) from Google Maps Places API...\n")
-
-    for v in to_fetch:
-        print(f"  Fetching: {v['name']}...")
-        result = fetch_place(v["name"], api_key)
-        record = build_venue_record(v["name"], v["source"], v["section"], result)
-        upsert_venue(conn, record)
-
-    print(f"\nDone. {len(to_fetch)} venue(s) fetched and cached.\n")
-    print_summary(conn)
+    print(f"\nTotal unique venues after dedup: {pipeline.stats['dedup'].items}")
+    if not fetched:
+        print("All venues already cached. No API calls needed.")
+    else:
+        resolve_places(conn)
+        print(f"\nDone. {fetched} venue(s) fetched and cached ({pipeline.ledger.summary()}).\n")
+    print(pipeline.report())
+    print_summary(conn, args.format)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+notes_sync.py — Build the Apple Notes trip note from london_venues.db and push
+only what changed.
+
+The note is split into sections (a header, one per trip day, and a "still to
+book" list). A state file remembers each section's hash and HTML from the last
+push, so the next run emits:
+    none    nothing changed
+    update  replace just the changed sections in place and append new ones
+    full    replace the whole note (first run, or sections removed/reordered)
+
+Everything up to the AppleScript text is plain Python and runs anywhere; only
+the final `osascript` hand-off needs a Mac.
+
+Usage:
+    python3 notes_sync.py                     # push changes to the "London" note (macOS)
+    python3 notes_sync.py --dry-run           # print the payload as JSON, don't save state
+    python3 notes_sync.py --emit update.applescript   # write the script instead of running it
+    python3 notes_sync.py --confirm           # after running an emitted script, record it as pushed
+    python3 notes_sync.py --full              # force a full replace
+"""
+
+import argparse
+import hashlib
+import html
+import itertools
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from london_venues import DB_PATH, day_label, init_db, schedule_rows
+
+STATE_PATH = Path(__file__).parent / ".notes_state.json"
+NOTE_NAME = "London"
+ACCOUNT = "iCloud"
+FOLDER = "Notes"
+
+
+# ---------------------------------------------------------------------------
+# Sections
+# ---------------------------------------------------------------------------
+
+def _item_html(row) -> str:
+    esc = html.escape
+    time = f"<b>{esc(row['time'])}</b> " if row["time"] else ""
+    if row["kind"] == "reservation":
+        line = f"{time}{esc(row['title'])} ✓ CONFIRMED"
+        if row["confirmation"]:
+            line += f" (Conf: {esc(row['confirmation'])})"
+        if row["notes"]:
+            line += f" — {esc(row['notes'])}"
+        return f"<li>{line}</li>"
+    line = f"{time}{esc(row['title'])}"
+    if row["venue"]:
+        line += f" @ {esc(row['venue'])}"
+    price = row["price"] or row["ticket_price"]
+    if price:
+        line += f" ({esc(price)})"
+    return f"<li>{line}</li>"
+
+
+def build_sections(conn) -> list:
+    """Return the note as an ordered list of (key, html) sections."""
+    sections = [("header", "<h1>London Trip Schedule</h1>")]
+
+    for date, rows in itertools.groupby(schedule_rows(conn), key=lambda r: r["date"]):
+        items = "".join(_item_html(r) for r in rows)
+        sections.append((f"day:{date}", f"<h2>{html.escape(day_label(date))}</h2><ul>{items}</ul>"))
+
+    to_book = conn.execute("""
+        SELECT v.name, v.booking_required, v.booking_url FROM venues v
+        WHERE v.booking_required IN ('yes', 'recommended')
+          AND NOT EXISTS (SELECT 1 FROM reservations r
+                          WHERE r.matched_venue = v.name OR r.venue_name = v.name)
+        ORDER BY v.name
+    """).fetchall()
+    if to_book:
+        items = "".join(
+            f"<li>{html.escape(v['name'])} ({html.escape(v['booking_required'])})"
+            + (f" — {html.escape(v['booking_url'])}" if v["booking_url"] else "") + "</li>"
+            for v in to_book)
+        sections.append(("to-book", f"<h2>Still to book</h2><ul>{items}</ul>"))
+
+    return sections
+
+
+def section_hash(body: str) -> str:
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Diffing
+# ---------------------------------------------------------------------------
+
+def diff_sections(previous, sections) -> dict:
+    """Compare the last pushed sections with the current ones.
+
+    ``previous`` is the saved state's section list ([key, hash, html] triples)
+    or None. Existing sections that changed become in-place patches, and new
+    sections at the end become an append. Anything else (a section removed or
+    moved) changes the note's structure and needs a full replace.
+    """
+    full_html = "".join(body for _, body in sections)
+    payload = {"mode": "none", "patches": [], "append": "", "html": full_html}
+
+    if not previous:
+        payload["mode"] = "full"
+        return payload
+
+    old_keys = [key for key, _, _ in previous]
+    new_keys = [key for key, _ in sections]
+    if new_keys[:len(old_keys)] != old_keys:
+        payload["mode"] = "full"
+        return payload
+
+    for (key, old_hash, old_html), (_, body) in zip(previous, sections):
+        if old_hash != section_hash(body):
+            payload["patches"].append({"key": key, "old": old_html, "new": body})
+    payload["append"] = "".join(body for _, body in sections[len(previous):])
+
+    if payload["patches"] or payload["append"]:
+        payload["mode"] = "update"
+    return payload
+
+
+def state_for(sections) -> list:
+    return [[key, section_hash(body), body] for key, body in sections]
+
+
+def pending_path_for(state_path: Path) -> Path:
+    """Where --emit parks the new state until --confirm says the script ran."""
+    return state_path.with_name(state_path.name + ".pending")
+
+
+# ---------------------------------------------------------------------------
+# AppleScript
+# ---------------------------------------------------------------------------
+
+def _as_string(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def build_applescript(payload: dict, note: str = NOTE_NAME) -> str:
+    """Turn a payload into an AppleScript for Notes.
+
+    Updates replace each old section's HTML in the note body. If any old
+    section can't be found (Notes may have re-serialized the body), the script
+    falls back to replacing the whole note.
+    """
+    target = f"note {_as_string(note)} of folder {_as_string(FOLDER)}"
+    full = _as_string(payload["html"])
+
+    if payload["mode"] == "full":
+        return f"""tell application "Notes"
+	tell account {_as_string(ACCOUNT)}
+		try
+			set body of {target} to {full}
+		on error
+			make new note at folder {_as_string(FOLDER)} with properties {{name:{_as_string(note)}, body:{full}}}
+		end try
+	end tell
+end tell
+"""
+
+    steps = []
+    for patch in payload["patches"]:
+        old, new = _as_string(patch["old"]), _as_string(patch["new"])
+        steps.append(f"""		if noteBody contains {old} then
+			set noteBody to my replaceText(noteBody, {old}, {new})
+		else
+			set allFound to false
+		end if""")
+    if payload["append"]:
+        steps.append(f"		set noteBody to noteBody & {_as_string(payload['append'])}")
+    body_steps = "\n".join(steps)
+
+    return f"""on replaceText(theText, oldText, newText)
+	set AppleScript's text item delimiters to oldText
+	set parts to text items of theText
+	set AppleScript's text item delimiters to newText
+	set joined to parts as text
+	set AppleScript's text item delimiters to ""
+	return joined
+end replaceText
+
+tell application "Notes"
+	tell account {_as_string(ACCOUNT)}
+		set targetNote to {target}
+		set noteBody to body of targetNote
+		set allFound to true
+{body_steps}
+		if allFound then
+			set body of targetNote to noteBody
+		else
+			set body of targetNote to {full}
+		end if
+	end tell
+end tell
+"""
+
+
+def run_osascript(script: str):
+    """Hand the script to Notes. macOS only."""
+    if sys.platform != "darwin":
+        raise RuntimeError("osascript is only available on macOS; use --emit or --dry-run")
+    subprocess.run(["osascript", "-"], input=script.encode("utf-8"), check=True)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the trip schedule into Apple Notes")
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to SQLite database")
+    parser.add_argument("--state", default=str(STATE_PATH), help="Where section hashes are kept")
+    parser.add_argument("--note", default=NOTE_NAME, help="Name of the note to update")
+    parser.add_argument("--full", action="store_true", help="Replace the whole note")
+    parser.add_argument("--dry-run", action="store_true", help="Print the payload; don't push or save state")
+    parser.add_argument("--emit", metavar="FILE", help="Write the AppleScript to FILE instead of running it")
+    parser.add_argument("--confirm", action="store_true",
+                        help="Record the last --emit script as pushed, once it has run")
+    args = parser.parse_args()
+
+    state_path = Path(args.state)
+    pending_path = pending_path_for(state_path)
+    if args.confirm:
+        if not pending_path.exists():
+            print("Nothing to confirm: no emitted script is pending.")
+            sys.exit(1)
+        pending_path.replace(state_path)
+        print("Recorded the emitted script as pushed.")
+        return
+
+    conn = init_db(Path(args.db))
+    sections = build_sections(conn)
+    conn.close()
+
+    previous = None
+    if state_path.exists() and not args.full:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        if state.get("note") == args.note:
+            previous = state.get("sections")
+
+    payload = diff_sections(previous, sections)
+
+    if args.dry_run:
+        print(json.dumps({k: v for k, v in payload.items() if k != "html"}, indent=2))
+        return
+    if payload["mode"] == "none":
+        print("Note is up to date.")
+        return
+
+    script = build_applescript(payload, args.note)
+    state = json.dumps({"note": args.note, "sections": state_for(sections)})
+    if args.emit:
+        # Nothing has reached Notes yet: keep the new state aside until --confirm
+        Path(args.emit).write_text(script, encoding="utf-8")
+        pending_path.write_text(state, encoding="utf-8")
+        print(f"Wrote {args.emit} ({payload['mode']}, {len(payload['patches'])} section(s) patched).")
+        print("Run it, then `notes_sync.py --confirm` to record the note as updated.")
+        return
+
+    try:
+        run_osascript(script)
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Updated note '{args.note}' ({payload['mode']}, {len(payload['patches'])} section(s) patched).")
+    state_path.write_text(state, encoding="utf-8")
+    pending_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
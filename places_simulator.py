@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+places_simulator.py — Local stand-in for the Google Places API (New).
+
+Serves places:searchText and Place Details with the real field-mask rules
+and a deterministic fake place for any query. The fetch path (fetch_place,
+build_venue_record, the sync pipeline, the viewer's lazy details) can be
+run and load-tested offline, with configurable latency, 429/5xx faults and
+a rate limit.
+
+Usage:
+    python3 places_simulator.py --port 8765 &
+    PLACES_API_URL=http://127.0.0.1:8765/v1/places:searchText GOOGLE_MAPS_API_KEY=sim \
+        python3 london_venues.py --db /tmp/sim.db          # full sync, no network
+
+    python3 places_simulator.py --latency lognormal:120:0.6   # median 120 ms, long tail
+    python3 places_simulator.py --latency uniform:20:200 --error-rate 0.02 --throttle-rate 0.05
+    python3 places_simulator.py --qps 10 --burst 20           # token bucket; excess gets 429
+    python3 places_simulator.py --miss-rate 0.1               # 10% of queries find nothing
+    curl http://127.0.0.1:8765/stats                          # requests by endpoint/status, latency
+
+Latency specs are in milliseconds: fixed:MS, uniform:LO:HI, normal:MEAN:SD,
+lognormal:MEDIAN:SIGMA, exp:MEAN. Places depend only on the query and
+--seed; with one client at a time the fault sequence repeats run to run.
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+DEFAULT_SEED = 2026
+SEARCH_PATH = "/v1/places:searchText"
+DETAILS_PREFIX = "/v1/places/"
+STATS_PATH = "/stats"
+
+# searchText returns the matching place plus up to this many lookalikes,
+# capped by the request's maxResultCount.
+SEARCH_RESULTS = 5
+LOOKALIKE_SUFFIXES = ["Café", "Shop", "Bar", "Gallery", "Gardens"]
+
+# Top-level Place fields the simulator knows; masks naming anything else get
+# the same 400 INVALID_ARGUMENT the real API returns.
+PLACE_FIELDS = {
+    "id", "name", "displayName", "formattedAddress", "location", "regularOpeningHours",
+    "googleMapsUri", "types", "rating", "userRatingCount", "websiteUri", "businessStatus",
+}
+PLACE_TYPES = ["museum", "restaurant", "bar", "art_gallery", "tourist_attraction", "park", "market"]
+STREETS = [
+    "High St", "Church Rd", "Station Rd", "Market St", "King St", "Queen St",
+    "Bridge St", "Mill Ln", "Park Rd", "Victoria St", "Albert Embankment",
+]
+POSTCODES = ["W1D 4PX", "E1 6QL", "SW7 2RL", "WC2R 0JR", "SE1 9AG", "NW1 8AH", "E8 4RP", "EC2V 7HH"]
+# Central London; fake places land inside this box.
+LAT_RANGE = (51.48, 51.55)
+LNG_RANGE = (-0.22, -0.03)
+# Places API periods number days from Sunday; weekdayDescriptions start on Monday.
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+# ---------------------------------------------------------------------------
+# Fake places
+# ---------------------------------------------------------------------------
+
+def _place_id(name: str) -> str:
+    """Reversible ID, so details work for places found before a restart."""
+    return "sim_" + base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _name_from_id(place_id: str):
+    if not place_id.startswith("sim_"):
+        return None
+    encoded = place_id[4:]
+    try:
+        return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def _clock(hour: int, minute: int) -> str:
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour % 24 < 12 else 'PM'}"
+
+
+def _opening_hours(rng: random.Random) -> dict:
+    """Opening hours in the Places API shape: 24/7, or daily hours with a closed day."""
+    if rng.random() < 0.1:
+        return {
+            "periods": [{"open": {"day": 0, "hour": 0, "minute": 0}}],
+            "weekdayDescriptions": [f"{day}: Open 24 hours" for day in WEEKDAYS],
+        }
+    open_h, open_m = rng.choice((8, 9, 10, 11, 12)), rng.choice((0, 0, 30))
+    # Past midnight for late bars: the period closes on the next day
+    close_h = rng.choice((17, 18, 20, 22, 23, 25))
+    closed_day = rng.choice((None, None, 1, 2))   # Monday or Tuesday, Places numbering
+    periods, descriptions = [], []
+    for i, day_name in enumerate(WEEKDAYS):
+        day = (i + 1) % 7
+        if day == closed_day:
+            descriptions.append(f"{day_name}: Closed")
+            continue
+        periods.append({"open": {"day": day, "hour": open_h, "minute": open_m},
+                        "close": {"day": (day + close_h // 24) % 7, "hour": close_h % 24, "minute": 0}})
+        descriptions.append(f"{day_name}: {_clock(open_h, open_m)} – {_clock(close_h, 0)}")
+    return {"periods": periods, "weekdayDescriptions": descriptions}
+
+
+def fake_place(name: str, seed: int = DEFAULT_SEED) -> dict:
+    """The full Place for ``name``; the same (name, seed) always gives the same place."""
+    digest = hashlib.sha256(f"{seed}:{name.casefold()}".encode("utf-8")).digest()
+    rng = random.Random(digest)
+    place_id = _place_id(name)
+    street_no = rng.randrange(1, 240)
+    return {
+        "name": f"places/{place_id}",
+        "id": place_id,
+        "displayName": {"text": name, "languageCode": "en"},
+        "formattedAddress": f"{street_no} {rng.choice(STREETS)}, London {rng.choice(POSTCODES)}, UK",
+        "location": {"latitude": round(rng.uniform(*LAT_RANGE), 7),
+                     "longitude": round(rng.uniform(*LNG_RANGE), 7)},
+        "regularOpeningHours": _opening_hours(rng),
+        "googleMapsUri": f"https://maps.google.com/?cid={int.from_bytes(digest[:8], 'big')}",
+        "types": sorted(rng.sample(PLACE_TYPES, 2)) + ["point_of_interest", "establishment"],
+        "rating": round(rng.uniform(3.5, 4.9), 1),
+        "userRatingCount": rng.randrange(20, 40000),
+        "websiteUri": f"https://www.{re.sub(r'[^a-z0-9]+', '', name.lower()) or 'venue'}.co.uk/",
+        "businessStatus": "OPERATIONAL",
+    }
+
+
+def query_name(text_query: str) -> str:
+    """The place name a query asks for: fetch_place appends " London"."""
+    text = " ".join(text_query.split())
+    return re.sub(r"\s+london$", "", text, flags=re.IGNORECASE) or text
+
+
+# ---------------------------------------------------------------------------
+# Field masks
+# ---------------------------------------------------------------------------
+
+class BadRequest(ValueError):
+    """Answered as 400 INVALID_ARGUMENT with this message."""
+
+
+def parse_mask(header, prefix: str) -> list:
+    """Split an X-Goog-FieldMask into dotted paths relative to one Place.
+
+    Search masks name fields as "places.<field>" (prefix "places."), details
+    masks as bare "<field>"; "*" selects everything. Raises BadRequest for a
+    missing mask or an unknown field, as the real API does.
+    """
+    if not header or not header.strip():
+        raise BadRequest("FieldMask is a required parameter. See https://developers.google.com/"
+                         "maps/documentation/places/web-service/choose-fields for more details.")
+    paths = []
+    for field in (f.strip() for f in header.split(",")):
+        if not field or field == "nextPageToken":
+            continue
+        if field == "*" or field in (prefix + "*", prefix.rstrip(".")):
+            return ["*"]
+        if prefix and not field.startswith(prefix):
+            raise BadRequest(f"Invalid field: {field}")
+        path = field[len(prefix):]
+        if path.split(".", 1)[0] not in PLACE_FIELDS:
+            raise BadRequest(f"Invalid field: {field}")
+        paths.append(path)
+    return paths
+
+
+def apply_mask(place: dict, paths: list) -> dict:
+    """Keep only ``paths`` of ``place``; nested paths like "location.latitude" work too."""
+    tree = {}
+    for path in paths:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return _prune(place, tree)
+
+
+def _prune(value, tree: dict):
+    if not tree or "*" in tree:
+        return value
+    if isinstance(value, list):
+        return [_prune(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: _prune(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+# ---------------------------------------------------------------------------
+# Latency, faults and rate limits
+# ---------------------------------------------------------------------------
+
+LATENCY_SAMPLERS = {
+    "fixed": (1, lambda rng, ms: ms),
+    "uniform": (2, lambda rng, lo, hi: rng.uniform(lo, hi)),
+    "normal": (2, lambda rng, mean, sd: rng.gauss(mean, sd)),
+    "lognormal": (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma)),
+    "exp": (1, lambda rng, mean: rng.expovariate(1 / mean)),
+}
+
+
+def parse_latency(spec: str):
+    """Turn "lognormal:120:0.6" into a sampler: rng -> seconds (never negative)."""
+    kind, *params = spec.split(":")
+    if kind not in LATENCY_SAMPLERS:
+        raise argparse.ArgumentTypeError(
+            f"unknown latency distribution '{kind}' (expected {', '.join(LATENCY_SAMPLERS)})")
+    arity, sample = LATENCY_SAMPLERS[kind]
+    try:
+        values = [float(p) for p in params]
+        if len(values) != arity:
+            raise ValueError
+        sample(random.Random(0), *values)
+    except (ValueError, ZeroDivisionError):
+        raise argparse.ArgumentTypeError(f"bad latency spec '{spec}'")
+    return lambda rng: max(0.0, sample(rng, *values)) / 1000
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class Simulator:
+    """Behaviour shared by every request: seed, latency, fault rates, rate limit and counters."""
+
+    def __init__(self, seed: int = DEFAULT_SEED, latency: str = "fixed:0", error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, miss_rate: float = 0.0, qps=None, burst=None,
+                 require_key: bool = True):
+        self.seed = seed
+        self.latency = parse_latency(latency) if isinstance(latency, str) else latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.miss_rate = miss_rate
+        self.bucket = TokenBucket(qps, burst or max(1.0, qps)) if qps else None
+        self.require_key = require_key
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "by_endpoint": {}, "by_status": {}, "latency_ms_total": 0.0,
+                      "latency_ms_max": 0.0}
+
+    def draw(self):
+        """One request's injected latency (seconds) and fault roll in [0, 1)."""
+        with self.lock:
+            return self.latency(self.rng), self.rng.random()
+
+    def missing(self, name: str) -> bool:
+        """Deterministically decide whether a query finds nothing."""
+        digest = hashlib.sha256(f"miss:{self.seed}:{name.casefold()}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2 ** 32 < self.miss_rate
+
+    def record(self, endpoint: str, status: int, delay: float):
+        with self.lock:
+            stats = self.stats
+            stats["requests"] += 1
+            stats["by_endpoint"][endpoint] = stats["by_endpoint"].get(endpoint, 0) + 1
+            stats["by_status"][str(status)] = stats["by_status"].get(str(status), 0) + 1
+            stats["latency_ms_total"] += delay * 1000
+            stats["latency_ms_max"] = max(stats["latency_ms_max"], delay * 1000)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            stats = json.loads(json.dumps(self.stats))
+        stats["latency_ms_mean"] = round(stats["latency_ms_total"] / stats["requests"], 1) if stats["requests"] else 0.0
+        stats["latency_ms_total"] = round(stats["latency_ms_total"], 1)
+        stats["latency_ms_max"] = round(stats["latency_ms_max"], 1)
+        return stats
+
+    def search(self, body: dict, mask: list) -> dict:
+        text_query = body.get("textQuery")
+        if not isinstance(text_query, str) or not text_query.strip():
+            raise BadRequest("Invalid value at 'text_query': must not be empty.")
+        name = query_name(text_query)
+        if self.missing(name):
+            return {}
+        limit = min(SEARCH_RESULTS, max(1, int(body.get("maxResultCount") or body.get("pageSize") or 20)))
+        names = [name] + [f"{name} {suffix}" for suffix in LOOKALIKE_SUFFIXES][:limit - 1]
+        return {"places": [apply_mask(fake_place(n, self.seed), mask) for n in names]}
+
+    def details(self, place_id: str, mask: list):
+        name = _name_from_id(place_id)
+        if name is None or self.missing(name):
+            return None
+        return apply_mask(fake_place(name, self.seed), mask)
+
+
+# ---------------------------------------------------------------------------
+# HTTP server
+# ---------------------------------------------------------------------------
+
+ERROR_STATUS = {400: "INVALID_ARGUMENT", 403: "PERMISSION_DENIED", 404: "NOT_FOUND",
+                429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE"}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "PlacesSimulator/1.0"
+    protocol_version = "HTTP/1.1"
+    verbose = False
+
+    @property
+    def sim(self) -> Simulator:
+        return self.server.sim
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, message: str):
+        self.send_json(status, {"error": {"code": status, "message": message, "status": ERROR_STATUS[status]}})
+
+    def do_GET(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path == STATS_PATH:
+            self.send_json(200, self.sim.snapshot())
+        elif path.startswith(DETAILS_PREFIX) and len(path) > len(DETAILS_PREFIX):
+            self.answer("details", urllib.parse.unquote(path[len(DETAILS_PREFIX):]))
+        else:
+            self.send_error_json(404, f"Unknown path {path}")
+
+    def do_POST(self):
+        path = urllib.parse.urlsplit(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if path == SEARCH_PATH:
+            self.answer("searchText", raw)
+        else:
+            self.send_error_json(404, f"Unknown path {path}")
+
+    def answer(self, endpoint: str, arg):
+        """Shared request flow: key check, rate limit, latency, faults, then the answer."""
+        sim = self.sim
+        delay = 0.0
+        status, payload = 200, None
+        if sim.require_key and not self.headers.get("X-Goog-Api-Key"):
+            status, message = 403, "The request is missing a valid API key."
+        elif sim.bucket is not None and not sim.bucket.take():
+            status, message = 429, "Quota exceeded for quota metric 'Requests' (simulated rate limit)."
+        else:
+            delay, roll = sim.draw()
+            time.sleep(delay)
+            if roll < sim.throttle_rate:
+                status, message = 429, "Resource has been exhausted (e.g. check quota)."
+            elif roll < sim.throttle_rate + sim.error_rate:
+                status = 503 if roll < sim.throttle_rate + sim.error_rate / 2 else 500
+                message = "The service is currently unavailable." if status == 503 else "Internal error encountered."
+            else:
+                try:
+                    if endpoint == "searchText":
+                        try:
+                            body = json.loads(arg or b"{}")
+                        except json.JSONDecodeError as e:
+                            raise BadRequest(f"Invalid JSON payload received. {e}")
+                        payload = sim.search(body, parse_mask(self.headers.get("X-Goog-FieldMask"), "places."))
+                    else:
+                        payload = sim.details(arg, parse_mask(self.headers.get("X-Goog-FieldMask"), ""))
+                        if payload is None:
+                            status, message = 404, f"Place '{arg}' not found."
+                except BadRequest as e:
+                    status, message = 400, str(e)
+        sim.record(endpoint, status, delay)
+        if status == 200:
+            self.send_json(200, payload)
+        else:
+            self.send_error_json(status, message)
+
+
+def make_server(sim: Simulator, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.sim = sim
+    return server
+
+
+def start_in_thread(sim: Simulator, host: str = "127.0.0.1", port: int = 0):
+    """Serve ``sim`` from a daemon thread; returns (server, searchText URL)."""
+    server = make_server(sim, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{SEARCH_PATH}"
+
+
+def _rate(text: str) -> float:
+    value = float(text)
+    if not 0.0 <= value <= 1.0:
+        raise argparse.ArgumentTypeError(f"{text} is not a probability between 0 and 1")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Places API simulator (searchText + Place Details)")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed for places, latency and faults")
+    parser.add_argument("--latency", type=parse_latency, default="fixed:0", metavar="SPEC",
+                        help="Injected latency distribution in ms, e.g. fixed:50, uniform:20:200, "
+                             "normal:80:20, lognormal:120:0.6, exp:100 (default: fixed:0)")
+    parser.add_argument("--error-rate", type=_rate, default=0.0, help="Fraction of requests answered 500/503")
+    parser.add_argument("--throttle-rate", type=_rate, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--miss-rate", type=_rate, default=0.0, help="Fraction of queries that find no place")
+    parser.add_argument("--qps", type=float, help="Rate limit in requests per second; excess requests get 429")
+    parser.add_argument("--burst", type=float, help="Requests allowed at once under --qps (default: --qps)")
+    parser.add_argument("--no-key", action="store_true", help="Accept requests without X-Goog-Api-Key")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    sim = Simulator(args.seed, args.latency, args.error_rate, args.throttle_rate, args.miss_rate,
+                    args.qps, args.burst, require_key=not args.no_key)
+    Handler.verbose = args.verbose
+    server = make_server(sim, args.host, args.port)
+    url = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Places simulator on {url} — export PLACES_API_URL={url}{SEARCH_PATH}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(sim.snapshot(), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Event upserts: --add-event and bulk imports share one UNIQUE key convention."""
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import london_venues  # noqa: E402
+
+
+class EventKeyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = london_venues.init_db(Path(self.tmp.name) / "trip.db")
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def add_event(self, title, venue=None, date=None, **fields):
+        with contextlib.redirect_stdout(io.StringIO()):
+            london_venues.add_event(self.conn, title, venue, date, fields.get("time"), fields.get("price"),
+                                    None, None, None, fields.get("source"))
+
+    def events(self):
+        return self.conn.execute("SELECT title, venue_name, date, price FROM events ORDER BY id").fetchall()
+
+    def test_reimport_updates_event_added_without_venue_or_date(self):
+        self.add_event("Lunar New Year Parade")
+        counts = london_venues.upsert_events(self.conn, [{"title": "Lunar New Year Parade", "price": "Free"}])
+        self.assertEqual(counts, {"inserted": 0, "updated": 1, "skipped": 0})
+        self.assertEqual([tuple(r) for r in self.events()], [("Lunar New Year Parade", "", "", "Free")])
+
+    def test_add_event_after_import_updates_in_place(self):
+        london_venues.upsert_events(self.conn, [{"title": "Open Mic", "date": "2026-02-15"}])
+        self.add_event("Open Mic", date="2026-02-15", price="£5")
+        self.assertEqual([tuple(r) for r in self.events()], [("Open Mic", "", "2026-02-15", "£5")])
+
+    def test_ndjson_lines_that_are_not_objects_are_skipped(self):
+        path = Path(self.tmp.name) / "events.ndjson"
+        path.write_text('{"title": "Open Mic"}\n[1, 2]\n"Parade"\nnull\n', encoding="utf-8")
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = london_venues.import_events(self.conn, path)
+        self.assertEqual(counts, {"inserted": 1, "updated": 0, "skipped": 3})
+        self.assertEqual([tuple(r)[:3] for r in self.events()], [("Open Mic", "", "")])
+
+    def test_migration_folds_null_keyed_duplicates(self):
+        self.conn.executemany("INSERT INTO events (title, venue_name, date) VALUES (?, ?, ?)", [
+            ("Parade", None, None), ("Parade", "", ""), ("Talk", None, "2026-02-16"), ("Talk", None, "2026-02-16"),
+        ])
+        london_venues._migration_012_event_blank_keys(self.conn)
+        self.assertEqual([tuple(r)[:3] for r in self.events()],
+                         [("Parade", "", ""), ("Talk", "", "2026-02-16")])
+
+
+if __name__ == "__main__":
+    unittest.main()
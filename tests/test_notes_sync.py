@@ -0,0 +1,83 @@
+"""Notes sync: the none/update/full decision and the AppleScript built from it."""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import notes_sync  # noqa: E402
+
+SECTIONS = [
+    ("header", "<h1>London Trip Schedule</h1>"),
+    ("day:2026-02-14", "<h2>Sat 14 Feb</h2><ul><li>Tate Modern</li></ul>"),
+    ("day:2026-02-15", "<h2>Sun 15 Feb</h2><ul><li>Borough Market</li></ul>"),
+]
+
+
+class DiffSectionsTest(unittest.TestCase):
+    def previous(self):
+        return notes_sync.state_for(SECTIONS)
+
+    def test_first_run_is_a_full_replace(self):
+        payload = notes_sync.diff_sections(None, SECTIONS)
+        self.assertEqual(payload["mode"], "full")
+        self.assertEqual(payload["html"], "".join(body for _, body in SECTIONS))
+
+    def test_unchanged_sections_need_nothing(self):
+        payload = notes_sync.diff_sections(self.previous(), SECTIONS)
+        self.assertEqual((payload["mode"], payload["patches"], payload["append"]), ("none", [], ""))
+
+    def test_changed_section_becomes_a_patch(self):
+        sections = list(SECTIONS)
+        sections[1] = ("day:2026-02-14", "<h2>Sat 14 Feb</h2><ul><li>Tate Britain</li></ul>")
+        payload = notes_sync.diff_sections(self.previous(), sections)
+        self.assertEqual(payload["mode"], "update")
+        self.assertEqual(payload["patches"], [{"key": "day:2026-02-14", "old": SECTIONS[1][1], "new": sections[1][1]}])
+        self.assertEqual(payload["append"], "")
+
+    def test_new_trailing_day_is_appended(self):
+        extra = ("day:2026-02-16", "<h2>Mon 16 Feb</h2><ul><li>Dishoom</li></ul>")
+        payload = notes_sync.diff_sections(self.previous(), SECTIONS + [extra])
+        self.assertEqual(payload["mode"], "update")
+        self.assertEqual(payload["patches"], [])
+        self.assertEqual(payload["append"], extra[1])
+
+    def test_removed_section_forces_full_replace(self):
+        payload = notes_sync.diff_sections(self.previous(), [SECTIONS[0], SECTIONS[2]])
+        self.assertEqual(payload["mode"], "full")
+
+    def test_reordered_sections_force_full_replace(self):
+        payload = notes_sync.diff_sections(self.previous(), [SECTIONS[0], SECTIONS[2], SECTIONS[1]])
+        self.assertEqual(payload["mode"], "full")
+
+    def test_section_inserted_before_existing_ones_forces_full_replace(self):
+        early = ("day:2026-02-13", "<h2>Fri 13 Feb</h2><ul><li>Arrive</li></ul>")
+        payload = notes_sync.diff_sections(self.previous(), [SECTIONS[0], early, *SECTIONS[1:]])
+        self.assertEqual(payload["mode"], "full")
+
+
+class BuildAppleScriptTest(unittest.TestCase):
+    def test_full_replace_sets_the_whole_body(self):
+        script = notes_sync.build_applescript(notes_sync.diff_sections(None, SECTIONS), "London")
+        self.assertIn('set body of note "London" of folder "Notes" to "<h1>', script)
+        self.assertNotIn("replaceText", script)
+
+    def test_update_replaces_old_html_and_falls_back_to_full(self):
+        sections = list(SECTIONS)
+        sections[2] = ("day:2026-02-15", '<h2>Sun 15 Feb</h2><ul><li>"Hamilton"</li></ul>')
+        payload = notes_sync.diff_sections(notes_sync.state_for(SECTIONS), sections)
+        script = notes_sync.build_applescript(payload, "London")
+        self.assertIn(f'my replaceText(noteBody, "{SECTIONS[2][1]}", ', script)
+        self.assertIn('\\"Hamilton\\"', script)
+        self.assertIn("set allFound to false", script)
+
+    def test_append_concatenates_new_sections(self):
+        extra = ("to-book", "<h2>Still to book</h2><ul><li>Sky Garden</li></ul>")
+        payload = notes_sync.diff_sections(notes_sync.state_for(SECTIONS), SECTIONS + [extra])
+        script = notes_sync.build_applescript(payload)
+        self.assertIn(f'set noteBody to noteBody & "{extra[1]}"', script)
+
+
+if __name__ == "__main__":
+    unittest.main()
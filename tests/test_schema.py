@@ -0,0 +1,106 @@
+"""Schema migrations: databases from before versioning upgrade to SCHEMA_VERSION."""
+
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import london_venues  # noqa: E402
+
+# The tables as the unversioned script created them (user_version 0).
+LEGACY_SCHEMA = """
+    CREATE TABLE venues (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        source TEXT, section TEXT, search_query TEXT, google_place_id TEXT,
+        google_display_name TEXT, address TEXT, regular_hours_json TEXT,
+        regular_hours_text TEXT, google_maps_uri TEXT, raw_response TEXT, fetched_at TEXT
+    );
+    CREATE TABLE events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL, venue_name TEXT, date TEXT, time TEXT, price TEXT, url TEXT,
+        category TEXT, notes TEXT, source TEXT, fetched_at TEXT,
+        UNIQUE(title, venue_name, date)
+    );
+    CREATE TABLE reservations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        venue_name TEXT NOT NULL, matched_venue TEXT, date TEXT NOT NULL, time TEXT,
+        end_time TEXT, confirmation TEXT, party_size INTEGER, notes TEXT, created_at TEXT,
+        UNIQUE(venue_name, date, time)
+    );
+    INSERT INTO venues (name, google_place_id) VALUES ('Barbican Centre', 'place-1');
+    INSERT INTO events (title, venue_name, date, time) VALUES ('Open Mic', NULL, '2026-02-15', '19:30');
+    INSERT INTO reservations (venue_name, date, time) VALUES ('Dishoom', '2026-02-16', '19:00');
+"""
+
+
+class SchemaMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "trip.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_legacy_db(self):
+        conn = sqlite3.connect(str(self.path))
+        conn.executescript(LEGACY_SCHEMA)
+        conn.close()
+
+    def columns(self, conn, table):
+        return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    def test_new_database_is_created_at_current_version(self):
+        conn = london_venues.init_db(self.path)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], london_venues.SCHEMA_VERSION)
+
+    def test_legacy_database_migrates_and_keeps_its_rows(self):
+        self.make_legacy_db()
+        conn = london_venues.init_db(self.path)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], london_venues.SCHEMA_VERSION)
+        self.assertLessEqual({"booking_required", "latitude", "details_at", "details_failures"},
+                             self.columns(conn, "venues"))
+        self.assertLessEqual({"start_min", "end_min"}, self.columns(conn, "events"))
+        self.assertEqual(conn.execute("SELECT name FROM venues").fetchone()[0], "Barbican Centre")
+        event = conn.execute("SELECT venue_name, date, start_min FROM events").fetchone()
+        self.assertEqual((event["venue_name"], event["date"]), ("", "2026-02-15"))
+        self.assertIsNotNone(event["start_min"])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM reservations").fetchone()[0], 1)
+
+    def test_reopening_a_current_database_is_a_no_op(self):
+        london_venues.init_db(self.path).close()
+        conn = london_venues.init_db(self.path)
+        self.addCleanup(conn.close)
+        before = conn.total_changes
+        london_venues.ensure_schema(conn)
+        self.assertEqual(conn.total_changes, before)
+
+    def test_concurrent_openers_apply_each_migration_once(self):
+        self.make_legacy_db()
+        errors = []
+
+        def open_db():
+            try:
+                london_venues.init_db(self.path).close()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=open_db) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        conn = sqlite3.connect(str(self.path))
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], london_venues.SCHEMA_VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()
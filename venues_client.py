@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+venues_client.py — Thin client for `london_venues.py --serve-socket`.
+
+Forwards its argv to the running daemon and prints the daemon's output, so
+each command skips argparse setup, init_db and opening a fresh connection.
+
+Usage:
+    python3 london_venues.py --serve-socket &                  # start the daemon
+    python3 venues_client.py --add-event --title "Event" --venue "Venue" --date 2026-02-15
+    python3 venues_client.py --batch < commands.txt            # one command line per line, one connection
+    python3 venues_client.py --stop                            # shut the daemon down
+
+Set LONDON_VENUES_SOCKET (or pass --socket PATH first) to use a non-default socket.
+"""
+
+import json
+import os
+import shlex
+import socket
+import sys
+from pathlib import Path
+
+SOCKET_PATH = Path(__file__).parent / ".london_venues.sock"
+
+
+def send(stream, request: dict) -> dict:
+    stream.write(json.dumps(request).encode("utf-8") + b"\n")
+    stream.flush()
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection")
+    return json.loads(line)
+
+
+def emit(response: dict) -> int:
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit"]
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    socket_path = Path(os.environ.get("LONDON_VENUES_SOCKET", SOCKET_PATH))
+    if argv[:1] == ["--socket"] and len(argv) > 1:
+        socket_path = Path(argv[1])
+        argv = argv[2:]
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path))
+    except OSError as e:
+        print(f"Error: no daemon at {socket_path} ({e}). Start one with "
+              f"`python3 london_venues.py --serve-socket`.", file=sys.stderr)
+        return 1
+
+    cwd = os.getcwd()
+    with sock, sock.makefile("rwb") as stream:
+        if argv == ["--stop"]:
+            return emit(send(stream, {"shutdown": True}))
+
+        if argv == ["--batch"]:
+            status = 0
+            for line in sys.stdin:
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                status = emit(send(stream, {"argv": shlex.split(line), "cwd": cwd})) or status
+            return status
+
+        return emit(send(stream, {"argv": argv, "cwd": cwd}))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
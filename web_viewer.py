@@ -1,21 +1,65 @@
 #!/usr/bin/env python3
 """
 Quick web viewer for london_venues.db
-Run: python3 web_viewer.py
+Run: python3 web_viewer.py [--port 8080] [--db london_venues.db]
 Open: http://localhost:8080
+       /events?from=2026-02-14&to=2026-02-16 (also /reservations) filters by date range
+       /day?date=2026-02-17 shows one day's reservations, events and open venues
+
+Several trips from one process (each DB is a trip named after its file):
+    python3 web_viewer.py --db london.db --db paris.db    # or --trips trips/
+    /t/<trip>/venues, /t/<trip>/api/events, ... serve one trip; unprefixed
+    routes serve the first. / lists the trips and /search?q= searches them all.
+
+Static export (incremental, only changed pages are rewritten):
+    python3 web_viewer.py --export-site site/
+
+JSON API (streamed, gzip when Accept-Encoding allows):
+    /api/venues  /api/events  /api/reservations  /api/venue/<id>
+
+Writes (JSON or form body, fields named like the CLI flags), applied by a
+single writer thread that batches concurrent requests into one transaction:
+    POST /api/set-booking      venue, price, booking_required, booking_url, ...
+    POST /api/add-event        title, venue, date, time, price, url, category, notes, source
+    POST /api/add-reservation  venue, date, time, end_time, confirmation, party_size, notes
+
+Live updates: pages subscribe to /events-stream (Server-Sent Events) and
+patch changed rows in place after CLI edits.
+
+Venues synced with `london_venues.py --ids-only` get their Places details
+fetched and saved the first time their page is opened (needs GOOGLE_MAPS_API_KEY).
 """
 
+import argparse
+import contextlib
+import gzip
+import hashlib
 import html
 import json
+import os
+import queue
 import sqlite3
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from london_venues import (ApiLedger, DayTimelineCache, _find_venue_name, changes_since, day_timeline,
+                           details_due, ensure_schema, fetch_place_details, save_details,
+                           save_details_failure, save_event, save_reservation, span_filter,
+                           update_booking)
 
 DB_PATH = Path(__file__).parent / "london_venues.db"
+BUSY_TIMEOUT_MS = 5000
 
-STYLE = """
-<style>
+CSS = """
   body { font-family: -apple-system, system-ui, sans-serif; max-width: 900px; margin: 0 auto; padding: 20px; background: #f5f5f5; }
   h1 { color: #333; }
   h2 { color: #555; margin-top: 30px; }
@@ -35,14 +79,91 @@ STYLE = """
   .tag.confirmed { background: #c8e6c9; color: #2e7d32; }
   .section { margin: 30px 0; }
   pre { background: #f0f0f0; padding: 10px; overflow-x: auto; font-size: 12px; }
-</style>
 """
 
-def get_db():
-    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+# Subscribes to the trip's /events-stream (named in #content's data-stream)
+# and patches the page in place: list pages replace, append or remove the
+# changed <tr>; detail pages (which carry a data-live list of "table-id" or
+# "table" tokens) re-fetch their own content.
+LIVE_JS = """
+(function () {
+  if (!window.EventSource) return;
+  var content = document.getElementById("content");
+  var watching = (content && content.getAttribute("data-live") || "").split(" ").filter(Boolean);
+  var source = new EventSource(content && content.getAttribute("data-stream") || "/events-stream");
+
+  function bump(table, delta) {
+    var el = document.querySelector('.live-count[data-table="' + table + '"]');
+    if (el) el.textContent = String(parseInt(el.textContent, 10) + delta);
+  }
+
+  function refresh() {
+    fetch(location.href).then(function (r) { return r.text(); }).then(function (text) {
+      var doc = new DOMParser().parseFromString(text, "text/html");
+      var fresh = doc.getElementById("content");
+      if (fresh) content.innerHTML = fresh.innerHTML;
+    });
+  }
+
+  source.addEventListener("change", function (e) {
+    var c = JSON.parse(e.data), key = c.table + "-" + c.id;
+    if (watching.length) {
+      if (watching.indexOf(key) >= 0 || watching.indexOf(c.table) >= 0) refresh();
+      return;
+    }
+    var row = document.getElementById(key);
+    if (c.op === "delete") {
+      if (row) { row.remove(); bump(c.table, -1); }
+    } else if (row) {
+      row.outerHTML = c.html;
+    } else {
+      var table = document.querySelector('table[data-table="' + c.table + '"]');
+      if (table) {
+        (table.tBodies[0] || table).insertAdjacentHTML("beforeend", c.html);
+        bump(c.table, 1);
+      }
+    }
+  });
+})();
+"""
+
+
+def _static(body, content_type):
+    data = body.encode("utf-8")
+    return {"body": data, "type": content_type,
+            "etag": '"' + hashlib.sha1(data).hexdigest()[:16] + '"'}
+
+
+STATIC = {
+    "/static/style.css": _static(CSS, "text/css; charset=utf-8"),
+    "/static/live.js": _static(LIVE_JS, "application/javascript; charset=utf-8"),
+}
+# The version query string changes whenever the file does, so browsers can
+# cache static assets forever.
+CSS_URL = "/static/style.css?v=" + STATIC["/static/style.css"]["etag"].strip('"')
+LIVE_JS_URL = "/static/live.js?v=" + STATIC["/static/live.js"]["etag"].strip('"')
+
+# Rows are streamed to the client in chunks of roughly this many bytes.
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class HTTPError(Exception):
+    """Raised by page and API handlers to send a non-200 response."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def get_db(db_path=None):
+    conn = sqlite3.connect(str(db_path or DB_PATH), check_same_thread=False)
     conn.row_factory = sqlite3.Row
     # Ensure UTF-8 encoding
     conn.execute("PRAGMA encoding='UTF-8'")
+    # Wait out the writer (or a CLI commit) instead of failing with "database is locked"
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    ensure_schema(conn)
     return conn
 
 def escape(s):
@@ -56,71 +177,719 @@ def escape(s):
     except Exception as e:
         return html.escape(repr(s), quote=True)
 
-class Handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        parsed = urlparse(self.path)
-        path = parsed.path
-        params = parse_qs(parsed.query)
 
-        if path == "/" or path == "/venues":
-            content = self.list_venues()
-        elif path == "/venue":
-            venue_id = params.get("id", [None])[0]
-            content = self.show_venue(venue_id)
-        elif path == "/events":
-            content = self.list_events()
-        elif path == "/event":
-            event_id = params.get("id", [None])[0]
-            content = self.show_event(event_id)
-        elif path == "/reservations":
-            content = self.list_reservations()
-        else:
-            content = "<h1>404 Not Found</h1>"
+def accepts_gzip(header):
+    """True if an Accept-Encoding header allows gzip (honoring q=0).
+
+    An explicit gzip entry wins over "*"; a malformed q-value counts as q=0.
+    """
+    found = {}
+    for part in (header or "").split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if token not in ("gzip", "*") or token in found:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        found[token] = q > 0
+    return found.get("gzip", found.get("*", False))
+
+
+class ChunkedWriter:
+    """Buffered chunked-transfer body writer with optional gzip."""
+
+    def __init__(self, wfile, compress):
+        self.wfile = wfile
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        self.buffer = []
+        self.size = 0
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.buffer.append(data)
+        self.size += len(data)
+        if self.size >= STREAM_CHUNK_BYTES:
+            self.flush()
+
+    def flush(self):
+        data = b"".join(self.buffer)
+        self.buffer, self.size = [], 0
+        if self.compressor:
+            data = self.compressor.compress(data)
+        self._send_chunk(data)
+
+    def close(self):
+        self.flush()
+        if self.compressor:
+            self._send_chunk(self.compressor.flush())
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_chunk(self, data):
+        if data:
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+
+class ChangeWatcher:
+    """Fans one trip's row-level changes out to its open /events-stream clients.
+
+    One background thread polls PRAGMA data_version on its own connection.
+    Only when another connection has committed does it read the `changes`
+    log past the last seq it saw and publish the affected rows, so open tabs
+    never query SQLite themselves.
+    """
+
+    POLL_SECONDS = 0.5
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.thread = None
+        self.closed = False
+
+    def subscribe(self, urls=None):
+        """Queue of changes for one client, with row HTML linked via ``urls``."""
+        q = queue.Queue()
+        with self.lock:
+            self.subscribers[q] = urls or LIVE_URLS
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="change-watcher", daemon=True)
+                self.thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.pop(q, None)
+
+    def close(self):
+        """Stop the polling thread (only called once nobody is subscribed)."""
+        self.closed = True
+
+    def run(self):
+        conn = get_db(self.db_path)
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        while True:
+            time.sleep(self.POLL_SECONDS)
+            if self.closed:
+                conn.close()
+                return
+            with self.lock:
+                if not self.subscribers:
+                    continue
+            current = conn.execute("PRAGMA data_version").fetchone()[0]
+            if current == version:
+                continue
+            version = current
+            rows = []
+            for change_seq, table, _, row_id, row in changes_since(conn, seq):
+                seq = change_seq
+                if table in LIVE_TABLES:
+                    rows.append((table, row_id, row))
+            with self.lock:
+                # Rows are rendered once per link scheme (/t/<trip> or unprefixed)
+                rendered = {}
+                for q, urls in self.subscribers.items():
+                    if urls not in rendered:
+                        rendered[urls] = [
+                            {"table": table, "op": "delete", "id": row_id} if row is None else
+                            {"table": table, "op": "upsert", "id": row_id, "html": LIVE_TABLES[table](row, urls)}
+                            for table, row_id, row in rows]
+                    for change in rendered[urls]:
+                        q.put(change)
+
+
+class SharedDayCache:
+    """One DayTimelineCache on a connection shared by all request threads, so
+    /day pages are computed once per date until the database changes."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.cache = None
+
+    def get(self, date):
+        with self.lock:
+            if self.cache is None:
+                self.cache = DayTimelineCache(get_db(self.db_path))
+            return self.cache.get(date)
+
+    def close(self):
+        with self.lock:
+            if self.cache is not None:
+                self.cache.conn.close()
+                self.cache = None
+
+# Columns behind the /venues list, in display order.
+VENUE_LIST_SQL = "SELECT id, name, section, address, booking_required FROM venues ORDER BY section, name"
+
+
+class VenueRow:
+    """A view of one VenueSnapshot entry, read like a sqlite3.Row."""
+
+    __slots__ = ("snapshot", "index")
+
+    def __init__(self, snapshot, index=0):
+        self.snapshot = snapshot
+        self.index = index
+
+    def __getitem__(self, key):
+        s, i = self.snapshot, self.index
+        if key == "id":
+            return s.ids[i]
+        if key == "name":
+            return s.names[i]
+        if key == "section":
+            return s.sections[s.section_codes[i]]
+        if key == "address":
+            return s.addresses[i]
+        if key == "booking_required":
+            return s.bookings[s.booking_codes[i]]
+        raise KeyError(key)
+
+
+class VenueSnapshot:
+    """The VENUE_LIST_SQL rows held compactly in memory.
+
+    Ids live in an array, section and booking_required values are stored
+    once and referenced by small-int codes, and names/addresses are
+    interned. Snapshots are never modified; a reload builds a new one.
+    """
+
+    __slots__ = ("ids", "names", "addresses", "section_codes", "sections", "booking_codes", "bookings")
+
+    def __init__(self, rows):
+        sections, bookings = {}, {}
+        ids, names, addresses = array("q"), [], []
+        section_codes, booking_codes = array("H"), array("H")
+        for venue_id, name, section, address, booking in rows:
+            ids.append(venue_id)
+            names.append(sys.intern(name))
+            addresses.append(sys.intern(address) if address else address)
+            section_codes.append(sections.setdefault(section, len(sections)))
+            booking_codes.append(bookings.setdefault(booking, len(bookings)))
+        self.ids = ids
+        self.names = tuple(names)
+        self.addresses = tuple(addresses)
+        self.section_codes = section_codes
+        self.sections = tuple(sections)
+        self.booking_codes = booking_codes
+        self.bookings = tuple(bookings)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self):
+        """Yield every entry in order through one re-pointed VenueRow; use
+        each before advancing."""
+        row = VenueRow(self)
+        for i in range(len(self.ids)):
+            row.index = i
+            yield row
+
+
+class VenueListCache:
+    """The current VenueSnapshot for one trip.
+
+    PRAGMA data_version on the cache's own connection is checked on every
+    get(); when another connection has committed, a fresh snapshot is built
+    and swapped in whole, so pages still rendering the old one are unaffected.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = None
+        self.version = None
+        self.snapshot = None
+
+    def get(self):
+        with self.lock:
+            if self.conn is None:
+                self.conn = get_db(self.db_path)
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self.version or self.snapshot is None:
+                self.snapshot = VenueSnapshot(self.conn.execute(VENUE_LIST_SQL))
+                self.version = version
+            return self.snapshot
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+            self.snapshot = None
+
+
+class Writer:
+    """Owns the viewer's only writing connection, on one background thread.
+
+    Request threads submit a write and block until it commits. The writer
+    drains everything queued (up to MAX_BATCH) into a single transaction,
+    with a savepoint per write so one failure doesn't sink the rest; a burst
+    of edits costs one commit. The database runs in WAL mode, so readers are
+    never blocked by it.
+    """
+
+    MAX_BATCH = 200
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def submit(self, func, *args):
+        """Run ``func(conn, *args)`` on the writer connection and return its result."""
+        item = {"func": func, "args": args, "done": threading.Event(), "result": None, "error": None}
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="writer", daemon=True)
+                self.thread.start()
+        self.queue.put(item)
+        item["done"].wait()
+        if item["error"] is not None:
+            raise item["error"]
+        return item["result"]
+
+    def close(self):
+        """Stop the writer thread once it has applied everything submitted."""
+        with self.lock:
+            if self.thread is not None:
+                self.queue.put(None)
+
+    def run(self):
+        conn = get_db(self.db_path)
+        conn.isolation_level = None  # transactions are managed explicitly below
+        conn.execute("PRAGMA journal_mode = WAL")
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.MAX_BATCH and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                if len(batch) > 1:
+                    self.apply(conn, batch[:-1])
+                conn.close()
+                return
+            self.apply(conn, batch)
+
+    def apply(self, conn, batch):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for item in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    item["result"] = item["func"](conn, *item["args"])
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    item["error"] = e
+                conn.execute("RELEASE write")
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for item in batch:
+                item["error"] = item["error"] or e
+        finally:
+            for item in batch:
+                item["done"].set()
+
+
+# ---------------------------------------------------------------------------
+# Trips
+# ---------------------------------------------------------------------------
+
+# Idle read connections kept per trip.
+POOL_SIZE = 4
+# Rendered pages kept per trip (least recently used dropped first).
+PAGE_CACHE_SIZE = 256
+# Trips kept open at once; past this the least recently used idle trip is
+# closed (its connections, writer and watcher) and reopened on demand.
+MAX_OPEN_TRIPS = 16
+# Cross-trip search results shown per query.
+SEARCH_LIMIT = 200
+
+
+class ConnectionPool:
+    """Reusable read connections for one trip database."""
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self.lock = threading.Lock()
+        self.idle = []
+        self.closed = False
+
+    @contextlib.contextmanager
+    def connection(self):
+        with self.lock:
+            conn = self.idle.pop() if self.idle else None
+        if conn is None:
+            conn = get_db(self.db_path)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self.lock:
+                if not self.closed and len(self.idle) < self.size:
+                    self.idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+
+class PageCache:
+    """Rendered pages for one trip, all dropped when the trip's change log
+    moves. The stamp is MAX(seq) of `changes`, which every write to venues,
+    events or reservations bumps through its triggers."""
+
+    def __init__(self, size=PAGE_CACHE_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.pages = OrderedDict()
+
+    @staticmethod
+    def stamp_for(conn):
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def get(self, stamp, key):
+        with self.lock:
+            if stamp != self.stamp:
+                self.stamp = stamp
+                self.pages.clear()
+                return None
+            page = self.pages.get(key)
+            if page is not None:
+                self.pages.move_to_end(key)
+            return page
+
+    def put(self, stamp, key, page):
+        with self.lock:
+            if stamp != self.stamp:
+                return
+            self.pages[key] = page
+            if len(self.pages) > self.size:
+                self.pages.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.pages.clear()
+
+
+class Trip:
+    """One trip database and everything the viewer keeps open for it."""
+
+    def __init__(self, name, db_path):
+        self.name = name
+        self.db_path = db_path
+        self.urls = LiveUrls(f"/t/{quote(name)}")
+        self.pool = ConnectionPool(db_path)
+        self.pages = PageCache()
+        self.day_cache = SharedDayCache(db_path)
+        self.venues = VenueListCache(db_path)
+        self.writer = Writer(db_path)
+        self.watcher = ChangeWatcher(db_path)
+        self.users = 0
+
+    def busy(self):
+        return self.users > 0 or bool(self.watcher.subscribers)
+
+    def close(self):
+        self.writer.close()
+        self.watcher.close()
+        self.day_cache.close()
+        self.venues.close()
+        self.pool.close()
+
+
+class TripRegistry:
+    """Trip name -> database path, and the trips currently open.
+
+    Trips open on first use and stay open (LRU order) until more than
+    ``max_open`` are open; then the least recently used trips with no request
+    or event stream in flight are closed. A trip whose database path changed
+    is retired and closed once idle. Until configure() is called the
+    registry serves DB_PATH as its only trip.
+    """
+
+    def __init__(self, max_open=MAX_OPEN_TRIPS):
+        self.max_open = max_open
+        self.lock = threading.Lock()
+        self.paths = {}
+        self.open = OrderedDict()
+        self.retired = []
+
+    def configure(self, paths):
+        """Serve ``paths`` (trip databases), each named after its file stem."""
+        trips = {}
+        for path in paths:
+            name = Path(path).stem
+            if name in trips:
+                raise ValueError(f"Two trip databases are named '{name}': {trips[name]} and {path}")
+            trips[name] = Path(path)
+        with self.lock:
+            self.paths = trips
+
+    def trips(self):
+        """Trip name -> path, in configuration order; the first is the default."""
+        with self.lock:
+            return dict(self.paths) if self.paths else {Path(DB_PATH).stem: Path(DB_PATH)}
+
+    @contextlib.contextmanager
+    def use(self, name=None):
+        """Hold trip ``name`` (default: the first) open for one request.
+
+        Raises HTTPError 404 for an unknown trip.
+        """
+        trips = self.trips()
+        if name is None:
+            name = next(iter(trips))
+        if name not in trips:
+            raise HTTPError(404, f"No trip named '{name}'")
+        path = trips[name]
+        with self.lock:
+            trip = self.open.get(name)
+            if trip is not None and trip.db_path != path:
+                self.retired.append(self.open.pop(name))
+                self._evict()
+                trip = None
+            if trip is None:
+                trip = self.open[name] = Trip(name, path)
+            self.open.move_to_end(name)
+            trip.users += 1
+        try:
+            yield trip
+        finally:
+            with self.lock:
+                trip.users -= 1
+                self._evict()
+
+    def _evict(self):
+        for trip in [t for t in self.retired if not t.busy()]:
+            self.retired.remove(trip)
+            trip.close()
+        for name in list(self.open):
+            if len(self.open) <= self.max_open:
+                break
+            trip = self.open[name]
+            if not trip.busy():
+                del self.open[name]
+                trip.close()
+
+    def close_all(self):
+        with self.lock:
+            trips, self.open = list(self.open.values()) + self.retired, OrderedDict()
+            self.retired = []
+        for trip in trips:
+            trip.close()
+
+
+TRIPS = TripRegistry()
+
+
+def _like_pattern(text):
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_trips(paths, query, limit=SEARCH_LIMIT):
+    """Venues and events whose names match ``query`` in any trip.
+
+    The trip databases are ATTACHed read-only to one in-memory connection,
+    in groups no larger than SQLite's attach limit, and each group is
+    searched with a single UNION ALL query. Returns dicts with trip, kind,
+    id, title and detail.
+    """
+    conn = sqlite3.connect("file::memory:", uri=True)
+    conn.row_factory = sqlite3.Row
+    group_size = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    items = list(paths.items())
+    params = {"q": _like_pattern(query), "limit": limit}
+    results = []
+    try:
+        for start in range(0, len(items), group_size):
+            group = items[start:start + group_size]
+            selects = []
+            for i, (name, path) in enumerate(group):
+                conn.execute(f"ATTACH DATABASE ? AS t{i}", (Path(path).resolve().as_uri() + "?mode=ro",))
+                params[f"trip{i}"] = name
+                selects.append(f"""
+                    SELECT :trip{i} AS trip, 'venue' AS kind, id, name AS title, section AS detail
+                    FROM t{i}.venues WHERE name LIKE :q ESCAPE '\\'
+                    UNION ALL
+                    SELECT :trip{i}, 'event', id, title, COALESCE(date, '')
+                    FROM t{i}.events WHERE title LIKE :q ESCAPE '\\' OR venue_name LIKE :q ESCAPE '\\'""")
+            try:
+                rows = conn.execute(" UNION ALL ".join(selects) + " ORDER BY trip, kind DESC, title LIMIT :limit",
+                                    params).fetchall()
+            finally:
+                for i in range(len(group)):
+                    conn.execute(f"DETACH DATABASE t{i}")
+            results += [dict(r) for r in rows]
+            if len(results) >= limit:
+                break
+    finally:
+        conn.close()
+    return results[:limit]
+
+
+class LiveUrls:
+    """Links for pages served by the running viewer; ``prefix`` is the trip's
+    /t/<trip> root, or "" for the default trip's unprefixed routes."""
+
+    live = True
+
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+
+    def page(self, name):
+        return f"{self.prefix}/{name}"
+
+    def venue(self, venue_id):
+        return f"{self.prefix}/venue?id={venue_id}"
+
+    def event(self, event_id):
+        return f"{self.prefix}/event?id={event_id}"
+
+    def stylesheet(self):
+        return CSS_URL
+
+
+class StaticUrls:
+    """Relative links for an exported site; ``depth`` is how many directories
+    below the site root the linking page lives."""
+
+    live = False
+
+    def __init__(self, depth=0):
+        self.up = "../" * depth
+
+    def page(self, name):
+        return f"{self.up}{name}.html"
+
+    def venue(self, venue_id):
+        return f"{self.up}venue/{venue_id}.html"
+
+    def event(self, event_id):
+        return f"{self.up}event/{event_id}.html"
+
+    def stylesheet(self):
+        return f"{self.up}static/style.css"
+
+
+LIVE_URLS = LiveUrls()
+# Pages outside any trip (the trip list and search) link to the default
+# trip's pages and don't load the live-update script.
+INDEX_URLS = LiveUrls()
+INDEX_URLS.live = False
+
+
+def venue_row_html(r, urls=LIVE_URLS):
+    return f"""<tr id="venues-{r['id']}">
+                <td><a href="{urls.venue(r['id'])}">{escape(r['name'])}</a></td>
+                <td>{escape(r['section'])}</td>
+                <td>{escape(r['address'] or '')[:50]}</td>
+                <td>{escape(r['booking_required'] or '')}</td>
+            </tr>"""
+
+
+def event_row_html(r, urls=LIVE_URLS):
+    return f"""<tr id="events-{r['id']}">
+                <td><a href="{urls.event(r['id'])}">{escape(r['title'])}</a></td>
+                <td>{escape(r['venue_name'] or '')}</td>
+                <td>{escape(r['date'] or '')}</td>
+                <td>{escape(r['time'] or '')}</td>
+                <td>{escape(r['category'] or '')}</td>
+            </tr>"""
 
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
 
-        page = f"""<!DOCTYPE html>
+def reservation_row_html(r, urls=LIVE_URLS):
+    return f"""<tr id="reservations-{r['id']}">
+                <td>{escape(r['venue_name'])}</td>
+                <td>{escape(r['date'])}</td>
+                <td>{escape(r['time'] or '')} - {escape(r['end_time'] or '')}</td>
+                <td><code>{escape(r['confirmation'] or '')}</code></td>
+                <td>{escape(r['party_size'] or '')}</td>
+                <td>{escape(r['notes'] or '')}</td>
+            </tr>"""
+
+
+# Tables pushed over /events-stream and the list-row renderer for each.
+LIVE_TABLES = {
+    "venues": venue_row_html,
+    "events": event_row_html,
+    "reservations": reservation_row_html,
+}
+
+
+def render_page(content, urls=LIVE_URLS, live=""):
+    """Wrap page content in the shared layout. Live pages also load the
+    /events-stream patching script; exported pages don't."""
+    script = f'<script src="{LIVE_JS_URL}" defer></script>\n' if urls.live else ""
+    stream = f' data-stream="{urls.page("events-stream")}"' if urls.live else ""
+    return f"""<!DOCTYPE html>
 <html>
 <head>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>London Trip DB</title>
-{STYLE}
-</head>
+<link rel="stylesheet" href="{urls.stylesheet()}">
+{script}</head>
 <body>
 <div class="nav">
-    <a href="/venues">Venues</a>
-    <a href="/events">Events</a>
-    <a href="/reservations">Reservations</a>
+    <a href="{urls.page('venues')}">Venues</a>
+    <a href="{urls.page('events')}">Events</a>
+    <a href="{urls.page('reservations')}">Reservations</a>
 </div>
+<div id="content" data-live="{live}"{stream}>
 {content}
+</div>
 </body>
 </html>"""
-        self.send_header("charset", "utf-8")
-        self.wfile.write(page.encode("utf-8"))
 
-    def log_message(self, format, *args):
-        pass  # Suppress logging
+
+class Pages:
+    """HTML page bodies, rendered from an open connection with a given link
+    scheme. Live pages pass their trip's Writer, which venue pages use to
+    save lazily fetched Places details, and its VenueListCache, which the
+    venue list reads instead of querying."""
+
+    def __init__(self, conn, urls=LIVE_URLS, writer=None, venues=None):
+        self.conn = conn
+        self.urls = urls
+        self.writer = writer
+        self.venues = venues
 
     def list_venues(self):
-        conn = get_db()
-        rows = conn.execute("SELECT id, name, section, address, booking_required FROM venues ORDER BY section, name").fetchall()
-        conn.close()
+        if self.venues is not None:
+            snapshot = self.venues.get()
+            rows, count = snapshot.rows(), len(snapshot)
+        else:
+            rows = self.conn.execute(VENUE_LIST_SQL).fetchall()
+            count = len(rows)
 
-        html_rows = ""
-        for r in rows:
-            html_rows += f"""<tr>
-                <td><a href="/venue?id={r['id']}">{escape(r['name'])}</a></td>
-                <td>{escape(r['section'])}</td>
-                <td>{escape(r['address'] or '')[:50]}</td>
-                <td>{escape(r['booking_required'] or '')}</td>
-            </tr>"""
+        html_rows = "".join(venue_row_html(r, self.urls) for r in rows)
 
         return f"""
-        <h1>Venues ({len(rows)})</h1>
-        <table>
+        <h1>Venues (<span class="live-count" data-table="venues">{count}</span>)</h1>
+        <table data-table="venues">
             <tr><th>Name</th><th>Section</th><th>Address</th><th>Booking</th></tr>
             {html_rows}
         </table>
@@ -128,20 +897,22 @@ class Handler(BaseHTTPRequestHandler):
 
     def show_venue(self, venue_id):
         if not venue_id:
-            return "<p>No venue ID</p>"
-
-        conn = get_db()
-        row = conn.execute("SELECT * FROM venues WHERE id = ?", (venue_id,)).fetchone()
-        events = conn.execute("SELECT * FROM events WHERE venue_name = ?", (row['name'] if row else '',)).fetchall()
-        reservations = conn.execute("SELECT * FROM reservations WHERE matched_venue = ? OR venue_name = ?",
-                                    (row['name'] if row else '', row['name'] if row else '')).fetchall()
-        conn.close()
+            raise HTTPError(400, "No venue ID")
 
+        row = self.conn.execute("SELECT * FROM venues WHERE id = ?", (venue_id,)).fetchone()
         if not row:
-            return "<p>Venue not found</p>"
+            raise HTTPError(404, "Venue not found")
+        if self.writer is not None and details_due(row):
+            row = self.load_details(row)
+        events = self.conn.execute("SELECT * FROM events WHERE venue_name = ?", (row['name'],)).fetchall()
+        reservations = self.conn.execute("SELECT * FROM reservations WHERE matched_venue = ? OR venue_name = ?",
+                                         (row['name'], row['name'])).fetchall()
+        aliases = [a['alias'] for a in self.conn.execute(
+            "SELECT alias FROM venue_aliases WHERE venue_id = ? ORDER BY alias", (row['id'],))]
 
         fields = [
             ("Name", row['name']),
+            ("Also known as", ", ".join(aliases)),
             ("Section", row['section']),
             ("Source", row['source']),
             ("Address", row['address']),
@@ -166,7 +937,7 @@ class Handler(BaseHTTPRequestHandler):
         if events:
             events_html = "<h3>Events at this venue</h3><ul>"
             for e in events:
-                events_html += f"<li><a href='/event?id={e['id']}'>{escape(e['title'])}</a> ({escape(e['date'] or 'ongoing')})</li>"
+                events_html += f"<li><a href='{self.urls.event(e['id'])}'>{escape(e['title'])}</a> ({escape(e['date'] or 'ongoing')})</li>"
             events_html += "</ul>"
 
         res_html = ""
@@ -182,27 +953,48 @@ class Handler(BaseHTTPRequestHandler):
             {fields_html}
         </div>
         {events_html}
-        <p><a href="/venues">&larr; Back to venues</a></p>
+        <p><a href="{self.urls.page('venues')}">&larr; Back to venues</a></p>
         """
 
-    def list_events(self):
-        conn = get_db()
-        rows = conn.execute("SELECT id, title, venue_name, date, time, category FROM events ORDER BY date, time").fetchall()
-        conn.close()
+    def load_details(self, row):
+        """Fetch Places details for a venue synced with --ids-only and store
+        them through the writer, so later views (and the CLI) reuse them.
+        Without GOOGLE_MAPS_API_KEY the page shows what's there."""
+        api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
+        if not api_key:
+            return row
+        ledger = ApiLedger()
+        details = fetch_place_details(row['google_place_id'], api_key, ledger)
+        self.writer.submit(_write_details, row['name'], details, ledger)
+        return self.conn.execute("SELECT * FROM venues WHERE id = ?", (row['id'],)).fetchone()
 
-        html_rows = ""
-        for r in rows:
-            html_rows += f"""<tr>
-                <td><a href="/event?id={r['id']}">{escape(r['title'])}</a></td>
-                <td>{escape(r['venue_name'] or '')}</td>
-                <td>{escape(r['date'] or '')}</td>
-                <td>{escape(r['time'] or '')}</td>
-                <td>{escape(r['category'] or '')}</td>
-            </tr>"""
+    def _span_filter(self, date_from, date_to):
+        try:
+            return span_filter(date_from, date_to)
+        except ValueError:
+            raise HTTPError(400, "from/to must be YYYY-MM-DD or an ISO datetime")
+
+    def _range_form(self, name, date_from, date_to):
+        """From/to filter for a list page; exported (static) pages have no query strings."""
+        if not self.urls.live:
+            return ""
+        return f"""<form class="range" action="{self.urls.page(name)}">
+            From <input type="date" name="from" value="{escape(date_from or '')}">
+            to <input type="date" name="to" value="{escape(date_to or '')}">
+            <button>Filter</button>
+        </form>"""
+
+    def list_events(self, date_from=None, date_to=None):
+        where, params = self._span_filter(date_from, date_to)
+        rows = self.conn.execute(f"SELECT id, title, venue_name, date, time, category FROM events{where} "
+                                 "ORDER BY start_min, date, venue_name", params).fetchall()
+
+        html_rows = "".join(event_row_html(r, self.urls) for r in rows)
 
         return f"""
-        <h1>Events ({len(rows)})</h1>
-        <table>
+        <h1>Events (<span class="live-count" data-table="events">{len(rows)}</span>)</h1>
+        {self._range_form('events', date_from, date_to)}
+        <table data-table="events">
             <tr><th>Title</th><th>Venue</th><th>Date</th><th>Time</th><th>Category</th></tr>
             {html_rows}
         </table>
@@ -210,14 +1002,12 @@ class Handler(BaseHTTPRequestHandler):
 
     def show_event(self, event_id):
         if not event_id:
-            return "<p>No event ID</p>"
+            raise HTTPError(400, "No event ID")
 
-        conn = get_db()
-        row = conn.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
-        conn.close()
+        row = self.conn.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
 
         if not row:
-            return "<p>Event not found</p>"
+            raise HTTPError(404, "Event not found")
 
         fields = [
             ("Title", row['title']),
@@ -241,39 +1031,622 @@ class Handler(BaseHTTPRequestHandler):
         <div class="card">
             {fields_html}
         </div>
-        <p><a href="/events">&larr; Back to events</a></p>
+        <p><a href="{self.urls.page('events')}">&larr; Back to events</a></p>
         """
 
-    def list_reservations(self):
-        conn = get_db()
-        rows = conn.execute("SELECT * FROM reservations ORDER BY date, time").fetchall()
-        conn.close()
+    def list_reservations(self, date_from=None, date_to=None):
+        where, params = self._span_filter(date_from, date_to)
+        rows = self.conn.execute(f"SELECT * FROM reservations{where} ORDER BY start_min, date, time",
+                                 params).fetchall()
 
-        html_rows = ""
-        for r in rows:
-            html_rows += f"""<tr>
-                <td>{escape(r['venue_name'])}</td>
-                <td>{escape(r['date'])}</td>
-                <td>{escape(r['time'] or '')} - {escape(r['end_time'] or '')}</td>
-                <td><code>{escape(r['confirmation'] or '')}</code></td>
-                <td>{escape(r['party_size'] or '')}</td>
-                <td>{escape(r['notes'] or '')}</td>
-            </tr>"""
+        html_rows = "".join(reservation_row_html(r, self.urls) for r in rows)
 
         return f"""
-        <h1>Reservations ({len(rows)})</h1>
-        <table>
+        <h1>Reservations (<span class="live-count" data-table="reservations">{len(rows)}</span>)</h1>
+        {self._range_form('reservations', date_from, date_to)}
+        <table data-table="reservations">
             <tr><th>Venue</th><th>Date</th><th>Time</th><th>Confirmation</th><th>Party</th><th>Notes</th></tr>
             {html_rows}
         </table>
         """
 
-if __name__ == "__main__":
-    port = 8080
-    server = HTTPServer(("localhost", port), Handler)
-    print(f"Server running at http://localhost:{port}")
+    def show_day(self, date, cache=None):
+        if not date:
+            raise HTTPError(400, "No date")
+        try:
+            day = datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPError(400, "date must be YYYY-MM-DD")
+        timeline = cache.get(date) if cache else day_timeline(self.conn, date)
+
+        rows_html = ""
+        venues_html = ""
+        for item in timeline:
+            if item["kind"] == "venue":
+                venues_html += (f"<li><a href='{self.urls.venue(item['id'])}'>{escape(item['title'])}</a>"
+                                f" {escape(item['when'])}</li>")
+                continue
+            if item["kind"] == "event":
+                what = f"<a href='{self.urls.event(item['id'])}'>{escape(item['title'])}</a>"
+            else:
+                what = f"{escape(item['title'])} <span class='tag confirmed'>RESERVED</span>"
+            rows_html += f"""<tr>
+                <td>{escape(item['when'])}</td>
+                <td>{what}</td>
+                <td>{escape(item['venue'] or '')}</td>
+                <td>{escape(item['detail'] or '')}</td>
+            </tr>"""
+
+        prev_day = (day - timedelta(days=1)).strftime("%Y-%m-%d")
+        next_day = (day + timedelta(days=1)).strftime("%Y-%m-%d")
+        return f"""
+        <h1>{day.strftime('%A %d %B %Y')}</h1>
+        <p><a href="{self.urls.page('day')}?date={prev_day}">&larr; {prev_day}</a> | <a href="{self.urls.page('day')}?date={next_day}">{next_day} &rarr;</a></p>
+        <table>
+            <tr><th>When</th><th>What</th><th>Where</th><th>Notes</th></tr>
+            {rows_html or '<tr><td colspan="4">Nothing scheduled.</td></tr>'}
+        </table>
+        {f"<h3>Open this day</h3><ul>{venues_html}</ul>" if venues_html else ""}
+        """
+
+
+# POST bodies are JSON objects or form-encoded; field names follow the CLI flags.
+MAX_POST_BYTES = 64 * 1024
+BOOKING_CHOICES = ("yes", "no", "recommended", "free")
+
+
+def _field(data, key):
+    value = data.get(key)
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _write_booking(conn, name, fields):
+    db_name = _find_venue_name(conn, name)
+    if not db_name:
+        raise HTTPError(404, f"Venue '{name}' not found")
+    update_booking(conn, db_name, *fields)
+    return {"venue": db_name}
+
+
+def _write_details(conn, name, details, ledger):
+    if details is not None:
+        save_details(conn, name, details)
+    else:
+        save_details_failure(conn, name)
+    ledger.flush(conn)
+
+
+def _write_event(conn, fields):
+    save_event(conn, *fields)
+    return {"title": fields[0]}
+
+
+def _write_reservation(conn, fields):
+    return {"venue": fields[0], "matched_venue": save_reservation(conn, *fields)}
+
+
+def set_booking_write(data):
+    """Validate a /api/set-booking body; returns the writer call."""
+    name = _field(data, "venue")
+    if not name:
+        raise HTTPError(400, "venue is required")
+    required = _field(data, "booking_required")
+    if required is not None and required not in BOOKING_CHOICES:
+        raise HTTPError(400, f"booking_required must be one of {', '.join(BOOKING_CHOICES)}")
+    fields = (_field(data, "price"), required, _field(data, "booking_url"),
+              _field(data, "booking_notes"), _field(data, "member_required"))
+    if all(f is None for f in fields):
+        raise HTTPError(400, "No booking fields provided")
+    return _write_booking, name, fields
+
+
+def add_event_write(data):
+    """Validate a /api/add-event body; returns the writer call."""
+    title = _field(data, "title")
+    if not title:
+        raise HTTPError(400, "title is required")
+    fields = (title, _field(data, "venue"), _field(data, "date"), _field(data, "time"),
+              _field(data, "price"), _field(data, "url"), _field(data, "category"),
+              _field(data, "notes"), _field(data, "source"))
+    return _write_event, fields
+
+
+def add_reservation_write(data):
+    """Validate a /api/add-reservation body; returns the writer call."""
+    venue, date = _field(data, "venue"), _field(data, "date")
+    if not venue or not date:
+        raise HTTPError(400, "venue and date are required")
+    party_size = _field(data, "party_size")
+    try:
+        party_size = int(party_size) if party_size else None
+    except ValueError:
+        raise HTTPError(400, "party_size must be a number")
+    fields = (venue, date, _field(data, "time"), _field(data, "end_time"),
+              _field(data, "confirmation"), party_size, _field(data, "notes"))
+    return _write_reservation, fields
+
+
+WRITE_ROUTES = {
+    "/api/set-booking": set_booking_write,
+    "/api/add-event": add_event_write,
+    "/api/add-reservation": add_reservation_write,
+}
+
+
+def trips_index(trips):
+    """Root page when several trips are served: links plus cross-trip search."""
+    items = "".join(f"<li><a href='/t/{quote(name)}/venues'>{escape(name)}</a></li>" for name in trips)
+    return f"""
+        <h1>Trips ({len(trips)})</h1>
+        <form action="/search">
+            <input type="search" name="q" placeholder="Search every trip"> <button>Search</button>
+        </form>
+        <ul>{items}</ul>
+        """
+
+
+def search_page(trips, query):
+    if not query:
+        return trips_index(trips)
+    rows = search_trips(trips, query)
+    items = ""
+    for r in rows:
+        urls = LiveUrls(f"/t/{quote(r['trip'])}")
+        link = urls.venue(r["id"]) if r["kind"] == "venue" else urls.event(r["id"])
+        items += (f"<tr><td>{escape(r['trip'])}</td><td>{r['kind']}</td>"
+                  f"<td><a href='{link}'>{escape(r['title'])}</a></td><td>{escape(r['detail'])}</td></tr>")
+    return f"""
+        <h1>Search: {escape(query)} ({len(rows)})</h1>
+        <form action="/search">
+            <input type="search" name="q" value="{escape(query)}"> <button>Search</button>
+        </form>
+        <table>
+            <tr><th>Trip</th><th>Kind</th><th>Name</th><th>Section / date</th></tr>
+            {items or '<tr><td colspan="4">No matches.</td></tr>'}
+        </table>
+        """
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def route(self, path):
+        """Split /t/<trip>/<rest> into (trip name, rest, urls); other paths
+        belong to the default trip and keep their unprefixed links."""
+        if path.startswith("/t/"):
+            name, _, rest = path[len("/t/"):].partition("/")
+            name = unquote(name)
+            return name, "/" + rest, LiveUrls(f"/t/{quote(name)}")
+        return None, path, LIVE_URLS
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        params = parse_qs(parsed.query)
+
+        if path in STATIC:
+            self.serve_static(path)
+            return
+        if path == "/search" or (path == "/" and len(TRIPS.trips()) > 1):
+            trips = TRIPS.trips()
+            query = params.get("q", [""])[0].strip()
+            content = search_page(trips, query) if path == "/search" else trips_index(trips)
+            self.send_body(200, "text/html; charset=utf-8", render_page(content, INDEX_URLS).encode("utf-8"))
+            return
+
+        name, path, urls = self.route(path)
+        try:
+            with TRIPS.use(name) as trip:
+                if name is not None:
+                    urls = trip.urls
+                if path.startswith("/api/"):
+                    self.serve_api(trip, path)
+                elif path == "/events-stream":
+                    self.serve_events_stream(trip, urls)
+                else:
+                    self.serve_page(trip, urls, path, params, parsed.query)
+        except HTTPError as e:
+            page = render_page(f"<h1>{e.status} {escape(e.message)}</h1>")
+            self.send_body(e.status, "text/html; charset=utf-8", page.encode("utf-8"))
+
+    def serve_page(self, trip, urls, path, params, query):
+        """Render (or reuse from the trip's page cache) one HTML page."""
+        key = (urls.prefix, path, query)
+        with trip.pool.connection() as conn:
+            stamp = trip.pages.stamp_for(conn)
+            cached = trip.pages.get(stamp, key)
+            if cached is not None:
+                self.send_body(200, "text/html; charset=utf-8", cached)
+                return
+
+            status = 200
+            # Detail pages (and filtered lists, which can't tell whether a pushed
+            # row falls in their range) re-fetch themselves when a row they show changes
+            live = ""
+            date_from = params.get("from", [None])[0]
+            date_to = params.get("to", [None])[0]
+            pages = Pages(conn, urls, trip.writer, trip.venues)
+            try:
+                if path == "/" or path == "/venues":
+                    content = pages.list_venues()
+                elif path == "/venue":
+                    venue_id = params.get("id", [None])[0]
+                    content = pages.show_venue(venue_id)
+                    live = f"venues-{escape(venue_id)} events reservations"
+                elif path == "/events":
+                    content = pages.list_events(date_from, date_to)
+                    live = "events" if date_from or date_to else ""
+                elif path == "/event":
+                    event_id = params.get("id", [None])[0]
+                    content = pages.show_event(event_id)
+                    live = f"events-{escape(event_id)}"
+                elif path == "/day":
+                    content = pages.show_day(params.get("date", [None])[0], trip.day_cache)
+                    live = "venues events reservations"
+                elif path == "/reservations":
+                    content = pages.list_reservations(date_from, date_to)
+                    live = "reservations" if date_from or date_to else ""
+                else:
+                    raise HTTPError(404, "Not Found")
+            except HTTPError as e:
+                status = e.status
+                content = f"<h1>{e.status} {escape(e.message)}</h1>"
+
+        page = render_page(content, urls, live=live).encode("utf-8")
+        if status == 200:
+            trip.pages.put(stamp, key, page)
+        self.send_body(status, "text/html; charset=utf-8", page)
+
+    def do_POST(self):
+        name, path, _ = self.route(urlparse(self.path).path)
+        self.body_read = False
+        try:
+            route = WRITE_ROUTES.get(path)
+            if route is None:
+                raise HTTPError(404, "Not Found")
+            call = route(self.read_form())
+            with TRIPS.use(name) as trip:
+                result = trip.writer.submit(*call)
+            self.send_json(200, {"ok": True, **result})
+        except HTTPError as e:
+            # An unread body would be parsed as the next keep-alive request
+            headers = None if self.body_read else {"Connection": "close"}
+            self.send_json(e.status, {"error": e.message}, headers)
+        except sqlite3.Error as e:
+            self.send_json(500, {"error": str(e)})
+
+    def read_form(self):
+        """Parse a JSON or form-encoded request body into a dict."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_POST_BYTES:
+            raise HTTPError(413, "Request body too large")
+        raw = self.rfile.read(length)
+        self.body_read = len(raw) == length
+        try:
+            body = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            raise HTTPError(400, "Request body is not valid UTF-8")
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                data = json.loads(body or "{}")
+            except json.JSONDecodeError:
+                raise HTTPError(400, "Invalid JSON")
+            if not isinstance(data, dict):
+                raise HTTPError(400, "Expected a JSON object")
+            return data
+        return parse_qs(body)
+
+    def send_body(self, status, content_type, body, headers=None):
+        """Send a complete (non-streamed) response, gzipped if the client allows."""
+        gzipped = accepts_gzip(self.headers.get("Accept-Encoding")) and len(body) > 512
+        if gzipped:
+            body = gzip.compress(body, compresslevel=6)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def serve_static(self, path):
+        asset = STATIC[path]
+        headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": asset["etag"]}
+        if self.headers.get("If-None-Match") == asset["etag"]:
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self.send_body(200, asset["type"], asset["body"], headers)
+
+    def serve_events_stream(self, trip, urls):
+        """Server-Sent Events: push the trip's changed rows until the client goes away."""
+        q = trip.watcher.subscribe(urls)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self.wfile.write(b"retry: 2000\n\n")
+            self.wfile.flush()
+            while True:
+                try:
+                    change = q.get(timeout=15)
+                except queue.Empty:
+                    # Keepalive comment; also how we notice a closed tab
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    self.wfile.write(f"event: change\ndata: {json.dumps(change)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            trip.watcher.unsubscribe(q)
+
+    # -- JSON API ----------------------------------------------------------
+
+    def serve_api(self, trip, path):
+        if path == "/api/venues":
+            # raw_response is large and only useful per venue; see /api/venue/<id>
+            self.stream_json(trip, """
+                SELECT id, name, source, section, search_query, google_place_id,
+                       google_display_name, address, regular_hours_json, regular_hours_text,
+                       google_maps_uri, fetched_at, ticket_price, booking_required,
+                       booking_url, booking_notes, member_required
+                FROM venues ORDER BY section, name""")
+        elif path == "/api/events":
+            self.stream_json(trip, "SELECT * FROM events ORDER BY date, time")
+        elif path == "/api/reservations":
+            self.stream_json(trip, "SELECT * FROM reservations ORDER BY date, time")
+        elif path.startswith("/api/venue/"):
+            self.venue_json(trip, path[len("/api/venue/"):])
+        else:
+            self.send_json(404, {"error": "Not Found"})
+
+    def send_json(self, status, obj, headers=None):
+        self.send_body(status, "application/json; charset=utf-8", json.dumps(obj).encode("utf-8"), headers)
+
+    def stream_json(self, trip, sql, params=()):
+        """Stream a query result as a JSON array using chunked transfer encoding."""
+        with trip.pool.connection() as conn:
+            cursor = conn.execute(sql, params)
+            columns = [d[0] for d in cursor.description]
+            compress = accepts_gzip(self.headers.get("Accept-Encoding"))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Vary", "Accept-Encoding")
+            if compress:
+                self.send_header("Content-Encoding", "gzip")
+            self.end_headers()
+
+            out = ChunkedWriter(self.wfile, compress)
+            out.write("[")
+            separator = ""
+            for row in cursor:
+                out.write(separator + json.dumps(dict(zip(columns, row))))
+                separator = ","
+            out.write("]")
+            out.close()
+
+    def venue_json(self, trip, venue_id):
+        if not venue_id.isdigit():
+            self.send_json(400, {"error": "Venue id must be an integer"})
+            return
+        with trip.pool.connection() as conn:
+            row = conn.execute("SELECT * FROM venues WHERE id = ?", (int(venue_id),)).fetchone()
+            if not row:
+                self.send_json(404, {"error": "Venue not found"})
+                return
+            events = conn.execute("SELECT * FROM events WHERE venue_name = ? ORDER BY date, time",
+                                  (row["name"],)).fetchall()
+            reservations = conn.execute(
+                "SELECT * FROM reservations WHERE matched_venue = ? OR venue_name = ? ORDER BY date, time",
+                (row["name"], row["name"])).fetchall()
+        venue = dict(row)
+        venue["events"] = [dict(e) for e in events]
+        venue["reservations"] = [dict(r) for r in reservations]
+        self.send_json(200, venue)
+
+    def log_message(self, format, *args):
+        pass  # Suppress logging
+
+
+# ---------------------------------------------------------------------------
+# Static site export
+# ---------------------------------------------------------------------------
+
+MANIFEST_NAME = "manifest.json"
+# Venue/event detail pages are handed to the process pool in batches of this size.
+EXPORT_BATCH = 200
+# Below this many pages a process pool costs more than it saves.
+EXPORT_POOL_MIN_PAGES = 50
+
+_export_conn = None
+_export_dir = None
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def _site_hashes(conn):
+    """Content hash of the rows behind every exported page, keyed by page path."""
+    events_by_venue = {}
+    event_rows = conn.execute("SELECT * FROM events ORDER BY id").fetchall()
+    for e in event_rows:
+        events_by_venue.setdefault(e["venue_name"], []).append(tuple(e))
+    res_by_venue = {}
+    res_rows = conn.execute("SELECT * FROM reservations ORDER BY id").fetchall()
+    for r in res_rows:
+        res_by_venue.setdefault(r["venue_name"], []).append(tuple(r))
+        if r["matched_venue"] and r["matched_venue"] != r["venue_name"]:
+            res_by_venue.setdefault(r["matched_venue"], []).append(tuple(r))
+
+    aliases_by_venue = {}
+    for a in conn.execute("SELECT venue_id, alias FROM venue_aliases ORDER BY alias"):
+        aliases_by_venue.setdefault(a["venue_id"], []).append(a["alias"])
+
+    hashes = {}
+    venue_list = []
+    for v in conn.execute("SELECT * FROM venues ORDER BY id"):
+        hashes[f"venue/{v['id']}.html"] = _digest(tuple(v), events_by_venue.get(v["name"], []),
+                                                 res_by_venue.get(v["name"], []),
+                                                 aliases_by_venue.get(v["id"], []))
+        venue_list.append((v["id"], v["name"], v["section"], v["address"], v["booking_required"]))
+    for e in event_rows:
+        hashes[f"event/{e['id']}.html"] = _digest(tuple(e))
+
+    hashes["venues.html"] = hashes["index.html"] = _digest(venue_list)
+    hashes["events.html"] = _digest([(e["id"], e["title"], e["venue_name"], e["date"], e["time"], e["category"])
+                                     for e in event_rows])
+    hashes["reservations.html"] = _digest([tuple(r) for r in res_rows])
+    return hashes
+
+
+def _export_init(db_path, out_dir):
+    global _export_conn, _export_dir
+    _export_conn = sqlite3.connect(str(db_path))
+    _export_conn.row_factory = sqlite3.Row
+    _export_dir = Path(out_dir)
+
+
+def _export_task(task):
+    """Render one batch of pages and write them; runs in a pool worker."""
+    kind, items = task
+    if kind == "list":
+        pages = Pages(_export_conn, StaticUrls(0))
+        for rel in items:
+            name = "venues" if rel == "index.html" else rel[:-len(".html")]
+            content = getattr(pages, f"list_{name}")()
+            (_export_dir / rel).write_text(render_page(content, StaticUrls(0)), encoding="utf-8")
+    else:
+        urls = StaticUrls(1)
+        pages = Pages(_export_conn, urls)
+        show = pages.show_venue if kind == "venue" else pages.show_event
+        for row_id in items:
+            content = show(row_id)
+            (_export_dir / kind / f"{row_id}.html").write_text(render_page(content, urls), encoding="utf-8")
+    return len(items)
+
+
+def export_site(db_path, out_dir, jobs=None):
+    """Pre-render every page to static files under ``out_dir``.
+
+    A manifest of per-page row hashes makes later exports incremental: only
+    pages whose underlying rows changed (or whose file is missing) are
+    rewritten, and pages for deleted rows are removed. Any change to this
+    module invalidates everything, since the templates live here.
+    """
+    out_dir = Path(out_dir)
+    for sub in ("venue", "event", "static"):
+        (out_dir / sub).mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    ensure_schema(conn)
+    hashes = _site_hashes(conn)
+    conn.close()
+
+    manifest_path = out_dir / MANIFEST_NAME
+    template = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()
+    old = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("template") == template:
+            old = manifest.get("pages", {})
+
+    stale = [rel for rel, digest in hashes.items()
+             if old.get(rel) != digest or not (out_dir / rel).exists()]
+    removed = [rel for rel in old if rel not in hashes]
+    for rel in removed:
+        (out_dir / rel).unlink(missing_ok=True)
+
+    (out_dir / "static" / "style.css").write_bytes(STATIC["/static/style.css"]["body"])
+
+    tasks = []
+    lists = [rel for rel in stale if "/" not in rel]
+    if lists:
+        tasks.append(("list", lists))
+    for kind in ("venue", "event"):
+        ids = [int(rel.split("/")[1][:-len(".html")]) for rel in stale if rel.startswith(kind + "/")]
+        tasks += [(kind, ids[i:i + EXPORT_BATCH]) for i in range(0, len(ids), EXPORT_BATCH)]
+
+    if len(stale) < EXPORT_POOL_MIN_PAGES or jobs == 1:
+        _export_init(db_path, out_dir)
+        rendered = sum(_export_task(t) for t in tasks)
+        _export_conn.close()
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_export_init,
+                                 initargs=(str(db_path), str(out_dir))) as pool:
+            rendered = sum(pool.map(_export_task, tasks))
+
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"template": template, "pages": hashes}, indent=0, sort_keys=True),
+                   encoding="utf-8")
+    tmp.replace(manifest_path)
+    print(f"Exported to {out_dir}: {rendered} page(s) rendered, "
+          f"{len(hashes) - len(stale)} unchanged, {len(removed)} removed.")
+
+
+def main():
+    global DB_PATH
+    parser = argparse.ArgumentParser(description="Web viewer for london_venues.db")
+    parser.add_argument("--port", type=int, default=8080, help="Port to serve on")
+    parser.add_argument("--db", action="append", metavar="PATH",
+                        help=f"Trip database to serve; repeat for several trips (default: {DB_PATH.name})")
+    parser.add_argument("--trips", metavar="DIR", help="Also serve every *.db in DIR as a trip")
+    parser.add_argument("--export-site", metavar="DIR",
+                        help="Render every page to static files in DIR instead of serving")
+    parser.add_argument("--jobs", type=int, help="Worker processes for --export-site (default: CPU count)")
+    args = parser.parse_args()
+    paths = [Path(p) for p in args.db or []]
+    if args.trips:
+        paths += sorted(Path(args.trips).glob("*.db"))
+    paths = paths or [DB_PATH]
+    DB_PATH = paths[0]
+
+    if args.export_site:
+        if len(paths) > 1:
+            parser.error("--export-site takes a single trip database")
+        export_site(DB_PATH, args.export_site, args.jobs)
+        return
+
+    try:
+        TRIPS.configure(paths)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # WAL lets page reads carry on while the writer thread commits
+    for path in paths:
+        conn = get_db(path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.close()
+
+    server = ThreadingHTTPServer(("localhost", args.port), Handler)
+    print(f"Server running at http://localhost:{args.port}")
     print("Press Ctrl+C to stop")
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\nStopped.")
+
+
+if __name__ == "__main__":
+    main()